@@ -0,0 +1,265 @@
+"""Benchmark chunking throughput and memory on synthetic GAO-shaped inputs.
+
+Usage:
+    uv run python scripts/benchmark_chunking.py [--sizes 1K 64K 1M 5M]
+        [--repeat 3] [--input cached.md ...] [--json]
+
+Runs every chunking strategy, in characters and in tokens, over:
+  - plain paragraphs of report prose
+  - CU-style markdown (headings, page breaks, page headers, tables)
+  - many tiny paragraphs
+  - one giant paragraph with no blank lines
+plus any markdown files passed with --input (e.g. cached CU output), and
+reports chars/sec, peak traced memory and chunk counts. No Azure services
+are needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+# Add src to path for direct execution
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from enrichment.services.chunking import (  # noqa: E402
+    ChunkingStrategy,
+    SizeUnit,
+    chunk_text,
+)
+from enrichment.services.tokenizer import get_encoding  # noqa: E402
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+WORDS = [
+    "agency", "agencies", "cybersecurity", "federal", "information", "systems",
+    "risk", "management", "controls", "DHS", "DOD", "OMB", "CISA", "implemented",
+    "recommendations", "oversight", "incident", "response", "program", "security",
+    "officials", "reported", "assessment", "workforce", "critical",
+    "infrastructure", "vulnerabilities", "requirements", "guidance", "monitoring",
+]  # fmt: skip
+AGENCIES = ["DHS", "DOD", "OMB", "CISA", "GSA", "NIST"]
+SIZE_SUFFIXES = {"K": 1024, "M": 1024 * 1024}
+
+
+def parse_size(value: str) -> int:
+    """Parse ``"64K"``/``"5M"``/``"1000"`` into a character count."""
+    value = value.strip().upper()
+    if value[-1:] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def _rng(seed: int) -> random.Random:
+    """Seeded generator so every run benchmarks identical inputs."""
+    return random.Random(seed)  # noqa: S311  # reproducible test data, not crypto
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 24))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, sentences: tuple[int, int] = (2, 6)) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(*sentences)))
+
+
+def _fill(size: int, part: Callable[[], str]) -> str:
+    parts: list[str] = []
+    total = 0
+    while total < size:
+        piece = part()
+        parts.append(piece)
+        total += len(piece) + 2
+    return "\n\n".join(parts)[:size]
+
+
+def prose(size: int, seed: int = 0) -> str:
+    """Plain report paragraphs, as the baseline pipeline extracts them."""
+    rng = _rng(seed)
+    return _fill(size, lambda: _paragraph(rng))
+
+
+def gao_markdown(size: int, seed: int = 0) -> str:
+    """CU-style markdown: sections, page furniture and tables."""
+    rng = _rng(seed)
+    page = 0
+
+    def page_text() -> str:
+        nonlocal page
+        page += 1
+        lines = [
+            "<!-- PageBreak -->",
+            '<!-- PageHeader="GAO-24-107231 Cybersecurity" -->',
+        ]
+        if rng.random() < 0.3:
+            lines.append(f"## {_sentence(rng)[:-1].title()[:60]}")
+        lines.extend(_paragraph(rng) for _ in range(rng.randint(2, 5)))
+        if rng.random() < 0.2:
+            rows = "\n".join(
+                f"| {agency} | {rng.randint(1, 40)} | {rng.choice(['Open', 'Closed'])} |"
+                for agency in rng.sample(AGENCIES, 4)
+            )
+            lines.append(
+                f"| Agency | Recommendations | Status |\n| --- | --- | --- |\n{rows}"
+            )
+        lines.append(f'<!-- PageNumber="{page}" -->')
+        return "\n\n".join(lines)
+
+    return "# GAO-24-107231: High-Risk Series\n\n" + _fill(size, page_text)
+
+
+def tiny_paragraphs(size: int, seed: int = 0) -> str:
+    """Thousands of one-line paragraphs (lists, table of contents)."""
+    rng = _rng(seed)
+    return _fill(size, lambda: " ".join(rng.choices(WORDS, k=rng.randint(1, 4))))
+
+
+def giant_paragraph(size: int, seed: int = 0) -> str:
+    """A single paragraph with no blank lines, e.g. a flattened PDF page."""
+    rng = _rng(seed)
+    return _fill(size, lambda: _sentence(rng)).replace("\n\n", " ")
+
+
+GENERATORS = {
+    "prose": prose,
+    "gao_markdown": gao_markdown,
+    "tiny_paragraphs": tiny_paragraphs,
+    "giant_paragraph": giant_paragraph,
+}
+
+
+def _run(text: str, strategy: ChunkingStrategy, unit: SizeUnit, size: int) -> int:
+    overlap = size // 5
+    return len(
+        chunk_text(
+            text,
+            document_id="bench",
+            chunk_size=size,
+            chunk_overlap=overlap,
+            size_unit=unit,
+            strategy=strategy,
+        )
+    )
+
+
+@dataclass
+class Result:
+    input: str
+    chars: int
+    strategy: str
+    unit: str
+    chunks: int
+    seconds: float
+    peak_mib: float
+
+    @property
+    def chars_per_sec(self) -> float:
+        return self.chars / self.seconds if self.seconds else float("inf")
+
+
+def benchmark(
+    name: str,
+    text: str,
+    strategy: ChunkingStrategy,
+    unit: SizeUnit,
+    repeat: int,
+) -> Result:
+    """Time *repeat* runs, then measure peak memory in one traced run."""
+    size = 1000 if unit is SizeUnit.CHARS else 256
+    timings = []
+    chunks = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = _run(text, strategy, unit, size)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    _run(text, strategy, unit, size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Result(
+        input=name,
+        chars=len(text),
+        strategy=strategy.value,
+        unit=unit.value,
+        chunks=chunks,
+        seconds=statistics.median(timings),
+        peak_mib=peak / (1024 * 1024),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark text chunking")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["1K", "64K", "1M", "5M"],
+        help="Synthetic input sizes in characters (K/M suffixes allowed)",
+    )
+    parser.add_argument(
+        "--inputs",
+        nargs="+",
+        choices=sorted(GENERATORS),
+        default=sorted(GENERATORS),
+        help="Synthetic input shapes to generate",
+    )
+    parser.add_argument(
+        "--input",
+        nargs="*",
+        default=[],
+        type=Path,
+        help="Extra text/markdown files to benchmark, e.g. cached CU output",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--json", action="store_true", help="Print JSON lines")
+    args = parser.parse_args()
+
+    cases: list[tuple[str, str]] = [
+        (f"{shape}/{size}", GENERATORS[shape](parse_size(size)))
+        for shape in args.inputs
+        for size in args.sizes
+    ]
+    cases.extend((path.name, path.read_text(encoding="utf-8")) for path in args.input)
+
+    if get_encoding() is None:
+        print(
+            "tiktoken unavailable; token mode uses the ~4 chars/token estimate",
+            file=sys.stderr,
+        )
+
+    if not args.json:
+        print(
+            f"{'input':<26} {'strategy':<16} {'unit':<6} {'chunks':>7} "
+            f"{'ms':>9} {'Mchar/s':>8} {'peak MiB':>9}"
+        )
+    for name, text in cases:
+        for strategy in ChunkingStrategy:
+            for unit in SizeUnit:
+                result = benchmark(name, text, strategy, unit, args.repeat)
+                if args.json:
+                    print(
+                        json.dumps(
+                            asdict(result) | {"chars_per_sec": result.chars_per_sec}
+                        )
+                    )
+                    continue
+                print(
+                    f"{name:<26} {strategy.value:<16} {unit.value:<6} "
+                    f"{result.chunks:>7} {result.seconds * 1000:>9.1f} "
+                    f"{result.chars_per_sec / 1e6:>8.2f} {result.peak_mib:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -26,8 +26,17 @@ from enrichment.pipeline.enhanced import EnhancedPipeline  # noqa: E402
 from enrichment.services.content_understanding import (  # noqa: E402
     ContentUnderstandingService,
 )
+from enrichment.services.dedup import ChunkDeduplicator  # noqa: E402
 from enrichment.services.embedding import EmbeddingService  # noqa: E402
-from enrichment.services.search import SearchService  # noqa: E402
+from enrichment.services.embedding_cache import EmbeddingCache  # noqa: E402
+from enrichment.services.http import get_http_client  # noqa: E402
+from enrichment.services.normalization import BoilerplateIndex  # noqa: E402
+from enrichment.services.rate_limit import AdaptiveLimiter  # noqa: E402
+from enrichment.services.search import (  # noqa: E402
+    DEFAULT_VECTOR_DIMENSIONS,
+    SearchBackend,
+    SearchService,
+)
 from enrichment.services.storage import StorageService  # noqa: E402
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
@@ -48,9 +57,17 @@ def main() -> None:
         default="both",
         help="Which pipeline(s) to run",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes used to chunk the corpus (default: CHUNK_WORKERS, "
+        "else one per CPU)",
+    )
     args = parser.parse_args()
 
     settings = get_settings()
+    workers = args.workers if args.workers is not None else settings.chunk_workers
     corpus_dir = Path(args.corpus_dir)
 
     if not corpus_dir.exists():
@@ -69,15 +86,65 @@ def main() -> None:
         endpoint=settings.contentunderstanding_endpoint,
         api_key=settings.contentunderstanding_key,
     )
+    # Persistent cache: re-runs and the second pipeline only embed new text
+    embedding_cache = (
+        EmbeddingCache(
+            settings.embedding_cache_path,
+            max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+        )
+        if settings.embedding_cache_path
+        else None
+    )
+    backend = None
+    if settings.embedding_backend == "hashing":
+        from enrichment.services.local_embedding import HashingEmbeddingBackend
+
+        backend = HashingEmbeddingBackend(
+            settings.embedding_dimensions or DEFAULT_VECTOR_DIMENSIONS
+        )
+        logger.info("Using offline hashing embeddings (%s)", backend.name)
     embedding = EmbeddingService(
         endpoint=settings.azure_openai_endpoint,
         credential=settings.azure_openai_key,
         deployment=settings.embedding_deployment,
+        max_batch_tokens=settings.embedding_max_batch_tokens,
+        max_batch_items=settings.embedding_max_batch_items,
+        max_concurrency=settings.embedding_max_concurrency,
+        cache=embedding_cache,
+        limiter=(
+            AdaptiveLimiter(
+                initial=settings.embedding_max_concurrency,
+                maximum=settings.openai_max_concurrency,
+            )
+            if settings.openai_adaptive_concurrency
+            else None
+        ),
+        dimensions=settings.embedding_dimensions,
+        backend=backend,
+        http_client=get_http_client(
+            max_connections=settings.openai_http_max_connections,
+            max_keepalive_connections=settings.openai_http_max_keepalive,
+            http2=settings.openai_http2,
+        ),
     )
-    search = SearchService(
-        endpoint=settings.search_endpoint,
-        credential=settings.search_api_key,
-    )
+    search: SearchBackend
+    if settings.search_backend == "local":
+        from enrichment.services.local_search import LocalSearchService
+
+        search = LocalSearchService(
+            settings.local_search_path,
+            dimensions=settings.embedding_dimensions or DEFAULT_VECTOR_DIMENSIONS,
+            algorithm=settings.local_search_algorithm,
+        )
+        logger.info("Using local search indexes in %s", settings.local_search_path)
+    else:
+        search = SearchService(
+            endpoint=settings.search_endpoint,
+            credential=settings.search_api_key,
+            dimensions=settings.embedding_dimensions or DEFAULT_VECTOR_DIMENSIONS,
+            compression=settings.search_vector_compression or None,
+            upload_concurrency=settings.search_upload_concurrency,
+        )
     storage_kwargs: dict[str, str] = {
         "corpus_container": settings.storage_container_corpus,
         "results_container": settings.storage_container_results,
@@ -87,6 +154,16 @@ def main() -> None:
     else:
         storage_kwargs["connection_string"] = settings.azure_storage_connection_string
     storage = StorageService(**storage_kwargs)
+    # Shared across both pipelines so repeated boilerplate is embedded once.
+    # Dropping duplicates is per index (each index still needs one copy),
+    # so then the enhanced pipeline gets a deduplicator of its own.
+    drop_duplicates = settings.dedup_drop_duplicates
+    deduplicator = ChunkDeduplicator(drop_duplicates=drop_duplicates)
+    enhanced_deduplicator = (
+        ChunkDeduplicator(drop_duplicates=True) if drop_duplicates else deduplicator
+    )
+    # Learns running headers/footers and corpus boilerplate to strip them
+    boilerplate = BoilerplateIndex()
 
     # Upload PDFs to blob storage and collect SAS URLs (for CU access)
     doc_urls: list[tuple[str, str]] = []
@@ -108,13 +185,16 @@ def main() -> None:
             embedding=embedding,
             search=search,
             index_name=settings.search_index_baseline,
+            deduplicator=deduplicator,
+            boilerplate=boilerplate,
         )
         baseline.ensure_index()
-        for doc_id, url in doc_urls:
-            logger.info("Processing %s (baseline) …", doc_id)
-            result = baseline.process_document(document_url=url, document_id=doc_id)
+        for result in baseline.process_corpus(doc_urls, max_workers=workers):
             logger.info(
-                "  → %d chunks, %d indexed", result["chunks"], result["indexed"]
+                "  %s (baseline) → %d chunks, %d indexed",
+                result["document_id"],
+                result["chunks"],
+                result["indexed"],
             )
 
     # Run enhanced pipeline
@@ -128,20 +208,66 @@ def main() -> None:
             embedding=embedding,
             search=search,
             index_name=settings.search_index_enhanced,
+            deduplicator=enhanced_deduplicator,
+            boilerplate=boilerplate,
         )
         enhanced.ensure_index()
         enhanced.ensure_analyzer()
-        for doc_id, url in doc_urls:
-            logger.info("Processing %s (enhanced) …", doc_id)
-            result = enhanced.process_document(document_url=url, document_id=doc_id)
+        for result in enhanced.process_corpus(doc_urls, max_workers=workers):
             logger.info(
-                "  → %d chunks, %d indexed, metadata: %s",
+                "  %s (enhanced) → %d chunks, %d indexed, metadata: %s",
+                result["document_id"],
                 result["chunks"],
                 result["indexed"],
                 list(result.get("metadata", {}).keys()),
             )
 
     logger.info("=" * 60)
+    if drop_duplicates:
+        for name, dedup in (
+            ("baseline", deduplicator),
+            ("enhanced", enhanced_deduplicator),
+        ):
+            logger.info(
+                "Dedup (%s): %d unique chunks indexed, "
+                "%d exact and %d near duplicates dropped",
+                name,
+                dedup.stats.unique,
+                dedup.stats.exact,
+                dedup.stats.near,
+            )
+    else:
+        logger.info(
+            "Dedup: %d unique chunks embedded, %d exact and %d near duplicates reused",
+            deduplicator.stats.unique,
+            deduplicator.stats.exact,
+            deduplicator.stats.near,
+        )
+    logger.info(
+        "Boilerplate: %d lines (%d chars) stripped before chunking",
+        boilerplate.lines_removed,
+        boilerplate.chars_removed,
+    )
+    if embedding_cache is not None:
+        logger.info(
+            "Embedding cache: %d hits, %d misses, %.1f MB stored",
+            embedding_cache.hits,
+            embedding_cache.misses,
+            embedding_cache.size_bytes / (1024 * 1024),
+        )
+        embedding_cache.close()
+    if isinstance(search, SearchService):
+        logger.info(
+            "Search uploads: %d documents in %d requests (%d retried, %d failed), "
+            "%.0f docs/s per request",
+            search.upload_stats.documents,
+            search.upload_stats.batches,
+            search.upload_stats.retried,
+            search.upload_stats.failed,
+            search.upload_stats.documents_per_sec,
+        )
+    embedding.close()
+    search.close()
     logger.info("DONE — pipelines complete")
     logger.info("Start the server: uv run uvicorn enrichment.server:app --reload")
 
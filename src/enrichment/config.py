@@ -1,5 +1,7 @@
 """Application configuration via environment variables."""
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -15,6 +17,16 @@ class Settings(BaseSettings):
     search_api_key: str = ""
     search_index_baseline: str = "baseline-index"
     search_index_enhanced: str = "enhanced-index"
+    # Quantized vector storage: "scalar" (int8) or "binary"; empty = full float32
+    search_vector_compression: Literal["", "scalar", "binary"] = ""
+    # Indexing requests (each up to 1000 docs / 8 MB) sent at once
+    search_upload_concurrency: int = 4
+    # "local" keeps the indexes on disk and queries them in-process with NumPy
+    # (offline serving and single-box benchmarks; search_endpoint is unused)
+    search_backend: Literal["azure", "local"] = "azure"
+    local_search_path: str = "data/local-index"
+    # "hnsw" graph (approximate, fast) or "flat" exact brute force
+    local_search_algorithm: Literal["hnsw", "flat"] = "hnsw"
 
     # Azure Storage
     azure_storage_connection_string: str = "UseDevelopmentStorage=true"
@@ -30,7 +42,39 @@ class Settings(BaseSettings):
     azure_openai_endpoint: str = ""
     azure_openai_key: str = ""
     embedding_deployment: str = "text-embedding-3-small"
+    # "hashing" computes deterministic local vectors (offline benchmarks/tests)
+    embedding_backend: Literal["azure", "hashing"] = "azure"
+    # Shortened embeddings (text-embedding-3 only); None = native size (1536)
+    embedding_dimensions: int | None = None
     chat_deployment: str = "gpt-4o"
+    # In-process cache of chat query embeddings
+    query_cache_size: int = 256
+    query_cache_ttl_seconds: float = 3600.0
+    # Coalesce query embeddings arriving within this window (0 disables)
+    query_batch_wait_ms: float = 5.0
+    query_batch_max_items: int = 64
+    # Per-request embedding budgets; the API allows 2048 inputs / 300k tokens
+    embedding_max_batch_tokens: int = 250_000
+    embedding_max_batch_items: int = 2048
+    # Embedding requests kept in flight for the embedding deployment
+    embedding_max_concurrency: int = 4
+    # Adapt requests in flight per deployment to 429s / Retry-After (AIMD),
+    # starting from embedding_max_concurrency and growing up to this ceiling
+    openai_adaptive_concurrency: bool = True
+    openai_max_concurrency: int = 16
+    # Connection pool shared by every Azure OpenAI client in the process
+    openai_http_max_connections: int = 100
+    openai_http_max_keepalive: int = 20
+    openai_http2: bool = True  # needs h2 (the http2 extra)
+    # Persistent embedding cache (SQLite file); empty disables it
+    embedding_cache_path: str = ""
+    embedding_cache_max_mb: int = 1024
+
+    # Pipelines
+    chunk_workers: int | None = None  # corpus chunking processes; None = one per CPU
+    # Leave repeated chunks out of the index instead of indexing them with
+    # a reused embedding (they are never embedded twice either way)
+    dedup_drop_duplicates: bool = False
 
     # General
     environment: str = "development"
@@ -5,14 +5,26 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING
 
-from enrichment.services.chunking import chunk_text
+from enrichment.pipeline.corpus import chunk_corpus
+from enrichment.pipeline.indexing import (
+    check_incremental,
+    failed_summary,
+    index_chunk_stream,
+    reconcile_index,
+)
+from enrichment.services.chunking import ChunkingStrategy, SizeUnit, iter_chunks
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from enrichment.services.chunking import Chunk
     from enrichment.services.content_understanding import (
         ContentUnderstandingService,
     )
+    from enrichment.services.dedup import ChunkDeduplicator
     from enrichment.services.embedding import EmbeddingService
-    from enrichment.services.search import SearchService
+    from enrichment.services.normalization import BoilerplateIndex
+    from enrichment.services.search import SearchBackend
     from enrichment.services.storage import StorageService
 
 logger = logging.getLogger(__name__)
@@ -23,7 +35,8 @@ class BaselinePipeline:
 
     Steps:
     1. Download document from Blob Storage
-    2. Extract text via CU (prebuilt document analyzer)
+    2. Extract text via CU (prebuilt document analyzer), optionally
+       stripping running headers, footers and corpus boilerplate
     3. Chunk the extracted text
     4. Generate embeddings for each chunk
     5. Index chunks + embeddings in AI Search
@@ -34,14 +47,18 @@ class BaselinePipeline:
         storage: StorageService,
         cu: ContentUnderstandingService,
         embedding: EmbeddingService,
-        search: SearchService,
+        search: SearchBackend,
         index_name: str = "baseline",
+        deduplicator: ChunkDeduplicator | None = None,
+        boilerplate: BoilerplateIndex | None = None,
     ) -> None:
         self.storage = storage
         self.cu = cu
         self.embedding = embedding
         self.search = search
         self.index_name = index_name
+        self.deduplicator = deduplicator
+        self.boilerplate = boilerplate
 
     def ensure_index(self) -> None:
         """Create the baseline search index if it doesn't exist."""
@@ -54,61 +71,172 @@ class BaselinePipeline:
         document_id: str,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        size_unit: SizeUnit | str = SizeUnit.CHARS,
+        strategy: ChunkingStrategy | str = ChunkingStrategy.PARAGRAPH,
+        incremental: bool = False,
     ) -> dict:
         """Run the full baseline pipeline for a single document.
 
         Args:
             document_url: SAS URL or public URL to the document in Blob Storage
             document_id: Unique identifier for the document
-            chunk_size: Target chunk size in characters
+            chunk_size: Target chunk size, measured in ``size_unit``
             chunk_overlap: Overlap between consecutive chunks
+            size_unit: ``"chars"`` or ``"tokens"`` (embedding-model tokens)
+            strategy: ``"paragraph"``, ``"markdown"`` (structure-aware) or
+                ``"content_defined"`` (stable, content-hash chunk IDs)
+            incremental: Only embed and upload chunks whose IDs are not
+                already in the index, and delete ones that disappeared.
+                Requires ``strategy="content_defined"``, whose chunk IDs
+                change with their text; raises ``ValueError`` otherwise.
 
         Returns:
             Summary dict with chunk count and index results
         """
+        check_incremental(strategy, incremental)
         # Step 1: Extract text using CU baseline analyzer (prebuilt)
-        logger.info("Extracting text from %s", document_id)
-        result = self.cu.analyze_document(
-            document_url=document_url,
-            analyzer_id="prebuilt-documentSearch",
-        )
-        extracted = self.cu.result_to_dict(result)
-        text_parts = [c.get("markdown", "") for c in extracted.get("contents", [])]
-        text = "\n\n".join(p for p in text_parts if p)
+        text = self._extract_text(document_url, document_id)
+        if self.boilerplate is not None:
+            self.boilerplate.add_document(text, document_id)
+            text = self.boilerplate.strip(text)
 
         if not text.strip():
             logger.warning("No text extracted from %s", document_id)
             return {"document_id": document_id, "chunks": 0, "indexed": 0}
 
-        # Step 2: Chunk the text
+        # Steps 2-4: Chunk, embed and index, streaming windows of chunks
         logger.info("Chunking %d characters from %s", len(text), document_id)
-        chunks = chunk_text(
+        chunks = iter_chunks(
             text=text,
             document_id=document_id,
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
+            size_unit=size_unit,
+            strategy=strategy,
         )
-        logger.info("Created %d chunks from %s", len(chunks), document_id)
+        return self._index_document(document_id, text, chunks, incremental)
 
-        # Step 3: Generate embeddings
-        logger.info("Generating embeddings for %d chunks", len(chunks))
-        texts = [c.content for c in chunks]
-        embeddings = self.embedding.embed(texts)
+    def process_corpus(
+        self,
+        documents: Iterable[tuple[str, str]],
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        size_unit: SizeUnit | str = SizeUnit.CHARS,
+        strategy: ChunkingStrategy | str = ChunkingStrategy.PARAGRAPH,
+        incremental: bool = False,
+        max_workers: int | None = None,
+    ) -> list[dict]:
+        """Run the pipeline over ``(document_id, document_url)`` pairs.
+
+        Text is extracted one document at a time as
+        :func:`~enrichment.pipeline.corpus.chunk_corpus` asks for it, then
+        normalized and chunked across *max_workers* processes, and each
+        document's chunks are embedded and indexed as they come back.
+        Without a boilerplate index only a small window of the corpus is
+        in flight, so documents are indexed while later ones are still
+        being extracted; with one, every document is extracted first (and
+        spooled to disk) so the whole corpus informs what is stripped. A
+        document that fails to extract or index is logged and reported
+        with an ``error`` instead of stopping the run. Other arguments
+        match :meth:`process_document`.
 
-        # Step 4: Index chunks with embeddings
-        logger.info("Indexing %d chunks into '%s'", len(chunks), self.index_name)
-        results = self.search.index_chunks(self.index_name, chunks, embeddings)
-        indexed = sum(1 for r in results if r["succeeded"])
+        Returns:
+            One summary dict per document, in input order
+        """
+        check_incremental(strategy, incremental)
+        order: list[str] = []
+        results: dict[str, dict] = {}
+
+        def extracted() -> Iterator[tuple[str, str]]:
+            for document_id, url in documents:
+                order.append(document_id)
+                try:
+                    text = self._extract_text(url, document_id)
+                except Exception as exc:
+                    logger.exception("Extraction failed for %s", document_id)
+                    results[document_id] = failed_summary(document_id, exc)
+                    continue
+                yield document_id, text
+
+        for doc in chunk_corpus(
+            extracted(),
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            size_unit=size_unit,
+            strategy=strategy,
+            boilerplate=self.boilerplate,
+            max_workers=max_workers,
+        ):
+            if not doc.chunks:
+                logger.warning("No text extracted from %s", doc.document_id)
+                results[doc.document_id] = {
+                    "document_id": doc.document_id,
+                    "chunks": 0,
+                    "indexed": 0,
+                }
+                continue
+            try:
+                results[doc.document_id] = self._index_document(
+                    doc.document_id, doc.text, doc.chunks, incremental
+                )
+            except Exception as exc:
+                logger.exception("Indexing failed for %s", doc.document_id)
+                results[doc.document_id] = failed_summary(doc.document_id, exc)
+        return [results[document_id] for document_id in order]
+
+    def _extract_text(self, document_url: str, document_id: str) -> str:
+        """Extract markdown text with the prebuilt CU analyzer."""
+        logger.info("Extracting text from %s", document_id)
+        result = self.cu.analyze_document(
+            document_url=document_url,
+            analyzer_id="prebuilt-documentSearch",
+        )
+        extracted = self.cu.result_to_dict(result)
+        text_parts = [c.get("markdown", "") for c in extracted.get("contents", [])]
+        return "\n\n".join(p for p in text_parts if p)
+
+    def _index_document(
+        self,
+        document_id: str,
+        text: str,
+        chunks: Iterable[Chunk],
+        incremental: bool,
+    ) -> dict:
+        """Embed and index *chunks*, reconciling the index when incremental."""
+        existing = (
+            self.search.get_chunk_positions(self.index_name, document_id)
+            if incremental
+            else None
+        )
+        stats = index_chunk_stream(
+            chunks,
+            self.embedding.embed,
+            lambda batch, embeddings: self.search.index_chunks(
+                self.index_name, batch, embeddings
+            ),
+            existing,
+            deduplicator=self.deduplicator,
+        )
+        deleted = (
+            reconcile_index(self.search, self.index_name, existing, stats)
+            if existing is not None
+            else 0
+        )
 
         logger.info(
-            "Indexed %d/%d chunks for %s",
-            indexed,
-            len(chunks),
+            "Indexed %d/%d chunks for %s (%d unchanged, %d deleted)",
+            stats.indexed,
+            stats.chunks,
             document_id,
+            stats.unchanged,
+            deleted,
         )
         return {
             "document_id": document_id,
-            "chunks": len(chunks),
-            "indexed": indexed,
+            "chunks": stats.chunks,
+            "indexed": stats.indexed,
+            "unchanged": stats.unchanged,
+            "duplicates": stats.duplicates,
+            "deleted": deleted,
             "text_length": len(text),
         }
@@ -0,0 +1,252 @@
+"""Corpus-level chunking fanned out across worker processes."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import tempfile
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from enrichment.services.chunking import (
+    Chunk,
+    ChunkingStrategy,
+    SizeUnit,
+    iter_chunks,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from enrichment.services.normalization import BoilerplateIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChunkedDocument:
+    """A document's normalized text and the chunks cut from it."""
+
+    document_id: str
+    text: str
+    chunks: list[Chunk] = field(default_factory=list)
+
+
+class _ChunkOptions(NamedTuple):
+    chunk_size: int
+    chunk_overlap: int
+    size_unit: str
+    strategy: str
+
+
+class _PackedChunks(NamedTuple):
+    """Chunks of one document in the form sent back from a worker.
+
+    The parent already holds the document's text, so only offsets travel
+    back: the runs of lines kept by boilerplate stripping (``None`` when
+    the text is unchanged), and each chunk's span within the stripped text
+    and page number as flat arrays, instead of pickling a ``Chunk`` (and a
+    copy of its content) per chunk. Repeated section titles are the same
+    string object and are pickled once.
+    """
+
+    document_id: str
+    kept: array | None  # start, end pairs into the original text
+    ids: list[str]
+    spans: array  # start, end pairs into the stripped text
+    pages: array  # 0 when the chunk has no page number
+    sections: list[str | None]
+    lines_removed: int
+    chars_removed: int
+
+
+# Per-process state installed by ``_init_worker`` so the boilerplate index
+# is pickled once per worker rather than once per document.
+_worker_options: _ChunkOptions | None = None
+_worker_boilerplate: BoilerplateIndex | None = None
+
+
+def _init_worker(options: _ChunkOptions, boilerplate: BoilerplateIndex | None) -> None:
+    global _worker_options, _worker_boilerplate
+    _worker_options, _worker_boilerplate = options, boilerplate
+
+
+def _chunk_document(
+    document_id: str,
+    text: str,
+    options: _ChunkOptions,
+    boilerplate: BoilerplateIndex | None,
+) -> ChunkedDocument:
+    if boilerplate is not None:
+        text = boilerplate.strip(text)
+    chunks = list(
+        iter_chunks(
+            text,
+            document_id,
+            chunk_size=options.chunk_size,
+            chunk_overlap=options.chunk_overlap,
+            size_unit=options.size_unit,
+            strategy=options.strategy,
+        )
+    )
+    return ChunkedDocument(document_id, text, chunks)
+
+
+def _chunk_packed(document: tuple[str, str]) -> _PackedChunks:
+    """Worker entry point: normalize and chunk one document, then pack it."""
+    assert _worker_options is not None, "worker not initialized"
+    document_id, text = document
+    boilerplate = _worker_boilerplate
+    kept = None
+    lines_removed = chars_removed = 0
+    if boilerplate is not None:
+        lines, chars = boilerplate.lines_removed, boilerplate.chars_removed
+        runs = boilerplate.kept_spans(text)
+        lines_removed = boilerplate.lines_removed - lines
+        chars_removed = boilerplate.chars_removed - chars
+        if runs != [(0, len(text))]:
+            kept = array("q", [offset for run in runs for offset in run])
+            text = "".join(text[start:end] for start, end in runs)
+    doc = _chunk_document(document_id, text, _worker_options, None)
+    spans = array("q")
+    pages = array("i")
+    for chunk in doc.chunks:
+        spans.extend((chunk.start, chunk.end))
+        pages.append(chunk.page_number or 0)
+    return _PackedChunks(
+        document_id,
+        kept,
+        [chunk.id for chunk in doc.chunks],
+        spans,
+        pages,
+        [chunk.section_title for chunk in doc.chunks],
+        lines_removed,
+        chars_removed,
+    )
+
+
+def _unpack(packed: _PackedChunks, text: str) -> ChunkedDocument:
+    """Rebuild a worker's chunks against this process's copy of *text*."""
+    if packed.kept is not None:
+        kept = packed.kept
+        text = "".join(text[kept[i] : kept[i + 1]] for i in range(0, len(kept), 2))
+    chunks = [
+        Chunk(
+            id=chunk_id,
+            document_id=packed.document_id,
+            chunk_index=i,
+            page_number=packed.pages[i] or None,
+            section_title=packed.sections[i],
+            source=text,
+            start=packed.spans[2 * i],
+            end=packed.spans[2 * i + 1],
+        )
+        for i, chunk_id in enumerate(packed.ids)
+    ]
+    return ChunkedDocument(packed.document_id, text, chunks)
+
+
+def _spool(
+    documents: Iterable[tuple[str, str]],
+    boilerplate: BoilerplateIndex,
+    directory: Path,
+) -> list[tuple[str, Path]]:
+    """Add every document to *boilerplate*, writing its text under *directory*."""
+    spooled = []
+    for i, (document_id, text) in enumerate(documents):
+        boilerplate.add_document(text, document_id)
+        path = directory / f"{i}.txt"
+        path.write_bytes(text.encode("utf-8"))
+        spooled.append((document_id, path))
+    return spooled
+
+
+def chunk_corpus(
+    documents: Iterable[tuple[str, str]],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    size_unit: SizeUnit | str = SizeUnit.CHARS,
+    strategy: ChunkingStrategy | str = ChunkingStrategy.PARAGRAPH,
+    boilerplate: BoilerplateIndex | None = None,
+    max_workers: int | None = None,
+) -> Iterator[ChunkedDocument]:
+    """Normalize and chunk ``(document_id, text)`` pairs in parallel.
+
+    Documents are spread over a process pool of *max_workers* processes
+    (one per CPU by default) and yielded in input order with the same
+    chunks :func:`~enrichment.services.chunking.iter_chunks` would produce.
+    At most two documents per worker are read ahead of the one being
+    yielded, so a generator that extracts text on demand keeps only a
+    window of the corpus in memory. With ``max_workers=1``, or a single
+    document, everything runs in this process.
+
+    With a *boilerplate* index, every document is first added to it so
+    the whole corpus informs what is stripped, and a document is stripped
+    the same way wherever it falls in the corpus. *documents* is then read
+    in full before the first document is yielded; texts wait in a
+    temporary directory rather than in memory. Each worker strips its
+    documents with a copy of the index, and the removal counters are added
+    back to *boilerplate*.
+
+    Workers are spawned rather than forked: the caller may be a server
+    with live threads, connection pools and SQLite handles, which a
+    forked child would inherit mid-use (and could deadlock on).
+    """
+    options = _ChunkOptions(
+        chunk_size, chunk_overlap, SizeUnit(size_unit), ChunkingStrategy(strategy)
+    )
+    if boilerplate is None:
+        yield from _chunk_stream(documents, options, None, max_workers)
+        return
+    with tempfile.TemporaryDirectory(prefix="chunk-corpus-") as directory:
+        spooled = _spool(documents, boilerplate, Path(directory))
+        texts = (
+            (document_id, path.read_bytes().decode("utf-8"))
+            for document_id, path in spooled
+        )
+        yield from _chunk_stream(texts, options, boilerplate, max_workers)
+
+
+def _chunk_stream(
+    documents: Iterable[tuple[str, str]],
+    options: _ChunkOptions,
+    boilerplate: BoilerplateIndex | None,
+    max_workers: int | None,
+) -> Iterator[ChunkedDocument]:
+    pending_documents = iter(documents)
+    head = list(islice(pending_documents, 2))
+    if max_workers == 1 or len(head) < 2:
+        for document_id, text in chain(head, pending_documents):
+            yield _chunk_document(document_id, text, options, boilerplate)
+        return
+
+    workers = max_workers or os.cpu_count() or 1
+    logger.info("Chunking documents across %d worker processes", workers)
+    pending: deque[tuple[Future[_PackedChunks], str]] = deque()
+
+    def finish() -> ChunkedDocument:
+        future, text = pending.popleft()
+        packed = future.result()
+        if boilerplate is not None:
+            boilerplate.lines_removed += packed.lines_removed
+            boilerplate.chars_removed += packed.chars_removed
+        return _unpack(packed, text)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(options, boilerplate),
+    ) as pool:
+        for document in chain(head, pending_documents):
+            pending.append((pool.submit(_chunk_packed, document), document[1]))
+            if len(pending) > 2 * workers:
+                yield finish()
+        while pending:
+            yield finish()
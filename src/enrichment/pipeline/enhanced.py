@@ -5,14 +5,26 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING, Any
 
-from enrichment.services.chunking import chunk_text
+from enrichment.pipeline.corpus import chunk_corpus
+from enrichment.pipeline.indexing import (
+    check_incremental,
+    failed_summary,
+    index_chunk_stream,
+    reconcile_index,
+)
+from enrichment.services.chunking import ChunkingStrategy, SizeUnit, iter_chunks
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from enrichment.services.chunking import Chunk
     from enrichment.services.content_understanding import (
         ContentUnderstandingService,
     )
+    from enrichment.services.dedup import ChunkDeduplicator
     from enrichment.services.embedding import EmbeddingService
-    from enrichment.services.search import SearchService
+    from enrichment.services.normalization import BoilerplateIndex
+    from enrichment.services.search import SearchBackend
     from enrichment.services.storage import StorageService
 
 logger = logging.getLogger(__name__)
@@ -51,7 +63,7 @@ class EnhancedPipeline:
 
     Steps:
     1. Extract text AND structured metadata via CU custom analyzer
-    2. Chunk the extracted text
+    2. Chunk the extracted markdown along its sections, pages and tables
     3. Generate embeddings
     4. Index chunks + embeddings + CU metadata in the enhanced AI Search index
     """
@@ -61,15 +73,19 @@ class EnhancedPipeline:
         storage: StorageService,
         cu: ContentUnderstandingService,
         embedding: EmbeddingService,
-        search: SearchService,
+        search: SearchBackend,
         index_name: str = "enhanced",
         analyzer_id: str = "gaoReportAnalyzer",
+        deduplicator: ChunkDeduplicator | None = None,
+        boilerplate: BoilerplateIndex | None = None,
     ) -> None:
         self.storage = storage
         self.cu = cu
         self.embedding = embedding
         self.search = search
         self.index_name = index_name
+        self.deduplicator = deduplicator
+        self.boilerplate = boilerplate
         self.analyzer_id = analyzer_id
 
     def ensure_index(self) -> None:
@@ -92,13 +108,119 @@ class EnhancedPipeline:
         document_id: str,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        size_unit: SizeUnit | str = SizeUnit.CHARS,
+        strategy: ChunkingStrategy | str = ChunkingStrategy.MARKDOWN,
+        incremental: bool = False,
     ) -> dict[str, Any]:
         """Run the full enhanced pipeline for a single document.
 
+        Chunks follow the CU markdown structure by default, so each one
+        carries the section title and page number it was taken from. With
+        ``incremental=True`` (and ``strategy="content_defined"``) only
+        chunks not already in the index are embedded and uploaded (see
+        ``BaselinePipeline.process_document``); unchanged chunks keep the
+        metadata they were first indexed with.
+
         Returns:
             Summary dict with chunk count, index results, and extracted metadata
         """
+        check_incremental(strategy, incremental)
         # Step 1: Extract text + structured fields via custom CU analyzer
+        text, metadata = self._extract(document_url, document_id)
+        if self.boilerplate is not None:
+            self.boilerplate.add_document(text, document_id)
+            text = self.boilerplate.strip(text)
+
+        if not text.strip():
+            logger.warning("No text extracted from %s", document_id)
+            return {
+                "document_id": document_id,
+                "chunks": 0,
+                "indexed": 0,
+                "metadata": metadata,
+            }
+
+        # Steps 2-4: Chunk, embed and index with CU metadata, one window at a time
+        chunks = iter_chunks(
+            text=text,
+            document_id=document_id,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            size_unit=size_unit,
+            strategy=strategy,
+        )
+        return self._index_document(document_id, text, chunks, metadata, incremental)
+
+    def process_corpus(
+        self,
+        documents: Iterable[tuple[str, str]],
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        size_unit: SizeUnit | str = SizeUnit.CHARS,
+        strategy: ChunkingStrategy | str = ChunkingStrategy.MARKDOWN,
+        incremental: bool = False,
+        max_workers: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Run the pipeline over ``(document_id, document_url)`` pairs.
+
+        Like ``BaselinePipeline.process_corpus``: documents are analyzed as
+        chunking asks for them (all of them first with a boilerplate
+        index) and indexed with their CU metadata as their chunks come
+        back, and a failing document is reported with an ``error`` instead
+        of stopping the run.
+
+        Returns:
+            One summary dict per document, in input order
+        """
+        check_incremental(strategy, incremental)
+        order: list[str] = []
+        results: dict[str, dict[str, Any]] = {}
+        # Metadata of documents extracted but not yet indexed
+        metadata: dict[str, dict[str, Any]] = {}
+
+        def extracted() -> Iterator[tuple[str, str]]:
+            for document_id, url in documents:
+                order.append(document_id)
+                try:
+                    text, metadata[document_id] = self._extract(url, document_id)
+                except Exception as exc:
+                    logger.exception("CU analysis failed for %s", document_id)
+                    results[document_id] = failed_summary(document_id, exc)
+                    continue
+                yield document_id, text
+
+        for doc in chunk_corpus(
+            extracted(),
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            size_unit=size_unit,
+            strategy=strategy,
+            boilerplate=self.boilerplate,
+            max_workers=max_workers,
+        ):
+            doc_metadata = metadata.pop(doc.document_id)
+            if not doc.chunks:
+                logger.warning("No text extracted from %s", doc.document_id)
+                results[doc.document_id] = {
+                    "document_id": doc.document_id,
+                    "chunks": 0,
+                    "indexed": 0,
+                    "metadata": doc_metadata,
+                }
+                continue
+            try:
+                results[doc.document_id] = self._index_document(
+                    doc.document_id, doc.text, doc.chunks, doc_metadata, incremental
+                )
+            except Exception as exc:
+                logger.exception("Indexing failed for %s", doc.document_id)
+                results[doc.document_id] = failed_summary(doc.document_id, exc)
+        return [results[document_id] for document_id in order]
+
+    def _extract(
+        self, document_url: str, document_id: str
+    ) -> tuple[str, dict[str, Any]]:
+        """Extract markdown text and CU metadata fields with the custom analyzer."""
         logger.info("CU-analyzing %s with %s", document_id, self.analyzer_id)
         result = self.cu.analyze_document(
             analyzer_id=self.analyzer_id,
@@ -117,42 +239,52 @@ class EnhancedPipeline:
             document_id,
             {k: type(v).__name__ for k, v in metadata.items()},
         )
+        return text, metadata
 
-        if not text.strip():
-            logger.warning("No text extracted from %s", document_id)
-            return {
-                "document_id": document_id,
-                "chunks": 0,
-                "indexed": 0,
-                "metadata": metadata,
-            }
-
-        # Step 2: Chunk the text
-        chunks = chunk_text(
-            text=text,
-            document_id=document_id,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
+    def _index_document(
+        self,
+        document_id: str,
+        text: str,
+        chunks: Iterable[Chunk],
+        metadata: dict[str, Any],
+        incremental: bool,
+    ) -> dict[str, Any]:
+        """Embed and index *chunks* with CU metadata."""
+        existing = (
+            self.search.get_chunk_positions(self.index_name, document_id)
+            if incremental
+            else None
         )
-        logger.info("Created %d chunks from %s", len(chunks), document_id)
-
-        # Step 3: Generate embeddings
-        texts = [c.content for c in chunks]
-        embeddings = self.embedding.embed(texts)
-
-        # Step 4: Index with CU metadata
-        results = self.search.index_enhanced_chunks(
-            self.index_name, chunks, embeddings, metadata
+        stats = index_chunk_stream(
+            chunks,
+            self.embedding.embed,
+            lambda batch, embeddings: self.search.index_enhanced_chunks(
+                self.index_name, batch, embeddings, metadata
+            ),
+            existing,
+            deduplicator=self.deduplicator,
+        )
+        deleted = (
+            reconcile_index(self.search, self.index_name, existing, stats)
+            if existing is not None
+            else 0
         )
-        indexed = sum(1 for r in results if r["succeeded"])
 
         logger.info(
-            "Indexed %d/%d enhanced chunks for %s", indexed, len(chunks), document_id
+            "Indexed %d/%d enhanced chunks for %s (%d unchanged, %d deleted)",
+            stats.indexed,
+            stats.chunks,
+            document_id,
+            stats.unchanged,
+            deleted,
         )
         return {
             "document_id": document_id,
-            "chunks": len(chunks),
-            "indexed": indexed,
+            "chunks": stats.chunks,
+            "indexed": stats.indexed,
+            "unchanged": stats.unchanged,
+            "duplicates": stats.duplicates,
+            "deleted": deleted,
             "text_length": len(text),
             "metadata": metadata,
         }
@@ -0,0 +1,125 @@
+"""Shared streaming embed-and-index loop used by both pipelines."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from itertools import batched
+from typing import TYPE_CHECKING, Any
+
+from enrichment.services.chunking import ChunkingStrategy
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from enrichment.services.chunking import Chunk
+    from enrichment.services.dedup import ChunkDeduplicator
+    from enrichment.services.search import SearchBackend
+
+logger = logging.getLogger(__name__)
+
+# Chunks are embedded and indexed in windows of this size as the chunker
+# yields them, so large reports never hold every chunk in memory at once.
+STREAM_BATCH_SIZE = 256
+
+
+def check_incremental(strategy: ChunkingStrategy | str, incremental: bool) -> None:
+    """Reject incremental indexing with position-based chunk IDs.
+
+    Only content-defined chunk IDs change when their text does; with
+    positional IDs an edited chunk keeps its ID and would be counted as
+    unchanged, leaving stale text and vectors in the index.
+    """
+    if incremental and ChunkingStrategy(strategy) != ChunkingStrategy.CONTENT_DEFINED:
+        raise ValueError(
+            "incremental=True requires strategy='content_defined', "
+            f"got {ChunkingStrategy(strategy).value!r}"
+        )
+
+
+def failed_summary(document_id: str, exc: Exception) -> dict[str, Any]:
+    """Summary for a document a corpus run could not extract or index."""
+    return {"document_id": document_id, "chunks": 0, "indexed": 0, "error": str(exc)}
+
+
+@dataclass
+class IndexStats:
+    """Outcome of streaming one document's chunks into an index."""
+
+    chunks: int = 0
+    indexed: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    seen_ids: set[str] = field(default_factory=set)
+    moved: dict[str, int] = field(default_factory=dict)
+
+
+def index_chunk_stream(
+    chunks: Iterable[Chunk],
+    embed: Callable[[list[str]], list[list[float]]],
+    upload: Callable[[list[Chunk], list[list[float]]], list[dict[str, Any]]],
+    existing: dict[str, int] | None = None,
+    batch_size: int | None = None,
+    deduplicator: ChunkDeduplicator | None = None,
+) -> IndexStats:
+    """Embed and upload *chunks* one window at a time.
+
+    When *existing* maps chunk IDs already in the index to their stored
+    ``chunk_index``, chunks with a known ID are neither embedded nor
+    uploaded; those whose position changed are collected in ``moved`` so
+    the caller can update them without re-embedding.
+
+    With a *deduplicator*, chunks that repeat text seen earlier in the run
+    reuse its embedding, and are not uploaded at all if the deduplicator
+    has ``drop_duplicates`` set.
+    """
+    stats = IndexStats()
+    for batch in batched(chunks, batch_size or STREAM_BATCH_SIZE):
+        stats.chunks += len(batch)
+        pending = list(batch)
+        if existing is not None:
+            pending = []
+            for chunk in batch:
+                stats.seen_ids.add(chunk.id)
+                position = existing.get(chunk.id)
+                if position is None:
+                    pending.append(chunk)
+                    continue
+                stats.unchanged += 1
+                if position != chunk.chunk_index:
+                    stats.moved[chunk.id] = chunk.chunk_index
+            if not pending:
+                continue
+
+        logger.info("Generating embeddings for %d chunks", len(pending))
+        texts = [c.content for c in pending]
+        if deduplicator is None:
+            embeddings = embed(texts)
+        else:
+            embeddings, duplicate = deduplicator.embed(texts, embed)
+            stats.duplicates += sum(duplicate)
+            if deduplicator.drop_duplicates:
+                keep = [i for i, dup in enumerate(duplicate) if not dup]
+                pending = [pending[i] for i in keep]
+                embeddings = [embeddings[i] for i in keep]
+                if not pending:
+                    continue
+        results = upload(pending, embeddings)
+        stats.indexed += sum(1 for r in results if r["succeeded"])
+    return stats
+
+
+def reconcile_index(
+    search: SearchBackend,
+    index_name: str,
+    existing: dict[str, int],
+    stats: IndexStats,
+) -> int:
+    """Apply position changes and drop chunks that no longer exist.
+
+    Returns the number of stale chunks deleted from the index.
+    """
+    search.update_chunk_positions(index_name, stats.moved)
+    stale = sorted(existing.keys() - stats.seen_ids)
+    results = search.delete_chunks(index_name, stale)
+    return sum(1 for r in results if r["succeeded"])
@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from fastapi import FastAPI, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 
 from enrichment.config import get_settings
 from enrichment.models import (
@@ -22,12 +25,27 @@ from enrichment.models import (
     PipelineStatus,
     PipelineType,
 )
-from enrichment.services.chat import ChatService
+from enrichment.services.batching import EmbeddingBatcher
+from enrichment.services.chat import ChatService, QueryEmbeddingCache
 from enrichment.services.content_understanding import ContentUnderstandingService
+from enrichment.services.dedup import ChunkDeduplicator
 from enrichment.services.embedding import EmbeddingService
-from enrichment.services.search import SearchService
+from enrichment.services.embedding_cache import EmbeddingCache
+from enrichment.services.http import get_http_client
+from enrichment.services.normalization import BoilerplateIndex
+from enrichment.services.rate_limit import AdaptiveLimiter
+from enrichment.services.search import (
+    DEFAULT_VECTOR_DIMENSIONS,
+    SearchBackend,
+    SearchService,
+)
 from enrichment.services.storage import StorageService
 
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    import httpx
+
 logger = logging.getLogger(__name__)
 
 STATIC_DIR = Path(__file__).parent / "static"
@@ -37,10 +55,16 @@ def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     settings = get_settings()
 
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+        yield
+        await run_in_threadpool(close_services)
+
     app = FastAPI(
         title="Knowledge Enrichment Demo",
         description="Knowledge Base Overnight Enrichment — Content Understanding demo",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -62,6 +86,91 @@ def create_app() -> FastAPI:
         storage_kwargs["connection_string"] = settings.azure_storage_connection_string
     storage = StorageService(**storage_kwargs)
 
+    # Rate limiters, one per Azure OpenAI deployment (each has its own quota),
+    # shared by chat and pipeline runs
+    _limiters: dict[str, AdaptiveLimiter] = {}
+
+    def get_limiter(deployment: str) -> AdaptiveLimiter | None:
+        if not settings.openai_adaptive_concurrency:
+            return None
+        if deployment not in _limiters:
+            _limiters[deployment] = AdaptiveLimiter(
+                initial=settings.embedding_max_concurrency,
+                maximum=settings.openai_max_concurrency,
+            )
+        return _limiters[deployment]
+
+    def openai_http_client() -> httpx.Client:
+        return get_http_client(
+            max_connections=settings.openai_http_max_connections,
+            max_keepalive_connections=settings.openai_http_max_keepalive,
+            http2=settings.openai_http2,
+        )
+
+    # Embedding service (lazy — one instance, with its cache and request
+    # threads, shared by chat and pipeline runs)
+    _embedding_service: EmbeddingService | None = None
+    _embedding_cache: EmbeddingCache | None = None
+
+    def get_embedding_service() -> EmbeddingService:
+        nonlocal _embedding_service, _embedding_cache
+        if _embedding_service is not None:
+            return _embedding_service
+        cache = None
+        if settings.embedding_cache_path:
+            cache = _embedding_cache = EmbeddingCache(
+                settings.embedding_cache_path,
+                max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+            )
+        backend = None
+        if settings.embedding_backend == "hashing":
+            from enrichment.services.local_embedding import HashingEmbeddingBackend
+
+            backend = HashingEmbeddingBackend(
+                settings.embedding_dimensions or DEFAULT_VECTOR_DIMENSIONS
+            )
+        _embedding_service = EmbeddingService(
+            endpoint=settings.azure_openai_endpoint,
+            credential=settings.azure_openai_key or "",
+            deployment=settings.embedding_deployment,
+            max_batch_tokens=settings.embedding_max_batch_tokens,
+            max_batch_items=settings.embedding_max_batch_items,
+            max_concurrency=settings.embedding_max_concurrency,
+            cache=cache,
+            limiter=get_limiter(settings.embedding_deployment),
+            dimensions=settings.embedding_dimensions,
+            backend=backend,
+            http_client=openai_http_client(),
+        )
+        return _embedding_service
+
+    # Search service (lazy — its per-index clients keep warm connections
+    # for chat and pipeline runs; the local backend keeps its indexes open)
+    _search_service: SearchBackend | None = None
+    search_configured = settings.search_backend == "local" or bool(
+        settings.search_endpoint
+    )
+
+    def get_search_service() -> SearchBackend:
+        nonlocal _search_service
+        if _search_service is None and settings.search_backend == "local":
+            from enrichment.services.local_search import LocalSearchService
+
+            _search_service = LocalSearchService(
+                settings.local_search_path,
+                dimensions=settings.embedding_dimensions or DEFAULT_VECTOR_DIMENSIONS,
+                algorithm=settings.local_search_algorithm,
+            )
+        elif _search_service is None:
+            _search_service = SearchService(
+                endpoint=settings.search_endpoint,
+                credential=settings.search_api_key or "",
+                dimensions=settings.embedding_dimensions or DEFAULT_VECTOR_DIMENSIONS,
+                compression=settings.search_vector_compression or None,
+                upload_concurrency=settings.search_upload_concurrency,
+            )
+        return _search_service
+
     # Chat service (lazy — only initialised when Azure OpenAI is configured)
     _chat_service: ChatService | None = None
 
@@ -69,16 +178,18 @@ def create_app() -> FastAPI:
         nonlocal _chat_service
         if _chat_service is not None:
             return _chat_service
-        if not settings.azure_openai_endpoint or not settings.search_endpoint:
+        if not settings.azure_openai_endpoint or not search_configured:
             return None
-        search = SearchService(
-            endpoint=settings.search_endpoint,
-            credential=settings.search_api_key or "",
-        )
-        embedding = EmbeddingService(
-            endpoint=settings.azure_openai_endpoint,
-            credential=settings.azure_openai_key or "",
-            deployment=settings.embedding_deployment,
+        search = get_search_service()
+        embedding = get_embedding_service()
+        batcher = (
+            EmbeddingBatcher(
+                embedding,
+                max_wait_ms=settings.query_batch_wait_ms,
+                max_batch=settings.query_batch_max_items,
+            )
+            if settings.query_batch_wait_ms > 0
+            else None
         )
         _chat_service = ChatService(
             search=search,
@@ -86,9 +197,35 @@ def create_app() -> FastAPI:
             endpoint=settings.azure_openai_endpoint,
             credential=settings.azure_openai_key or "",
             chat_deployment=settings.chat_deployment,
+            query_cache=QueryEmbeddingCache(
+                max_entries=settings.query_cache_size,
+                ttl_seconds=settings.query_cache_ttl_seconds,
+            ),
+            limiter=get_limiter(settings.chat_deployment),
+            batcher=batcher,
+            http_client=openai_http_client(),
         )
         return _chat_service
 
+    def close_services() -> None:
+        """Stop the singletons' threads and close their connections and files.
+
+        Called on shutdown; callers waiting on the batcher are answered
+        before the embedding threads and cache go away.
+        """
+        nonlocal _chat_service, _embedding_service, _embedding_cache
+        nonlocal _search_service
+        if _chat_service is not None and _chat_service.batcher is not None:
+            _chat_service.batcher.close()
+        if _embedding_service is not None:
+            _embedding_service.close()
+        if _embedding_cache is not None:
+            _embedding_cache.close()
+        if _search_service is not None:
+            _search_service.close()
+        _chat_service = _embedding_service = _embedding_cache = None
+        _search_service = None
+
     # ── API routes ────────────────────────────────────────────
 
     @app.get("/api/health", response_model=HealthResponse)
@@ -133,7 +270,10 @@ def create_app() -> FastAPI:
                 pipeline_type=PipelineType.BASELINE,
             )
         try:
-            result = svc.chat_baseline(request.message, settings.search_index_baseline)
+            # In a worker thread, so concurrent questions can share batches
+            result = await run_in_threadpool(
+                svc.chat_baseline, request.message, settings.search_index_baseline
+            )
         except Exception:
             logger.exception("Baseline chat error")
             return ChatResponse(
@@ -159,7 +299,10 @@ def create_app() -> FastAPI:
                 pipeline_type=PipelineType.ENHANCED,
             )
         try:
-            result = svc.chat_enhanced(request.message, settings.search_index_enhanced)
+            # In a worker thread, so concurrent questions can share batches
+            result = await run_in_threadpool(
+                svc.chat_enhanced, request.message, settings.search_index_enhanced
+            )
         except Exception:
             logger.exception("Enhanced chat error")
             return ChatResponse(
@@ -177,14 +320,14 @@ def create_app() -> FastAPI:
     @app.post("/api/pipeline/run", response_model=PipelineStatus)
     async def run_pipeline(request: PipelineRequest) -> PipelineStatus:
         """Run a pipeline on all documents in the corpus."""
-        if not settings.contentunderstanding_endpoint or not settings.search_endpoint:
+        if not settings.contentunderstanding_endpoint or not search_configured:
             return PipelineStatus(
                 pipeline_type=request.pipeline_type,
                 status="error",
                 message="Pipeline services not configured. "
                 "Set CONTENTUNDERSTANDING_ENDPOINT and SEARCH_ENDPOINT.",
             )
-        if not settings.azure_openai_endpoint:
+        if not settings.azure_openai_endpoint and settings.embedding_backend == "azure":
             return PipelineStatus(
                 pipeline_type=request.pipeline_type,
                 status="error",
@@ -196,15 +339,8 @@ def create_app() -> FastAPI:
                 endpoint=settings.contentunderstanding_endpoint,
                 api_key=settings.contentunderstanding_key,
             )
-            embedding = EmbeddingService(
-                endpoint=settings.azure_openai_endpoint,
-                credential=settings.azure_openai_key or "",
-                deployment=settings.embedding_deployment,
-            )
-            search = SearchService(
-                endpoint=settings.search_endpoint,
-                credential=settings.search_api_key or "",
-            )
+            embedding = get_embedding_service()
+            search = get_search_service()
 
             filenames = storage.list_documents()
             if not filenames:
@@ -215,7 +351,10 @@ def create_app() -> FastAPI:
                 )
 
             total = len(filenames)
-            processed = 0
+            documents = [
+                (Path(fname).stem, storage.get_document_sas_url(fname))
+                for fname in filenames
+            ]
 
             if request.pipeline_type == PipelineType.BASELINE:
                 from enrichment.pipeline.baseline import BaselinePipeline
@@ -226,13 +365,15 @@ def create_app() -> FastAPI:
                     embedding=embedding,
                     search=search,
                     index_name=settings.search_index_baseline,
+                    deduplicator=ChunkDeduplicator(
+                        drop_duplicates=settings.dedup_drop_duplicates
+                    ),
+                    boilerplate=BoilerplateIndex(),
                 )
                 pipeline.ensure_index()
-                for fname in filenames:
-                    blob_url = storage.get_document_sas_url(fname)
-                    doc_id = Path(fname).stem
-                    pipeline.process_document(document_url=blob_url, document_id=doc_id)
-                    processed += 1
+                results = pipeline.process_corpus(
+                    documents, max_workers=settings.chunk_workers
+                )
             else:
                 from enrichment.pipeline.enhanced import EnhancedPipeline
 
@@ -242,21 +383,28 @@ def create_app() -> FastAPI:
                     embedding=embedding,
                     search=search,
                     index_name=settings.search_index_enhanced,
+                    deduplicator=ChunkDeduplicator(
+                        drop_duplicates=settings.dedup_drop_duplicates
+                    ),
+                    boilerplate=BoilerplateIndex(),
                 )
                 pipeline.ensure_index()
                 pipeline.ensure_analyzer()
-                for fname in filenames:
-                    blob_url = storage.get_document_sas_url(fname)
-                    doc_id = Path(fname).stem
-                    pipeline.process_document(document_url=blob_url, document_id=doc_id)
-                    processed += 1
+                results = pipeline.process_corpus(
+                    documents, max_workers=settings.chunk_workers
+                )
 
+            processed = sum("error" not in result for result in results)
+            message = f"Processed {processed}/{total} documents."
+            if processed < total:
+                failed = [r["document_id"] for r in results if "error" in r]
+                message += f" Failed: {', '.join(failed)}."
             return PipelineStatus(
                 pipeline_type=request.pipeline_type,
                 status="complete",
                 documents_processed=processed,
                 documents_total=total,
-                message=f"Processed {processed}/{total} documents.",
+                message=message,
             )
         except Exception:
             logger.exception("Pipeline run error")
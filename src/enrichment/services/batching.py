@@ -0,0 +1,99 @@
+"""Coalescing of concurrent single-text embedding requests."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from enrichment.services.embedding import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+_Item = tuple[str, Future[list[float]]]
+
+
+class EmbeddingBatcher:
+    """Gather query texts from concurrent callers into shared embedding calls.
+
+    :meth:`embed_single` blocks like ``EmbeddingService.embed_single`` but
+    hands the text to a collector thread, which waits up to
+    ``max_wait_ms`` for other requests (at most ``max_batch`` texts) and
+    embeds them all in one ``embed()`` call. Texts arriving while a call is
+    in flight form the next batch, so under load requests share round
+    trips; a lone request pays at most ``max_wait_ms`` extra.
+    """
+
+    def __init__(
+        self,
+        embedding: EmbeddingService,
+        max_wait_ms: float = 5.0,
+        max_batch: int = 64,
+    ) -> None:
+        self.embedding = embedding
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self._queue: queue.SimpleQueue[_Item | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def embed_single(self, text: str) -> list[float]:
+        """Embed *text* together with whatever other queries are pending."""
+        future: Future[list[float]] = Future()
+        self._queue.put((text, future))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._thread.start()
+        return future.result()
+
+    def _collect(self, first: _Item) -> tuple[list[_Item], bool]:
+        """Gather items until the batch is full or the wait is over."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.embedding.embed(texts), strict=True))
+            except Exception as exc:  # re-raised in each caller
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            self.batches += 1
+            logger.debug("Embedded %d queries in one request", len(texts))
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def close(self) -> None:
+        """Finish pending requests and stop the collector thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
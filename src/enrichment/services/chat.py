@@ -3,15 +3,27 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
 from openai import AzureOpenAI
 
+from enrichment.services.http import get_http_client
+from enrichment.services.search import BASELINE_SELECT, ENHANCED_SELECT
+
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import httpx
     from azure.core.credentials import TokenCredential
 
+    from enrichment.services.batching import EmbeddingBatcher
     from enrichment.services.embedding import EmbeddingService
-    from enrichment.services.search import SearchService
+    from enrichment.services.rate_limit import AdaptiveLimiter
+    from enrichment.services.search import SearchBackend
 
 logger = logging.getLogger(__name__)
 
@@ -31,22 +43,89 @@ Rules:
 - Do NOT repeat the question or use filler phrases like "According to the reports..."."""
 
 
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query embeddings with a time-to-live.
+
+    Keys are the query with case and whitespace normalized, so the demo
+    questions users click repeatedly are embedded once. Entries older than
+    ``ttl_seconds`` are treated as misses; ``max_entries=0`` disables the
+    cache. Safe to share between request threads.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str) -> list[float] | None:
+        """Return the cached embedding of *query*, if present and fresh."""
+        key = self._key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, vector: list[float]) -> None:
+        """Cache *vector* for *query*, evicting the least recently used entry."""
+        if self.max_entries <= 0:
+            return
+        key = self._key(query)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
 class ChatService:
     """RAG chat service — retrieves context from search, generates answers via LLM."""
 
     def __init__(
         self,
-        search: SearchService,
+        search: SearchBackend,
         embedding: EmbeddingService,
         endpoint: str,
         credential: TokenCredential | str,
         chat_deployment: str = "gpt-4o",
+        query_cache: QueryEmbeddingCache | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        batcher: EmbeddingBatcher | None = None,
+        http_client: httpx.Client | None = None,
     ) -> None:
         self.search = search
         self.embedding = embedding
+        # Coalesces query embeddings of concurrent requests when set
+        self.batcher = batcher
         self._chat_deployment = chat_deployment
+        self.query_cache = (
+            query_cache if query_cache is not None else QueryEmbeddingCache()
+        )
+        self._limiter = limiter
 
-        kwargs: dict = {"azure_endpoint": endpoint, "api_version": "2024-10-21"}
+        kwargs: dict = {
+            "azure_endpoint": endpoint,
+            "api_version": "2024-10-21",
+            # Shared pool: connections stay warm across services and requests
+            "http_client": http_client or get_http_client(),
+        }
+        if limiter is not None:
+            kwargs["max_retries"] = 0  # the limiter retries failures itself
         if isinstance(credential, str):
             kwargs["api_key"] = credential
         else:
@@ -63,14 +142,24 @@ class ChatService:
         index_name: str,
         system_prompt: str = SYSTEM_PROMPT_BASELINE,
         top_k: int = 5,
+        select: Sequence[str] | None = None,
     ) -> dict[str, Any]:
         """Answer a question using RAG over the specified index.
 
+        ``select`` names the index fields to retrieve; see
+        ``SearchService.search``. A report's executive summary, stored on
+        each of its chunks, is added to the context once, after the
+        report's first chunk.
+
         Returns:
             Dict with 'message', 'citations' list, and 'context_used'
         """
-        # Step 1: Embed the query
-        query_vector = self.embedding.embed_single(message)
+        # Step 1: Embed the query, reusing the vector for repeated questions
+        query_vector = self.query_cache.get(message)
+        if query_vector is None:
+            embed = self.batcher or self.embedding
+            query_vector = embed.embed_single(message)
+            self.query_cache.put(message, query_vector)
 
         # Step 2: Retrieve relevant chunks
         results = self.search.search(
@@ -78,6 +167,7 @@ class ChatService:
             query=message,
             vector=query_vector,
             top=top_k,
+            select=select,
         )
 
         if not results:
@@ -87,6 +177,7 @@ class ChatService:
             }
 
         # Step 3: Build context from search results
+        summarized: set[str] = set()
         context_parts = []
         citations = []
         for r in results:
@@ -106,8 +197,10 @@ class ChatService:
 
             header = " | ".join(header_parts)
             entry = f"{header}\n{content}"
-            if r.get("executive_summary"):
-                entry += f"\nExecutive Summary: {r['executive_summary']}"
+            summary = r.get("executive_summary", "")
+            if summary and doc_id not in summarized:
+                summarized.add(doc_id)
+                entry += f"\nExecutive Summary: {summary}"
 
             context_parts.append(entry)
             citations.append(
@@ -120,7 +213,7 @@ class ChatService:
                     "report_number": r.get("report_number", ""),
                     "agencies": r.get("agencies", []),
                     "topic_category": r.get("topic_category", ""),
-                    "executive_summary": r.get("executive_summary", ""),
+                    "executive_summary": summary,
                     "key_findings": r.get("key_findings", []),
                     "recommendations": r.get("recommendations", []),
                 }
@@ -129,7 +222,10 @@ class ChatService:
         context = "\n\n---\n\n".join(context_parts)
 
         # Step 4: Generate answer via LLM
-        response = self._client.chat.completions.create(
+        create = self._client.chat.completions.create
+        if self._limiter is not None:
+            create = partial(self._limiter.call, create)
+        response = create(
             model=self._chat_deployment,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -180,6 +276,7 @@ class ChatService:
             message=message,
             index_name=index_name,
             system_prompt=SYSTEM_PROMPT_BASELINE,
+            select=BASELINE_SELECT,
         )
 
     def chat_enhanced(self, message: str, index_name: str) -> dict[str, Any]:
@@ -188,4 +285,5 @@ class ChatService:
             message=message,
             index_name=index_name,
             system_prompt=SYSTEM_PROMPT_ENHANCED,
+            select=ENHANCED_SELECT,
         )
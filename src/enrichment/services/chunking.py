@@ -2,100 +2,557 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import re
+import zlib
+from enum import StrEnum
+from typing import TYPE_CHECKING, NamedTuple
+
+from enrichment.services.tokenizer import count_tokens
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+
+class SizeUnit(StrEnum):
+    """Unit in which ``chunk_size`` and ``chunk_overlap`` are measured."""
+
+    CHARS = "chars"
+    TOKENS = "tokens"
+
+
+class ChunkingStrategy(StrEnum):
+    """How a document is divided into blocks before packing into chunks."""
+
+    PARAGRAPH = "paragraph"
+    MARKDOWN = "markdown"
+    CONTENT_DEFINED = "content_defined"
 
 
-@dataclass
 class Chunk:
-    """A text chunk with metadata for indexing."""
+    """A text chunk with metadata for indexing.
 
-    id: str
-    content: str
-    document_id: str
-    chunk_index: int
-    page_number: int | None = None
+    A chunk stores ``(start, end)`` offsets into a source string rather than
+    its own copy of the text; ``content`` is sliced out on access. Chunks
+    produced by :func:`iter_chunks` all share the extracted document text,
+    so a document's chunks cost one string plus a few slots each. Passing
+    ``content`` directly makes that string the source.
+    """
+
+    __slots__ = (
+        "id",
+        "document_id",
+        "chunk_index",
+        "page_number",
+        "section_title",
+        "metadata",
+        "start",
+        "end",
+        "_source",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        content: str | None = None,
+        document_id: str = "",
+        chunk_index: int = 0,
+        page_number: int | None = None,
+        section_title: str | None = None,
+        metadata: dict | None = None,
+        *,
+        source: str | None = None,
+        start: int = 0,
+        end: int | None = None,
+    ) -> None:
+        if content is not None:
+            source, start, end = content, 0, len(content)
+        elif source is None:
+            raise ValueError("Chunk needs either content or a source span")
+        self.id = id
+        self.document_id = document_id
+        self.chunk_index = chunk_index
+        self.page_number = page_number
+        self.section_title = section_title
+        self.metadata = metadata
+        self.start = start
+        self.end = len(source) if end is None else end
+        self._source = source
+
+    @property
+    def content(self) -> str:
+        """The chunk text, sliced from the shared source on each access."""
+        return self._source[self.start : self.end]
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._source, self.start, self.end = value, 0, len(value)
+
+    @property
+    def span(self) -> tuple[int, int]:
+        """``(start, end)`` offsets of the chunk within its source text."""
+        return self.start, self.end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return (
+            self.id == other.id
+            and self.document_id == other.document_id
+            and self.chunk_index == other.chunk_index
+            and self.page_number == other.page_number
+            and self.section_title == other.section_title
+            and self.metadata == other.metadata
+            and self.content == other.content
+        )
+
+    __hash__ = None  # type: ignore[assignment]  # mutable, like a dataclass
+
+    def __repr__(self) -> str:
+        return (
+            f"Chunk(id={self.id!r}, document_id={self.document_id!r}, "
+            f"chunk_index={self.chunk_index}, span=({self.start}, {self.end}))"
+        )
+
+
+class _Block(NamedTuple):
+    """A span of source text that the packer places as a unit."""
+
+    start: int
+    end: int
+    atomic: bool = False
     section_title: str | None = None
-    metadata: dict | None = None
+    page_number: int | None = None
+    new_section: bool = False
+    # Skipped comment lines precede the block, so no chunk may span both
+    after_gap: bool = False
 
 
-def chunk_text(
+def _paragraph_spans(text: str, separator: str) -> Iterator[tuple[int, int]]:
+    """Yield ``(start, end)`` offsets of the non-blank paragraphs in *text*.
+
+    Offsets exclude leading and trailing whitespace, so ``text[start:end]``
+    equals ``paragraph.strip()`` for each paragraph of ``text.split(separator)``.
+    """
+    pos = 0
+    length = len(text)
+    while pos <= length:
+        idx = text.find(separator, pos)
+        end = length if idx == -1 else idx
+        start, stop = _strip_span(text, pos, end)
+        if stop > start:
+            yield start, stop
+        if idx == -1:
+            break
+        pos = idx + len(separator)
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int]:
+    """Shrink ``[start, end)`` so it excludes surrounding whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+# CU markdown structure: ATX headings, page-break comments, HTML tables and
+# figures, and pipe tables.
+_HEADING_RE = re.compile(r"(#{1,6})[ \t]+(.+?)[ \t#]*")
+_PAGE_BREAK_RE = re.compile(r"<!--\s*PageBreak\s*-->", re.IGNORECASE)
+_COMMENT_RE = re.compile(r"<!--.*-->")
+_HTML_BLOCK_RE = re.compile(r"<(table|figure)\b", re.IGNORECASE)
+
+
+def _markdown_blocks(text: str) -> Iterator[_Block]:
+    """Split CU markdown into blocks in a single pass over its lines.
+
+    Paragraphs end at blank lines. Headings start a new section and update
+    the section title carried by the blocks that follow; page-break
+    comments advance the page number. HTML ``<table>``/``<figure>``
+    elements and runs of pipe-table rows are emitted as atomic blocks so
+    they are never split. Page-break comments and other standalone comments
+    (page headers, footers and numbers) are skipped, and the block after
+    them is flagged ``after_gap`` so the packer never carries a chunk
+    across them.
+    """
+    page = 1
+    section: str | None = None
+    para_start = para_end = -1
+    para_is_table = False
+    html_tag = ""
+    html_start = -1
+    gap = para_gap = html_gap = False
+
+    length = len(text)
+    pos = 0
+    while pos < length:
+        nl = text.find("\n", pos)
+        line_end = length if nl == -1 else nl
+        start, end = _strip_span(text, pos, line_end)
+        pos = line_end + 1
+        line = text[start:end]
+
+        if html_tag:
+            if f"</{html_tag}>" in line.lower():
+                yield _Block(html_start, end, True, section, page, after_gap=html_gap)
+                html_tag = ""
+            continue
+
+        is_pipe_row = line.startswith("|")
+        structural = (
+            not line or is_pipe_row != para_is_table or line.startswith(("#", "<"))
+        )
+        if structural and para_start >= 0:
+            yield _Block(
+                para_start, para_end, para_is_table, section, page, after_gap=para_gap
+            )
+            para_start = -1
+
+        if not line:
+            continue
+        if line.startswith("#") and (heading := _HEADING_RE.fullmatch(line)):
+            section = heading.group(2)
+            yield _Block(start, end, False, section, page, new_section=True)
+            gap = False
+            continue
+        if line.startswith("<"):
+            if _PAGE_BREAK_RE.fullmatch(line):
+                page += 1
+                gap = True
+                continue
+            if _COMMENT_RE.fullmatch(line):
+                gap = True
+                continue
+            if tag := _HTML_BLOCK_RE.match(line):
+                name = tag.group(1).lower()
+                if f"</{name}>" in line.lower():
+                    yield _Block(start, end, True, section, page, after_gap=gap)
+                else:
+                    html_tag, html_start, html_gap = name, start, gap
+                gap = False
+                continue
+
+        if para_start < 0:
+            para_start, para_is_table, para_gap = start, is_pipe_row, gap
+            gap = False
+        para_end = end
+
+    if html_tag:
+        end = _strip_span(text, html_start, length)[1]
+        yield _Block(html_start, end, True, section, page, after_gap=html_gap)
+    elif para_start >= 0:
+        yield _Block(
+            para_start, para_end, para_is_table, section, page, after_gap=para_gap
+        )
+
+
+# Sentence ends: terminal punctuation and closing quotes/brackets followed by
+# whitespace and something that can start a sentence. Clause ends: semicolons,
+# colons and spaced dashes.
+_SENTENCE_END_RE = re.compile(r"[.!?]+[\"'”’)\]]*\s+(?=[\"'“‘(\[]?[A-Z0-9])")
+_CLAUSE_END_RE = re.compile(r"[;:]\s+|\s+[–—-]{1,2}\s+")
+_ABBREVIATIONS = frozenset(
+    {
+        "approx", "co", "corp", "dept", "dr", "e.g", "etc", "fig", "gov",
+        "i.e", "inc", "jr", "ltd", "mr", "mrs", "ms", "no", "nos", "pp",
+        "pub", "sec", "sr", "st", "u.s", "vol", "vs",
+        "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept",
+        "oct", "nov", "dec",
+    }
+)  # fmt: skip
+
+
+def _ends_abbreviation(text: str, start: int, end: int) -> bool:
+    """Whether the word ending at *end* is an abbreviation or an initial."""
+    space = text.rfind(" ", start, end)
+    word = text[start if space < 0 else space + 1 : end].lstrip("(\"'").lower()
+    return len(word) == 1 or word in _ABBREVIATIONS
+
+
+def _segment_spans(text: str, block: _Block) -> list[tuple[int, int]]:
+    """Split an oversized block at sentence ends, or failing that clause ends.
+
+    Both passes scan the block in place with a precompiled pattern, so no
+    substring is copied. Returns a single span when the block has no
+    boundary of either kind; the caller then falls back to fixed windows.
+    """
+    spans: list[tuple[int, int]] = []
+    for pattern in (_SENTENCE_END_RE, _CLAUSE_END_RE):
+        spans.clear()
+        start = block.start
+        for match in pattern.finditer(text, block.start, block.end):
+            if (
+                pattern is _SENTENCE_END_RE
+                and text[match.start()] == "."
+                and _ends_abbreviation(text, start, match.start())
+            ):
+                continue
+            spans.append((start, match.start() + len(match.group().rstrip())))
+            start = match.end()
+        spans.append((start, block.end))
+        if len(spans) > 1:
+            break
+    return spans
+
+
+def _content_digest(content: str) -> str:
+    """Short, stable hex digest of a chunk's text, used in its ID."""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _is_cut_point(text: str, block: _Block, block_len: int, target_len: int) -> bool:
+    """Decide from the block's content alone whether a chunk may end after it.
+
+    A rolling hash over characters would fire once every ``target_len``
+    characters on average. Snapping cuts to block ends, the equivalent is
+    to fire with probability ``block_len / target_len`` per block, drawn
+    from a hash of the block text. Because the decision depends only on the
+    block itself, an edit shifts boundaries only until the next cut point
+    and every later chunk keeps its content, and therefore its ID.
+    """
+    fingerprint = zlib.crc32(text[block.start : block.end].encode("utf-8"))
+    return fingerprint < (1 << 32) * min(1.0, block_len / target_len)
+
+
+def _pack_blocks(
     text: str,
+    blocks: Iterable[_Block],
     document_id: str,
-    chunk_size: int = 1000,
-    chunk_overlap: int = 200,
-    separator: str = "\n\n",
-) -> list[Chunk]:
-    """Split text into overlapping chunks.
+    chunk_size: int,
+    chunk_overlap: int,
+    size_unit: SizeUnit | str,
+    content_defined: bool = False,
+) -> Iterator[Chunk]:
+    """Greedily pack blocks into chunks of at most ``chunk_size``.
+
+    The current chunk is tracked as a ``(start, end)`` span over *text*, so
+    adding a block is O(1) and yielded chunks reference *text* instead of
+    copying it. In token mode each block is measured once and chunk sizes
+    are the sum of their blocks; overlap and oversized-block windows are
+    converted back to characters with the measured characters-per-token
+    ratio. Atomic blocks are never windowed and never carried as overlap,
+    and no overlap is carried into a new section. Other oversized blocks
+    are split at sentence (then clause) boundaries and the pieces packed
+    in their place; only text with neither is cut into fixed windows.
+    A block flagged ``after_gap`` always starts a new chunk without
+    overlap, so text skipped between blocks never lands inside a chunk.
 
-    Uses paragraph boundaries when possible, falling back to
-    character-level splitting for long paragraphs.
+    With ``content_defined`` a chunk is also cut after any block that
+    :func:`_is_cut_point` selects, overlap is disabled, and chunk IDs are
+    derived from a hash of the chunk text rather than its position.
     """
-    if not text.strip():
-        return []
+    by_tokens = SizeUnit(size_unit) is SizeUnit.TOKENS
+    sep_len = count_tokens("\n\n") if by_tokens else 0
 
     # Ensure overlap is less than chunk_size to guarantee progress
-    chunk_overlap = min(chunk_overlap, chunk_size - 1)
+    chunk_overlap = 0 if content_defined else min(chunk_overlap, chunk_size - 1)
+    min_len = chunk_size // 4
+    target_len = max(1, chunk_size // 2)
+    id_counts: dict[str, int] = {}
 
-    paragraphs = [p.strip() for p in text.split(separator) if p.strip()]
-    chunks: list[Chunk] = []
-    current = ""
     chunk_idx = 0
+    # Span of the chunk being accumulated and its size in ``size_unit``;
+    # ``fresh`` is False while it holds only overlap carried over from the
+    # chunk that was just emitted.
+    cur_start = cur_end = -1
+    cur_len = 0
+    fresh = False
+    can_overlap = True
+    section: str | None = None
+    page: int | None = None
 
-    for para in paragraphs:
-        # If adding this paragraph exceeds chunk_size, finalize current chunk
-        if current and len(current) + len(para) + len(separator) > chunk_size:
-            chunks.append(
-                Chunk(
-                    id=f"{document_id}-{chunk_idx:04d}",
-                    content=current.strip(),
-                    document_id=document_id,
-                    chunk_index=chunk_idx,
-                )
-            )
-            chunk_idx += 1
-            # Keep overlap from the end of the current chunk
-            if chunk_overlap > 0 and len(current) > chunk_overlap:
-                current = current[-chunk_overlap:]
-            else:
-                current = ""
-
-        if len(para) > chunk_size:
-            # Split oversized paragraphs at character level
-            if current:
-                chunks.append(
-                    Chunk(
-                        id=f"{document_id}-{chunk_idx:04d}",
-                        content=current.strip(),
-                        document_id=document_id,
-                        chunk_index=chunk_idx,
-                    )
-                )
-                chunk_idx += 1
-                current = ""
-
-            for i in range(0, len(para), chunk_size - chunk_overlap):
-                segment = para[i : i + chunk_size]
-                chunks.append(
-                    Chunk(
-                        id=f"{document_id}-{chunk_idx:04d}",
-                        content=segment.strip(),
-                        document_id=document_id,
-                        chunk_index=chunk_idx,
+    def make(start: int, end: int) -> Chunk:
+        start, end = _strip_span(text, start, end)
+        if content_defined:
+            digest = _content_digest(text[start:end])
+            seen = id_counts.get(digest, 0)
+            id_counts[digest] = seen + 1
+            chunk_id = f"{document_id}-{digest}" + (f"-{seen}" if seen else "")
+        else:
+            chunk_id = f"{document_id}-{chunk_idx:04d}"
+        return Chunk(
+            id=chunk_id,
+            document_id=document_id,
+            chunk_index=chunk_idx,
+            page_number=page,
+            section_title=section,
+            source=text,
+            start=start,
+            end=end,
+        )
+
+    # Sentences (or clauses) of an oversized block, processed in order
+    # before the next block is pulled; kept reversed so pop() is O(1)
+    pending: list[_Block] = []
+    block_iter = iter(blocks)
+    while pending or (block := next(block_iter, None)) is not None:
+        if pending:
+            block = pending.pop()
+        block_chars = block.end - block.start
+        block_len = (
+            count_tokens(text[block.start : block.end]) if by_tokens else block_chars
+        )
+        if block_len > chunk_size and not block.atomic:
+            spans = _segment_spans(text, block)
+            if len(spans) > 1:
+                # Pack the pieces like any other block; only the first
+                # keeps the block's section boundary
+                pending.extend(
+                    block._replace(
+                        start=s,
+                        end=e,
+                        new_section=block.new_section and i == 0,
+                        after_gap=block.after_gap and i == 0,
                     )
+                    for i, (s, e) in reversed(list(enumerate(spans)))
                 )
+                continue
+
+        # If adding this block exceeds chunk_size, finalize current chunk
+        if cur_start >= 0:
+            if by_tokens:
+                new_len = cur_len + sep_len + block_len
+            else:
+                new_len = block.end - cur_start
+            cut = block.new_section or block.after_gap
+            if cut or new_len > chunk_size:
+                if fresh:
+                    yield make(cur_start, cur_end)
+                    chunk_idx += 1
+                # Keep overlap from the end of the current chunk
+                if (
+                    fresh
+                    and can_overlap
+                    and not cut
+                    and chunk_overlap > 0
+                    and cur_len > chunk_overlap
+                ):
+                    ratio = (cur_end - cur_start) / cur_len
+                    cur_start = cur_end - max(1, round(chunk_overlap * ratio))
+                    cur_len = chunk_overlap
+                else:
+                    cur_start = cur_end = -1
+                fresh = False
+
+        if not fresh:
+            # The block starts the new content of the next chunk
+            section, page = block.section_title, block.page_number
+        if block_len > chunk_size:
+            # Blocks still oversized after segmentation become chunks of
+            # their own; anything pending was finalized above, keep no
+            # overlap across them
+            cur_start = cur_end = -1
+            if block.atomic:
+                yield make(block.start, block.end)
                 chunk_idx += 1
+                continue
+            ratio = block_chars / block_len
+            window = max(1, int(chunk_size * ratio))
+            step = max(1, window - int(chunk_overlap * ratio))
+            for i in range(block.start, block.end, step):
+                start, end = _strip_span(text, i, min(i + window, block.end))
+                if end > start:
+                    yield make(start, end)
+                    chunk_idx += 1
+            continue
+
+        if cur_start < 0:
+            cur_start = block.start
+            cur_len = block_len
+        elif by_tokens:
+            cur_len += sep_len + block_len
         else:
-            current = f"{current}{separator}{para}" if current else para
+            cur_len = block.end - cur_start
+        cur_end = block.end
+        can_overlap = not block.atomic
+        fresh = True
+
+        if (
+            content_defined
+            and cur_len >= min_len
+            and _is_cut_point(text, block, block_len, target_len)
+        ):
+            yield make(cur_start, cur_end)
+            chunk_idx += 1
+            cur_start = cur_end = -1
+            fresh = False
 
     # Don't forget the last chunk
-    if current.strip():
-        chunks.append(
-            Chunk(
-                id=f"{document_id}-{chunk_idx:04d}",
-                content=current.strip(),
-                document_id=document_id,
-                chunk_index=chunk_idx,
-            )
-        )
+    if fresh:
+        yield make(cur_start, cur_end)
+
+
+def iter_chunks(
+    text: str,
+    document_id: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    separator: str = "\n\n",
+    size_unit: SizeUnit | str = SizeUnit.CHARS,
+    strategy: ChunkingStrategy | str = ChunkingStrategy.PARAGRAPH,
+) -> Iterator[Chunk]:
+    """Lazily split text into overlapping chunks.
+
+    The ``paragraph`` strategy uses *separator*-delimited paragraph
+    boundaries, splitting long paragraphs at sentence and clause ends. The
+    ``markdown`` strategy follows CU markdown structure instead: chunks
+    never span two sections or a page-break, header, footer or number
+    comment, tables are kept whole, and each chunk records
+    the ``section_title`` and ``page_number`` where it starts. The
+    ``content_defined`` strategy chooses paragraph boundaries from the
+    content itself and names chunks by a hash of their text, so editing one
+    part of a document leaves the IDs of the other chunks unchanged;
+    ``chunk_overlap`` is ignored.
+
+    Chunks are yielded as soon as they are finalized, so consumers can
+    start embedding before the rest of the document has been split.
+    ``chunk_size`` and ``chunk_overlap`` are measured in ``size_unit``
+    (characters, or embedding-model tokens).
+    """
+    if not text.strip():
+        return
 
-    return chunks
+    if ChunkingStrategy(strategy) is ChunkingStrategy.MARKDOWN:
+        blocks = _markdown_blocks(text)
+    else:
+        blocks = (_Block(s, e) for s, e in _paragraph_spans(text, separator))
+    yield from _pack_blocks(
+        text,
+        blocks,
+        document_id,
+        chunk_size,
+        chunk_overlap,
+        size_unit,
+        content_defined=ChunkingStrategy(strategy) is ChunkingStrategy.CONTENT_DEFINED,
+    )
+
+
+def chunk_text(
+    text: str,
+    document_id: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    separator: str = "\n\n",
+    size_unit: SizeUnit | str = SizeUnit.CHARS,
+    strategy: ChunkingStrategy | str = ChunkingStrategy.PARAGRAPH,
+) -> list[Chunk]:
+    """Split text into overlapping chunks.
+
+    Thin wrapper around :func:`iter_chunks` for callers that need the
+    whole list up front.
+    """
+    return list(
+        iter_chunks(
+            text,
+            document_id,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separator=separator,
+            size_unit=size_unit,
+            strategy=strategy,
+        )
+    )
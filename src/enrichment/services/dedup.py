@@ -0,0 +1,167 @@
+"""Corpus-wide duplicate detection so repeated chunks share one embedding."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+
+FINGERPRINT_BITS = 64
+_BAND_BITS = 16
+_BANDS = FINGERPRINT_BITS // _BAND_BITS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def _normalize(text: str) -> str:
+    """Case- and whitespace-insensitive form used for exact matching."""
+    return " ".join(text.lower().split())
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of the word shingles in *text*.
+
+    Texts that differ in a few words produce fingerprints a small Hamming
+    distance apart.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [
+            " ".join(words[i : i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+    counts = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        h = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        )
+        for bit in range(FINGERPRINT_BITS):
+            counts[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, c in enumerate(counts) if c > 0)
+
+
+@dataclass
+class DedupStats:
+    """Counters for how texts were resolved."""
+
+    unique: int = 0
+    exact: int = 0
+    near: int = 0
+
+    @property
+    def duplicates(self) -> int:
+        return self.exact + self.near
+
+
+class ChunkDeduplicator:
+    """Reuse embeddings for chunks already seen anywhere in the corpus.
+
+    Exact duplicates are found by the SHA-256 of the normalized text.
+    Near duplicates are found by SimHash: fingerprints within
+    ``max_distance`` bits are treated as the same text. The fingerprint is
+    split into four 16-bit bands and, since ``max_distance`` is at most 3,
+    any match shares at least one band exactly, so each lookup only
+    compares against the few entries in matching band buckets.
+
+    One instance is meant to live for a whole run and be shared by both
+    pipelines. Embeddings are kept as packed float32 arrays.
+    """
+
+    def __init__(self, max_distance: int = 3, drop_duplicates: bool = False) -> None:
+        if not 0 <= max_distance < _BANDS:
+            raise ValueError(f"max_distance must be between 0 and {_BANDS - 1}")
+        self.max_distance = max_distance
+        self.drop_duplicates = drop_duplicates
+        self.stats = DedupStats()
+        self._exact: dict[bytes, int] = {}
+        self._bands: list[dict[int, list[int]]] = [{} for _ in range(_BANDS)]
+        self._fingerprints: list[int] = []
+        self._vectors: list[array] = []
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def _find_near(self, fingerprint: int) -> int | None:
+        for band, buckets in enumerate(self._bands):
+            key = fingerprint >> (band * _BAND_BITS) & _BAND_MASK
+            for entry in buckets.get(key, ()):
+                distance = (self._fingerprints[entry] ^ fingerprint).bit_count()
+                if distance <= self.max_distance:
+                    return entry
+        return None
+
+    def _add(self, digest: bytes, fingerprint: int, vector: list[float]) -> None:
+        entry = len(self._vectors)
+        self._vectors.append(array("f", vector))
+        self._fingerprints.append(fingerprint)
+        self._exact[digest] = entry
+        for band, buckets in enumerate(self._bands):
+            key = fingerprint >> (band * _BAND_BITS) & _BAND_MASK
+            buckets.setdefault(key, []).append(entry)
+
+    def embed(
+        self,
+        texts: list[str],
+        embed: Callable[[list[str]], list[list[float]]],
+    ) -> tuple[list[list[float]], list[bool]]:
+        """Embed *texts*, calling *embed* only for texts not seen before.
+
+        Returns the embeddings in input order and, for each text, whether
+        it duplicated a text seen earlier (in this or a previous call).
+        """
+        entries: list[int | None] = []
+        duplicate: list[bool] = []
+        new: dict[bytes, tuple[int, str]] = {}
+        keys: list[tuple[bytes, int]] = []
+
+        for text in texts:
+            digest = hashlib.sha256(_normalize(text).encode("utf-8")).digest()
+            fingerprint = simhash(text)
+            keys.append((digest, fingerprint))
+            entry = self._exact.get(digest)
+            if entry is not None:
+                self.stats.exact += 1
+            elif digest in new:
+                self.stats.exact += 1
+                entries.append(None)
+                duplicate.append(True)
+                continue
+            elif (entry := self._find_near(fingerprint)) is not None:
+                self.stats.near += 1
+            else:
+                self.stats.unique += 1
+                new[digest] = (len(entries), text)
+                entries.append(None)
+                duplicate.append(False)
+                continue
+            entries.append(entry)
+            duplicate.append(True)
+
+        if new:
+            vectors = embed([text for _, text in new.values()])
+            for (digest, (pos, _)), vector in zip(new.items(), vectors, strict=True):
+                self._add(digest, keys[pos][1], vector)
+
+        result: list[list[float]] = []
+        for (digest, _), entry in zip(keys, entries, strict=True):
+            if entry is None:
+                entry = self._exact[digest]
+            result.append(self._vectors[entry].tolist())
+        logger.debug(
+            "Dedup: %d texts, %d embedded, %d reused",
+            len(texts),
+            len(new),
+            len(texts) - len(new),
+        )
+        return result, duplicate
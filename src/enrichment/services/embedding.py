@@ -2,12 +2,61 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Literal, Protocol, cast, overload
 
 from openai import AzureOpenAI
 
+from enrichment.services.http import get_http_client
+from enrichment.services.tokenizer import count_tokens
+
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    import httpx
+    import numpy as np  # type: ignore[import-not-found]  # optional dependency
     from azure.core.credentials import TokenCredential
+    from numpy.typing import NDArray  # type: ignore[import-not-found]
+
+    from enrichment.services.embedding_cache import EmbeddingCache
+    from enrichment.services.rate_limit import AdaptiveLimiter
+
+logger = logging.getLogger(__name__)
+
+# Azure OpenAI accepts up to 2048 inputs and 300k tokens per embeddings
+# request; the token default leaves headroom for estimated counts.
+MAX_BATCH_ITEMS = 2048
+MAX_BATCH_TOKENS = 250_000
+
+
+def _numpy() -> Any:
+    """Import NumPy, which ``as_array=True`` needs (the ``local`` extra)."""
+    try:
+        import numpy  # type: ignore[import-not-found]  # optional dependency
+    except ImportError as exc:
+        raise ImportError(
+            "as_array=True requires numpy: uv sync --extra local"
+        ) from exc
+    return numpy
+
+
+class EmbeddingBackend(Protocol):
+    """Computes embeddings for one request's worth of texts.
+
+    Lets :class:`EmbeddingService` batch, cache and parallelize for a
+    backend other than Azure OpenAI, e.g. the offline
+    :class:`~enrichment.services.local_embedding.HashingEmbeddingBackend`.
+    ``name`` takes the place of the deployment in cache keys.
+    """
+
+    name: str
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]: ...
+
+    def embed_batch_packed(self, texts: list[str]) -> list[bytes]: ...
 
 
 class EmbeddingService:
@@ -18,8 +67,23 @@ class EmbeddingService:
         endpoint: str,
         credential: TokenCredential | str,
         deployment: str = "text-embedding-3-small",
+        max_batch_tokens: int = MAX_BATCH_TOKENS,
+        max_batch_items: int = MAX_BATCH_ITEMS,
+        max_concurrency: int = 1,
+        cache: EmbeddingCache | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        dimensions: int | None = None,
+        backend: EmbeddingBackend | None = None,
+        http_client: httpx.Client | None = None,
     ) -> None:
-        kwargs: dict = {"azure_endpoint": endpoint, "api_version": "2024-10-21"}
+        kwargs: dict = {
+            "azure_endpoint": endpoint,
+            "api_version": "2024-10-21",
+            # Shared pool: connections stay warm across services and requests
+            "http_client": http_client or get_http_client(),
+        }
+        if limiter is not None:
+            kwargs["max_retries"] = 0  # the limiter retries failures itself
         if isinstance(credential, str):
             kwargs["api_key"] = credential
         else:
@@ -29,30 +93,224 @@ class EmbeddingService:
                 credential, "https://cognitiveservices.azure.com/.default"
             )
         self._client = AzureOpenAI(**kwargs)
-        self._deployment = deployment
+        # Replaces the Azure OpenAI requests when set (offline runs)
+        self._backend = backend
+        self._deployment = backend.name if backend is not None else deployment
+        # Shortened output size (text-embedding-3 models); None = native size
+        self.dimensions = dimensions
+        self._max_batch_tokens = max_batch_tokens
+        self._max_batch_items = max_batch_items
+        # Requests in flight per embed() call; the client's connection pool
+        # is shared by the worker threads.
+        self._max_concurrency = max(1, max_concurrency)
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._cache = cache
+        # Shared with other clients of the same quota; when set it decides
+        # how many requests are actually in flight, up to its maximum.
+        self._limiter = limiter
+
+    def _create(self, **kwargs: Any) -> Any:
+        if self.dimensions is not None:
+            kwargs["dimensions"] = self.dimensions
+        if self._limiter is None:
+            return self._client.embeddings.create(**kwargs)
+        return self._limiter.call(self._client.embeddings.create, **kwargs)
+
+    @property
+    def _concurrency(self) -> int:
+        """Requests a single ``embed()`` call is spread across.
+
+        With a limiter this follows its current limit, so calls grow to
+        use the concurrency the limiter has found room for instead of
+        staying at ``max_concurrency``.
+        """
+        if self._limiter is None:
+            return self._max_concurrency
+        return max(self._max_concurrency, int(self._limiter.limit))
+
+    @property
+    def _cache_dimensions(self) -> int:
+        """Cache key part for the output size; 0 is the model's native size."""
+        return self.dimensions or 0
+
+    def _batches(self, texts: list[str]) -> Iterator[list[str]]:
+        """Pack consecutive texts into requests within the token and item budgets.
 
-    def embed(self, texts: list[str]) -> list[list[float]]:
+        With concurrency enabled, the token budget is also capped at an even
+        share of the total so a single call keeps every request slot busy. A text
+        larger than the budget on its own still gets a request of its own;
+        the API rejects it if it exceeds the model's input limit.
+        """
+        counts = [count_tokens(text) for text in texts]
+        budget = self._max_batch_tokens
+        concurrency = self._concurrency
+        if concurrency > 1:
+            budget = min(budget, -(-sum(counts) // concurrency))
+        start = 0
+        tokens = 0
+        for i, n in enumerate(counts):
+            if i > start and (
+                i - start >= self._max_batch_items or tokens + n > budget
+            ):
+                yield texts[start:i]
+                start, tokens = i, 0
+            tokens += n
+        yield texts[start:]
+
+    def _embed_batch(self, batch: list[str]) -> list[list[float]]:
+        if self._backend is not None:
+            return self._backend.embed_batch(batch)
+        response = self._create(input=batch, model=self._deployment)
+        return [item.embedding for item in response.data]
+
+    def _embed_batch_packed(self, batch: list[str]) -> list[bytes]:
+        """Request base64 vectors and keep them as packed float32 bytes."""
+        if self._backend is not None:
+            return self._backend.embed_batch_packed(batch)
+        response = self._create(
+            input=batch, model=self._deployment, encoding_format="base64"
+        )
+        return [
+            base64.b64decode(item.embedding)  # type: ignore[arg-type]  # a str when encoding_format="base64"
+            for item in response.data
+        ]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                workers = self._max_concurrency
+                if self._limiter is not None:
+                    workers = max(workers, int(self._limiter.maximum))
+                self._executor = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix=f"embed-{self._deployment}",
+                )
+            return self._executor
+
+    @overload
+    def embed(
+        self, texts: list[str], *, as_array: Literal[False] = False
+    ) -> list[list[float]]: ...
+
+    @overload
+    def embed(
+        self, texts: list[str], *, as_array: Literal[True]
+    ) -> NDArray[np.float32]: ...
+
+    def embed(
+        self, texts: list[str], *, as_array: bool = False
+    ) -> list[list[float]] | NDArray[np.float32]:
         """Generate embeddings for a batch of texts.
 
-        Azure OpenAI supports up to 2048 texts per batch, but we
-        process in smaller batches to stay within token limits.
+        Texts are sent in as few requests as the ``max_batch_tokens`` and
+        ``max_batch_items`` budgets allow. With ``max_concurrency`` above
+        one, up to that many requests are in flight at once (or as many as
+        the ``limiter`` currently allows); results are returned in input
+        order either way. With a ``cache``, only texts
+        not embedded before by this deployment are sent.
+
+        With ``as_array=True`` the result is a contiguous ``(len(texts),
+        dimensions)`` ``numpy.float32`` matrix instead of lists of Python
+        floats, about a sixth of the memory. Vectors are fetched
+        base64-encoded and decoded straight into it.
         """
+        if as_array:
+            return self._embed_array(texts)
         if not texts:
             return []
+        if self._cache is None:
+            return self._embed_uncached(texts, self._embed_batch)
 
-        all_embeddings: list[list[float]] = []
-        batch_size = 16
+        results = self._cache.get_many(texts, self._deployment, self._cache_dimensions)
+        missing = self._missing(texts, results)
+        if missing:
+            new_texts = list(missing)
+            vectors = self._embed_uncached(new_texts, self._embed_batch)
+            self._cache.put_many(
+                new_texts, vectors, self._deployment, self._cache_dimensions
+            )
+            for text, vector in zip(new_texts, vectors, strict=True):
+                for i in missing[text]:
+                    results[i] = vector
+        return results  # type: ignore[return-value]  # every None was filled above
 
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-            response = self._client.embeddings.create(
-                input=batch,
-                model=self._deployment,
+    def _embed_array(self, texts: list[str]) -> NDArray[np.float32]:
+        np = _numpy()
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if self._cache is None:
+            blobs: list[bytes | None] = list(
+                self._embed_uncached(texts, self._embed_batch_packed)
             )
-            all_embeddings.extend([item.embedding for item in response.data])
+        else:
+            blobs = self._cache.get_blobs(
+                texts, self._deployment, self._cache_dimensions
+            )
+            missing = self._missing(texts, blobs)
+            if missing:
+                new_texts = list(missing)
+                new_blobs = self._embed_uncached(new_texts, self._embed_batch_packed)
+                self._cache.put_blobs(
+                    new_texts, new_blobs, self._deployment, self._cache_dimensions
+                )
+                for text, blob in zip(new_texts, new_blobs, strict=True):
+                    for i in missing[text]:
+                        blobs[i] = blob
+
+        packed = cast("list[bytes]", blobs)  # every None was filled above
+        matrix = np.empty((len(texts), len(packed[0]) // 4), dtype=np.float32)
+        for row, blob in zip(matrix, packed, strict=True):
+            row[:] = np.frombuffer(blob, dtype="<f4")
+        return matrix
 
+    def _missing(self, texts: list[str], found: list[Any]) -> dict[str, list[int]]:
+        """Positions of each distinct text the cache did not have."""
+        missing: dict[str, list[int]] = {}
+        for i, vector in enumerate(found):
+            if vector is None:
+                missing.setdefault(texts[i], []).append(i)
+        logger.debug(
+            "Embedding cache: %d of %d texts hit",
+            len(texts) - sum(map(len, missing.values())),
+            len(texts),
+        )
+        return missing
+
+    def _embed_uncached[T](
+        self, texts: list[str], embed_batch: Callable[[list[str]], list[T]]
+    ) -> list[T]:
+        batches = list(self._batches(texts))
+        if len(batches) == 1 or self._concurrency <= 1:
+            results = map(embed_batch, batches)
+        else:
+            results = self._get_executor().map(embed_batch, batches)
+        all_embeddings = [vector for result in results for vector in result]
+
+        logger.debug("Embedded %d texts in %d requests", len(texts), len(batches))
         return all_embeddings
 
-    def embed_single(self, text: str) -> list[float]:
-        """Generate embedding for a single text."""
+    def close(self) -> None:
+        """Stop the request threads, if any were started."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    @overload
+    def embed_single(
+        self, text: str, *, as_array: Literal[False] = False
+    ) -> list[float]: ...
+
+    @overload
+    def embed_single(
+        self, text: str, *, as_array: Literal[True]
+    ) -> NDArray[np.float32]: ...
+
+    def embed_single(
+        self, text: str, *, as_array: bool = False
+    ) -> list[float] | NDArray[np.float32]:
+        """Generate embedding for a single text (a 1-D array with ``as_array``)."""
+        if as_array:
+            return self._embed_array([text])[0]
         return self.embed([text])[0]
@@ -0,0 +1,220 @@
+"""Persistent, content-addressed cache of embedding vectors."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+logger = logging.getLogger(__name__)
+
+# Keeps IN (...) lists well under SQLite's bound-parameter limit
+_QUERY_BATCH = 500
+# Eviction trims the store to this fraction of ``max_bytes`` so it does
+# not run again on the very next insert.
+_EVICT_TO = 0.9
+# Blobs are little-endian float32, like the API's base64 vectors
+_SWAP_BYTES = sys.byteorder == "big"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    digest BLOB NOT NULL,
+    deployment TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (digest, deployment, dimensions)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed);
+"""
+
+
+def text_digest(text: str) -> bytes:
+    """SHA-256 of *text*, the content address of its embedding."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    """*vector* as little-endian float32 bytes."""
+    packed = array("f", vector)
+    if _SWAP_BYTES:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_vector(blob: bytes) -> list[float]:
+    """The values of a little-endian float32 blob."""
+    vector = array("f")
+    vector.frombytes(blob)
+    if _SWAP_BYTES:
+        vector.byteswap()
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """SQLite store of embeddings keyed by text hash, deployment and dimensions.
+
+    Vectors are stored as packed little-endian float32, the layout of the
+    API's base64 encoding, about 6 KB per ``text-embedding-3-small``
+    vector. When the stored vectors exceed ``max_bytes`` the least
+    recently used entries are evicted. One file
+    can be shared by both pipelines, the server and later runs, including
+    at the same time: sizes are read from the database rather than
+    tracked per process. The connection is guarded by a lock so the cache
+    can be used from embedding worker threads.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = 1 << 30) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return count
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the stored vectors."""
+        with self._lock:
+            return self._vector_bytes()
+
+    def _vector_bytes(self) -> int:
+        (size,) = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        return int(size)
+
+    def _used_bytes(self) -> int:
+        """Bytes of database pages in use: an upper bound on the vectors' size."""
+        (pages,) = self._conn.execute("PRAGMA page_count").fetchone()
+        (free,) = self._conn.execute("PRAGMA freelist_count").fetchone()
+        (page_size,) = self._conn.execute("PRAGMA page_size").fetchone()
+        return (pages - free) * page_size
+
+    def _select(
+        self, columns: str, digests: list[bytes], deployment: str, dimensions: int
+    ) -> list[tuple]:
+        """Fetch *columns* for the given keys, in batches of bound parameters."""
+        rows: list[tuple] = []
+        for i in range(0, len(digests), _QUERY_BATCH):
+            batch = digests[i : i + _QUERY_BATCH]
+            rows.extend(
+                self._conn.execute(
+                    f"SELECT {columns} FROM embeddings "  # noqa: S608  # fixed column list and placeholders only
+                    "WHERE deployment = ? AND dimensions = ? "
+                    f"AND digest IN ({','.join('?' * len(batch))})",
+                    (deployment, dimensions, *batch),
+                )
+            )
+        return rows
+
+    def get_blobs(
+        self, texts: Sequence[str], deployment: str, dimensions: int = 0
+    ) -> list[bytes | None]:
+        """Look up *texts* as packed float32 bytes, ``None`` when not cached."""
+        digests = [text_digest(text) for text in texts]
+        with self._lock, self._conn:
+            found: dict[bytes, bytes] = dict(
+                self._select("digest, vector", digests, deployment, dimensions)
+            )
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET accessed = ? "
+                "WHERE digest = ? AND deployment = ? AND dimensions = ?",
+                [(now, digest, deployment, dimensions) for digest in found],
+            )
+            hits = sum(1 for digest in digests if digest in found)
+            self.hits += hits
+            self.misses += len(digests) - hits
+        return [found.get(digest) for digest in digests]
+
+    def get_many(
+        self, texts: Sequence[str], deployment: str, dimensions: int = 0
+    ) -> list[list[float] | None]:
+        """Look up *texts*, returning ``None`` for each one not cached."""
+        return [
+            None if blob is None else unpack_vector(blob)
+            for blob in self.get_blobs(texts, deployment, dimensions)
+        ]
+
+    def put_blobs(
+        self,
+        texts: Sequence[str],
+        blobs: Sequence[bytes],
+        deployment: str,
+        dimensions: int = 0,
+    ) -> None:
+        """Store packed float32 vectors, evicting old entries if needed."""
+        now = time.time()
+        rows = [
+            (text_digest(text), deployment, dimensions, blob, now)
+            for text, blob in zip(texts, blobs, strict=True)
+        ]
+        with self._lock, self._conn:
+            # Another thread or process may have stored the same text
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows
+            )
+            # The page count is cheap and bounds the vectors' size; only
+            # when it is over the limit are the vectors summed.
+            if self._used_bytes() > self.max_bytes:
+                size = self._vector_bytes()
+                if size > self.max_bytes:
+                    self._evict(size)
+
+    def put_many(
+        self,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        deployment: str,
+        dimensions: int = 0,
+    ) -> None:
+        """Store the embedding of each text, evicting old entries if needed."""
+        blobs = [pack_vector(vector) for vector in vectors]
+        self.put_blobs(texts, blobs, deployment, dimensions)
+
+    def _evict(self, size: int) -> None:
+        """Delete least recently used vectors until under the size target.
+
+        *size* is the current total size of the stored vectors.
+        """
+        target = self.max_bytes * _EVICT_TO
+        cursor = self._conn.execute(
+            "SELECT digest, deployment, dimensions, LENGTH(vector) "
+            "FROM embeddings ORDER BY accessed"
+        )
+        doomed = []
+        for digest, deployment, dimensions, length in cursor:
+            if size <= target:
+                break
+            doomed.append((digest, deployment, dimensions))
+            size -= length
+        cursor.close()
+        self._conn.executemany(
+            "DELETE FROM embeddings "
+            "WHERE digest = ? AND deployment = ? AND dimensions = ?",
+            doomed,
+        )
+        logger.info("Evicted %d cached embeddings", len(doomed))
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
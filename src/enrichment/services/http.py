@@ -0,0 +1,44 @@
+"""Process-wide HTTP connection pool for the Azure OpenAI clients."""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+from functools import lru_cache
+
+import httpx
+from openai import DefaultHttpxClient
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4)
+def get_http_client(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 60.0,
+    http2: bool = True,
+) -> httpx.Client:
+    """Return the shared ``httpx`` client for the given pool settings.
+
+    Every ``AzureOpenAI`` client created with it reuses the same warm
+    connections and TLS sessions instead of opening its own pool. HTTP/2
+    (one multiplexed connection per host) needs the ``h2`` package from
+    the ``http2`` extra; without it a warning is logged and the pool falls
+    back to HTTP/1.1 keep-alive. The client lives for the rest of the
+    process.
+    """
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning(
+            "HTTP/2 requested but h2 is not installed (uv sync --extra http2); "
+            "Azure OpenAI requests use HTTP/1.1"
+        )
+        http2 = False
+    return DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        http2=http2,
+    )
@@ -0,0 +1,163 @@
+"""In-process BM25 keyword index and reciprocal-rank fusion."""
+
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from collections import Counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    import numpy as np  # type: ignore[import-not-found]  # optional dependency
+    from numpy.typing import NDArray  # type: ignore[import-not-found]
+
+_TOKEN_RE = re.compile(r"\w+")
+_MAX_TF = 0xFFFF  # term frequencies are stored as uint16
+
+# Rank constant from Cormack et al. (2009), also used by Azure AI Search
+RRF_K = 60
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens of *text*."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Inverted index over row-numbered texts, scored with Okapi BM25.
+
+    Each term's postings are two ``array`` buffers — row numbers (uint32)
+    and term frequencies (uint16) — appended as rows are added and read
+    as zero-copy NumPy views at query time, so a query scores every
+    matching row with a few vector operations per term. Removed rows are
+    zeroed in the document-length table and skipped until enough
+    accumulate to compact the postings. Requires NumPy.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        try:
+            import numpy  # type: ignore[import-not-found]  # optional dependency
+        except ImportError as exc:
+            raise ImportError(
+                "BM25Index requires numpy: uv sync --extra local"
+            ) from exc
+        self._np = numpy
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, tuple[array[int], array[int]]] = {}
+        self._df: Counter[str] = Counter()
+        self._lengths: array[int] = array("I")
+        self._total_length = 0
+        self._stale = 0
+        self.documents = 0
+
+    def add(self, row: int, text: str) -> None:
+        """Index *text* as *row* (rows are added once, in any order)."""
+        counts = Counter(tokenize(text))
+        if len(self._lengths) <= row:
+            self._lengths.extend([0] * (row + 1 - len(self._lengths)))
+        length = sum(counts.values())
+        if not length:  # nothing to match
+            return
+        self._lengths[row] = length
+        self._total_length += length
+        self.documents += 1
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+            postings[0].append(row)
+            postings[1].append(min(tf, _MAX_TF))
+            self._df[term] += 1
+
+    def remove(self, row: int, text: str) -> None:
+        """Drop *row*, previously added with *text*, from the statistics."""
+        if row >= len(self._lengths) or not self._lengths[row]:
+            return
+        self._total_length -= self._lengths[row]
+        self._lengths[row] = 0
+        self.documents -= 1
+        self._df.subtract(set(tokenize(text)))
+        self._stale += 1
+        if self._stale > self.documents:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite postings without removed rows."""
+        np = self._np
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+        for term, (rows, tfs) in list(self._postings.items()):
+            row_view = np.frombuffer(rows, dtype=np.uint32)
+            keep = lengths[row_view] > 0
+            if keep.all():
+                continue
+            if not keep.any():
+                del self._postings[term], self._df[term]
+                continue
+            self._postings[term] = (
+                array("I", row_view[keep].tobytes()),
+                array("H", np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes()),
+            )
+        self._stale = 0
+
+    def scores(self, query: str) -> NDArray[np.float32]:
+        """BM25 score of every row for *query* (0 where no term matches)."""
+        np = self._np
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+        scores = np.zeros(len(lengths), dtype=np.float32)
+        if not self.documents:
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * lengths / self._average_length)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            df = self._df[term]
+            if postings is None or df <= 0:
+                continue
+            idf = math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+            rows = np.frombuffer(postings[0], dtype=np.uint32)
+            tf = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+            contribution = idf * tf * (self.k1 + 1) / (tf + norm[rows])
+            scores[rows] += np.where(lengths[rows] > 0, contribution, 0)
+        return scores
+
+    @property
+    def _average_length(self) -> float:
+        return self._total_length / self.documents if self.documents else 0.0
+
+    def search(
+        self, query: str, top: int, rows: NDArray[np.int64] | None = None
+    ) -> list[tuple[float, int]]:
+        """The *top* highest-scoring rows for *query*, as (score, row).
+
+        When *rows* is given, only those rows are eligible (a filter).
+        """
+        np = self._np
+        scores = self.scores(query)
+        if rows is not None:
+            allowed = np.zeros(len(scores), dtype=bool)
+            allowed[rows[rows < len(scores)]] = True
+            scores = np.where(allowed, scores, 0)
+        matches = np.flatnonzero(scores > 0)
+        if not len(matches) or top <= 0:
+            return []
+        k = min(top, len(matches))
+        best = matches[np.argpartition(-scores[matches], k - 1)[:k]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(float(scores[row]), int(row)) for row in best]
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[int]], k: int = RRF_K
+) -> list[tuple[float, int]]:
+    """Merge ranked lists of IDs by summing ``1 / (k + rank)`` (rank from 1).
+
+    Returns (score, id) pairs, best first; ties keep first-seen order.
+    """
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1 / (k + rank)
+    return sorted(((s, item) for item, s in fused.items()), key=lambda p: -p[0])
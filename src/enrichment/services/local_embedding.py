@@ -0,0 +1,80 @@
+"""Deterministic offline embeddings for benchmarks and tests."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np  # type: ignore[import-not-found]  # optional dependency
+    from numpy.typing import NDArray  # type: ignore[import-not-found]
+
+# Multiplier of the polynomial n-gram hash and the murmur3 fmix64 constants
+_POLY = 0x100000001B3
+_FMIX_1 = 0xFF51AFD7ED558CCD
+_FMIX_2 = 0xC4CEB9FE1A85EC53
+
+
+class HashingEmbeddingBackend:
+    """Feature-hashed character n-gram vectors, computed locally with NumPy.
+
+    Each lower-cased, whitespace-normalized text is split into character
+    n-grams (sizes ``ngram_sizes``), each n-gram is hashed to a signed
+    component of a ``dimensions``-long vector, and the result is
+    L2-normalized. Vectors depend only on the text and the parameters, so
+    runs are reproducible across processes and machines, and texts that
+    share wording land close together under cosine similarity — enough for
+    realistic pipeline, index and retrieval benchmarks without Azure
+    OpenAI. They carry no semantics beyond surface overlap.
+
+    Requires NumPy (the ``local`` extra).
+    """
+
+    def __init__(
+        self, dimensions: int = 1536, ngram_sizes: tuple[int, ...] = (3, 4, 5)
+    ) -> None:
+        try:
+            import numpy  # type: ignore[import-not-found]  # optional dependency
+        except ImportError as exc:
+            raise ImportError(
+                "HashingEmbeddingBackend requires numpy: uv sync --extra local"
+            ) from exc
+        self._np = numpy
+        self.dimensions = dimensions
+        self.ngram_sizes = ngram_sizes
+        self.name = f"hashing-{dimensions}-{'-'.join(map(str, ngram_sizes))}"
+
+    def _vector(self, text: str) -> NDArray[np.float32]:
+        np = self._np
+        padded = f" {' '.join(text.lower().split())} ".encode()
+        data = np.frombuffer(padded, dtype=np.uint8).astype(np.uint64)
+        counts = np.zeros(self.dimensions, dtype=np.float64)
+        for n in self.ngram_sizes:
+            if len(data) < n:
+                continue
+            # Polynomial hash of every n-gram at once, seeded by n
+            h = np.full(len(data) - n + 1, n, dtype=np.uint64)
+            for k in range(n):
+                h = h * np.uint64(_POLY) + data[k : len(data) - n + 1 + k]
+            h ^= h >> np.uint64(33)
+            h *= np.uint64(_FMIX_1)
+            h ^= h >> np.uint64(33)
+            h *= np.uint64(_FMIX_2)
+            h ^= h >> np.uint64(33)
+            signs = np.where(h >> np.uint64(63), -1.0, 1.0)
+            counts += np.bincount(
+                (h % np.uint64(self.dimensions)).astype(np.intp),
+                weights=signs,
+                minlength=self.dimensions,
+            )
+        norm = np.linalg.norm(counts)
+        if norm:
+            counts /= norm
+        return counts.astype(np.float32)
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed *texts* as lists of floats."""
+        return [self._vector(text).tolist() for text in texts]
+
+    def embed_batch_packed(self, texts: list[str]) -> list[bytes]:
+        """Embed *texts* as packed little-endian float32 bytes."""
+        return [self._vector(text).astype("<f4").tobytes() for text in texts]
@@ -0,0 +1,666 @@
+"""In-process vector search backend persisted to memory-mapped files."""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import math
+import operator
+import random
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+
+from enrichment.services.lexical import (
+    BM25Index,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from enrichment.services.search import (
+    DEFAULT_VECTOR_DIMENSIONS,
+    chunk_documents,
+    enhanced_chunk_documents,
+    search_hit,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
+
+    import numpy as np  # type: ignore[import-not-found]  # optional dependency
+    from numpy.typing import NDArray  # type: ignore[import-not-found]
+
+    from enrichment.services.chunking import Chunk
+    from enrichment.services.search import Embeddings
+
+logger = logging.getLogger(__name__)
+
+LocalAlgorithm = Literal["flat", "hnsw"]
+
+_META = "meta.json"
+_DOCUMENTS = "documents.jsonl"
+_VECTORS = "vectors.npy"
+_LEVEL0 = "graph0.npy"
+_UPPER = "graph_upper.json"
+_INITIAL_CAPACITY = 1024
+# Hits taken from each side of a hybrid query before fusion
+_HYBRID_CANDIDATES = 50
+
+_FILTER_OPS: dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+}
+_FILTER_RE = re.compile(
+    r"\s*(\w+)\s+(eq|ne|lt|le|gt|ge)\s+('(?:[^']|'')*'|[-\w.]+)\s*", re.IGNORECASE
+)
+
+
+def _literal(token: str) -> Any:
+    if token.startswith("'"):
+        return token[1:-1].replace("''", "'")
+    lowered = token.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered == "null":
+        return None
+    return float(token) if "." in token else int(token)
+
+
+@dataclass
+class QueryTimings:
+    """Per-stage latency of one :meth:`LocalSearchService.search` call."""
+
+    lexical_ms: float = 0.0
+    vector_ms: float = 0.0
+    fusion_ms: float = 0.0
+    total_ms: float = 0.0
+
+
+def parse_filter(expression: str) -> Callable[[dict[str, Any]], bool]:
+    """Compile the OData subset ``field op literal [and ...]`` to a predicate.
+
+    Supports ``eq``/``ne``/``lt``/``le``/``gt``/``ge`` comparisons joined by
+    ``and`` — the filters this app issues. Anything else raises
+    ``ValueError`` rather than being silently ignored.
+    """
+    clauses = []
+    for part in re.split(r"\s+and\s+", expression.strip(), flags=re.IGNORECASE):
+        match = _FILTER_RE.fullmatch(part)
+        if match is None:
+            raise ValueError(f"Unsupported filter for local search: {expression!r}")
+        field, op, value = match.groups()
+        clauses.append((field, _FILTER_OPS[op.lower()], _literal(value)))
+
+    def predicate(document: dict[str, Any]) -> bool:
+        for field, compare, value in clauses:
+            actual = document.get(field)
+            try:
+                if not compare(actual, value):
+                    return False
+            except TypeError:  # e.g. None le 5
+                return False
+        return True
+
+    return predicate
+
+
+def _grow(path: Path, array: Any, capacity: int, fill: float | int = 0) -> Any:
+    """Copy a memory-mapped ``.npy`` array into a larger one at *path*."""
+    from numpy.lib.format import open_memmap  # type: ignore[import-not-found]
+
+    tmp = path.with_suffix(".tmp.npy")
+    grown = open_memmap(
+        tmp, mode="w+", dtype=array.dtype, shape=(capacity, *array.shape[1:])
+    )
+    grown[len(array) :] = fill
+    grown[: len(array)] = array
+    grown.flush()
+    del grown
+    del array
+    tmp.replace(path)
+    return open_memmap(path, mode="r+")
+
+
+class _LocalIndex:
+    """One index directory: documents, vectors and (optionally) an HNSW graph.
+
+    Vectors are L2-normalized float32 rows of a memory-mapped ``.npy`` file
+    that doubles in capacity as it fills; documents (without vectors) are
+    an append-only JSON lines log replayed on open. Replacing or deleting a
+    document tombstones its row. A BM25 index over chunk content is rebuilt
+    in memory from the log. With the HNSW algorithm, layer-0 links are
+    a second memory-mapped ``(capacity, 2 * m)`` array and the sparse upper
+    layers a small JSON file.
+    """
+
+    def __init__(
+        self,
+        np: Any,
+        path: Path,
+        algorithm: LocalAlgorithm,
+        m: int,
+        ef_construction: int,
+        ef_search: int,
+    ) -> None:
+        from numpy.lib.format import open_memmap  # type: ignore[import-not-found]
+
+        self._np = np
+        self.path = path
+        meta = json.loads((path / _META).read_text(encoding="utf-8"))
+        self.kind: str = meta["kind"]
+        self.dimensions: int = meta["dimensions"]
+        self.count: int = meta.get("count", 0)
+        self.entry: int = meta.get("entry", -1)
+        self.max_level: int = meta.get("max_level", -1)
+        self.linked: int = meta.get("linked", 0)
+        self.algorithm = algorithm
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._rng = random.Random(self.count)  # noqa: S311  # graph levels, not crypto
+        self._level_mult = 1 / math.log(m)
+
+        vectors_path = path / _VECTORS
+        if not vectors_path.exists():
+            open_memmap(
+                vectors_path,
+                mode="w+",
+                dtype=np.float32,
+                shape=(_INITIAL_CAPACITY, self.dimensions),
+            ).flush()
+        self.vectors = open_memmap(vectors_path, mode="r+")
+
+        self.documents: list[dict[str, Any] | None] = []
+        self.rows: dict[str, int] = {}
+        self.lexical = BM25Index()
+        documents_path = path / _DOCUMENTS
+        if documents_path.exists():
+            with documents_path.open(encoding="utf-8") as f:
+                for line in f:
+                    self._replay(json.loads(line))
+        self.documents.extend([None] * (self.count - len(self.documents)))
+        self._log = documents_path.open("a", encoding="utf-8")
+
+        self.level0: Any = None
+        self.upper: dict[int, dict[int, list[int]]] = {}
+        if algorithm == "hnsw":
+            self._open_graph(open_memmap)
+
+    def _open_graph(self, open_memmap: Any) -> None:
+        level0_path = self.path / _LEVEL0
+        if not level0_path.exists() or self.linked != self.count:
+            # New graph, or rows added by a flat index since: relink them all
+            graph = open_memmap(
+                level0_path,
+                mode="w+",
+                dtype=self._np.int32,
+                shape=(len(self.vectors), 2 * self.m),
+            )
+            graph[:] = -1
+            graph.flush()
+            self.level0 = open_memmap(level0_path, mode="r+")
+            self.entry, self.max_level, self.upper = -1, -1, {}
+            for row in range(self.count):
+                if self.documents[row] is not None:
+                    self._link(row)
+            self.linked = self.count
+            self._save_meta()
+            return
+        self.level0 = open_memmap(level0_path, mode="r+")
+        upper_path = self.path / _UPPER
+        if upper_path.exists():
+            raw = json.loads(upper_path.read_text(encoding="utf-8"))
+            self.upper = {
+                int(level): {int(node): links for node, links in nodes.items()}
+                for level, nodes in raw.items()
+            }
+
+    def _replay(self, op: dict[str, Any]) -> None:
+        row = op["row"]
+        if "document" in op:
+            while len(self.documents) <= row:
+                self.documents.append(None)
+            self.documents[row] = op["document"]
+            self.rows[op["document"]["id"]] = row
+            self.lexical.add(row, op["document"].get("content", ""))
+        elif "merge" in op:
+            document = self.documents[row]
+            if document is not None:
+                document.update(op["merge"])
+        elif op.get("deleted"):
+            document = self.documents[row]
+            if document is not None:
+                self.lexical.remove(row, document.get("content", ""))
+                if self.rows.get(document["id"]) == row:
+                    del self.rows[document["id"]]
+            self.documents[row] = None
+
+    def _append_log(self, op: dict[str, Any]) -> None:
+        self._replay(op)
+        self._log.write(json.dumps(op, separators=(",", ":")) + "\n")
+
+    def _save_meta(self) -> None:
+        meta = {
+            "kind": self.kind,
+            "dimensions": self.dimensions,
+            "count": self.count,
+            "entry": self.entry,
+            "max_level": self.max_level,
+            "linked": self.linked,
+        }
+        (self.path / _META).write_text(json.dumps(meta), encoding="utf-8")
+
+    def flush(self) -> None:
+        """Persist vectors, graph, documents and counters."""
+        self.vectors.flush()
+        self._log.flush()
+        if self.level0 is not None:
+            self.level0.flush()
+            (self.path / _UPPER).write_text(json.dumps(self.upper), encoding="utf-8")
+        self._save_meta()
+
+    def close(self) -> None:
+        self.flush()
+        self._log.close()
+
+    # ── Writes ────────────────────────────────────────────────
+
+    def upsert(self, documents: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        np = self._np
+        results = []
+        for document in documents:
+            document = dict(document)
+            vector = np.asarray(document.pop("content_vector"), dtype=np.float32)
+            if vector.shape != (self.dimensions,):
+                results.append({"key": document["id"], "succeeded": False})
+                continue
+            old = self.rows.get(document["id"])
+            if old is not None:
+                self._append_log({"row": old, "deleted": True})
+            row = self.count
+            if row >= len(self.vectors):
+                self._reserve(2 * len(self.vectors))
+            norm = float(np.linalg.norm(vector))
+            self.vectors[row] = vector / norm if norm else vector
+            self.count += 1
+            self._append_log({"row": row, "document": document})
+            if self.level0 is not None:
+                self._link(row)
+            results.append({"key": document["id"], "succeeded": True})
+        self.flush()
+        return results
+
+    def merge(self, updates: dict[str, dict[str, Any]]) -> list[dict[str, Any]]:
+        results = []
+        for key, fields in updates.items():
+            row = self.rows.get(key)
+            if row is not None:
+                self._append_log({"row": row, "merge": fields})
+            results.append({"key": key, "succeeded": row is not None})
+        self.flush()
+        return results
+
+    def delete(self, ids: Iterable[str]) -> list[dict[str, Any]]:
+        results = []
+        for key in ids:
+            row = self.rows.get(key)
+            if row is not None:
+                self._append_log({"row": row, "deleted": True})
+            results.append({"key": key, "succeeded": row is not None})
+        self.flush()
+        return results
+
+    def _reserve(self, capacity: int) -> None:
+        self.vectors = _grow(self.path / _VECTORS, self.vectors, capacity)
+        if self.level0 is not None:
+            self.level0 = _grow(self.path / _LEVEL0, self.level0, capacity, fill=-1)
+
+    # ── HNSW graph ────────────────────────────────────────────
+
+    def _neighbors(self, node: int, level: int) -> list[int]:
+        if level == 0:
+            links = self.level0[node]
+            return links[links >= 0].tolist()
+        return self.upper.get(level, {}).get(node, [])
+
+    def _set_neighbors(self, node: int, level: int, links: list[int]) -> None:
+        if level == 0:
+            row = self.level0[node]
+            row[:] = -1
+            row[: len(links)] = links
+        else:
+            self.upper.setdefault(level, {})[node] = links
+
+    def _search_layer(
+        self, query: NDArray[np.float32], entry: list[int], ef: int, level: int
+    ) -> list[tuple[float, int]]:
+        """Best-first search of one layer; returns (score, node), best first."""
+        visited = set(entry)
+        scores = self.vectors[entry] @ query
+        candidates = [(-float(s), n) for s, n in zip(scores, entry, strict=True)]
+        heapq.heapify(candidates)
+        best = [(float(s), n) for s, n in zip(scores, entry, strict=True)]
+        heapq.heapify(best)
+        while len(best) > ef:
+            heapq.heappop(best)
+        while candidates:
+            negative, node = heapq.heappop(candidates)
+            if len(best) >= ef and -negative < best[0][0]:
+                break
+            fresh = [n for n in self._neighbors(node, level) if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for score, n in zip(
+                (self.vectors[fresh] @ query).tolist(), fresh, strict=True
+            ):
+                if len(best) < ef or score > best[0][0]:
+                    heapq.heappush(candidates, (-score, n))
+                    heapq.heappush(best, (score, n))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+        return sorted(best, reverse=True)
+
+    def _link(self, node: int) -> None:
+        """Insert *node* into the graph (HNSW, Malkov & Yashunin 2018)."""
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        self.linked = node + 1
+        if self.entry < 0:
+            self.entry, self.max_level = node, level
+            return
+        query = self.vectors[node]
+        entry = [self.entry]
+        for lc in range(self.max_level, level, -1):
+            entry = [self._search_layer(query, entry, 1, lc)[0][1]]
+        for lc in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(query, entry, self.ef_construction, lc)
+            limit = 2 * self.m if lc == 0 else self.m
+            chosen = [n for _, n in found[: self.m]]
+            self._set_neighbors(node, lc, chosen)
+            for neighbor in chosen:
+                links = [*self._neighbors(neighbor, lc), node]
+                if len(links) > limit:
+                    scores = self.vectors[links] @ self.vectors[neighbor]
+                    links = [links[i] for i in self._np.argsort(-scores)[:limit]]
+                self._set_neighbors(neighbor, lc, links)
+            entry = [n for _, n in found]
+        if level > self.max_level:
+            self.entry, self.max_level = node, level
+
+    # ── Queries ───────────────────────────────────────────────
+
+    def live_rows(self, predicate: Callable[[dict[str, Any]], bool] | None) -> Any:
+        return self._np.fromiter(
+            (
+                row
+                for row in self.rows.values()
+                if predicate is None or predicate(self.documents[row])  # type: ignore[arg-type]  # live rows have documents
+            ),
+            dtype=self._np.int64,
+        )
+
+    def nearest(
+        self,
+        query: NDArray[np.float32],
+        top: int,
+        predicate: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> list[tuple[float, int]]:
+        """The *top* live rows most similar to *query*, as (score, row)."""
+        np = self._np
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+        if self.level0 is not None and predicate is None and self.entry >= 0:
+            entry = [self.entry]
+            for lc in range(self.max_level, 0, -1):
+                entry = [self._search_layer(query, entry, 1, lc)[0][1]]
+            found = self._search_layer(query, entry, max(self.ef_search, top), 0)
+            hits = [(s, n) for s, n in found if self.documents[n] is not None]
+            if len(hits) >= min(top, len(self.rows)):
+                return hits[:top]
+        # Exact brute force: flat indexes, filters, or a sparse graph result
+        rows = self.live_rows(predicate)
+        if not len(rows):
+            return []
+        scores = self.vectors[rows] @ query
+        k = min(top, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[i]), int(rows[i])) for i in best]
+
+    def keyword(
+        self,
+        query: str,
+        top: int,
+        predicate: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> list[tuple[float, int]]:
+        """The *top* live rows by BM25 score for *query*, as (score, row).
+
+        A query without terms (``""`` or ``"*"``) matches every row.
+        """
+        rows = self.live_rows(predicate) if predicate is not None else None
+        if not tokenize(query):
+            if rows is None:
+                rows = self.live_rows(None)
+            return [(1.0, row) for row in rows[:top].tolist()]
+        return self.lexical.search(query, top, rows)
+
+
+class LocalSearchService:
+    """Azure AI Search stand-in that keeps indexes on local disk.
+
+    Implements the ``SearchBackend`` operations the pipelines and chat use,
+    so the whole stack can index and serve queries offline or be
+    load-tested on one machine. Each index is a directory under *root*.
+    Vector queries use exact NumPy brute force (``algorithm="flat"``) or an
+    HNSW graph (``"hnsw"``: approximate, sublinear); results below the
+    graph's reach and filtered queries fall back to brute force. Query text
+    is ranked with BM25; a query with both text and a vector is hybrid, its
+    keyword and vector hits merged by reciprocal-rank fusion as in Azure AI
+    Search. Stage latencies of the latest query are in ``last_timings``.
+    Requires NumPy.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        dimensions: int = DEFAULT_VECTOR_DIMENSIONS,
+        algorithm: LocalAlgorithm = "hnsw",
+        m: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+    ) -> None:
+        try:
+            import numpy  # type: ignore[import-not-found]  # optional dependency
+        except ImportError as exc:
+            raise ImportError(
+                "LocalSearchService requires numpy: uv sync --extra local"
+            ) from exc
+        self._np = numpy
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._dimensions = dimensions
+        self._algorithm: LocalAlgorithm = algorithm
+        self._graph_params = (m, ef_construction, ef_search)
+        self._indexes: dict[str, _LocalIndex] = {}
+        self._lock = threading.RLock()
+        self.last_timings = QueryTimings()
+
+    def _index(self, index_name: str) -> _LocalIndex:
+        index = self._indexes.get(index_name)
+        if index is None:
+            path = self.root / index_name
+            if not (path / _META).exists():
+                raise KeyError(f"Local index {index_name!r} does not exist")
+            index = _LocalIndex(self._np, path, self._algorithm, *self._graph_params)
+            self._indexes[index_name] = index
+        return index
+
+    def _create_index(self, index_name: str, kind: str) -> dict[str, Any]:
+        with self._lock:
+            path = self.root / index_name
+            meta_path = path / _META
+            if meta_path.exists():
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                if meta["dimensions"] != self._dimensions:
+                    raise ValueError(
+                        f"Index {index_name!r} holds {meta['dimensions']}-dimension "
+                        f"vectors, not {self._dimensions}; delete it first"
+                    )
+            else:
+                path.mkdir(parents=True, exist_ok=True)
+                meta = {"kind": kind, "dimensions": self._dimensions}
+                meta_path.write_text(json.dumps(meta), encoding="utf-8")
+            self._index(index_name)
+            return {"name": index_name, "kind": kind, "dimensions": self._dimensions}
+
+    def create_baseline_index(self, index_name: str) -> dict[str, Any]:
+        """Create the baseline index directory if it does not exist."""
+        return self._create_index(index_name, "baseline")
+
+    def create_enhanced_index(self, index_name: str) -> dict[str, Any]:
+        """Create the enhanced index directory if it does not exist."""
+        return self._create_index(index_name, "enhanced")
+
+    def upload_documents(
+        self, index_name: str, documents: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Add or replace documents (each with a ``content_vector``)."""
+        with self._lock:
+            return self._index(index_name).upsert(documents)
+
+    def index_chunks(
+        self, index_name: str, chunks: list[Chunk], embeddings: Embeddings
+    ) -> list[dict[str, Any]]:
+        """Store chunks with their embeddings in the local index."""
+        return self.upload_documents(index_name, chunk_documents(chunks, embeddings))
+
+    def index_enhanced_chunks(
+        self,
+        index_name: str,
+        chunks: list[Chunk],
+        embeddings: Embeddings,
+        document_metadata: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        """Store chunks with embeddings and CU-extracted metadata."""
+        return self.upload_documents(
+            index_name,
+            enhanced_chunk_documents(chunks, embeddings, document_metadata),
+        )
+
+    def get_chunk_positions(self, index_name: str, document_id: str) -> dict[str, int]:
+        """Map the IDs of a document's stored chunks to their ``chunk_index``."""
+        with self._lock:
+            index = self._index(index_name)
+            return {
+                key: doc["chunk_index"]
+                for key, row in index.rows.items()
+                if (doc := index.documents[row]) and doc["document_id"] == document_id
+            }
+
+    def update_chunk_positions(
+        self, index_name: str, positions: dict[str, int]
+    ) -> list[dict[str, Any]]:
+        """Set ``chunk_index`` on existing chunks."""
+        if not positions:
+            return []
+        with self._lock:
+            return self._index(index_name).merge(
+                {key: {"chunk_index": idx} for key, idx in positions.items()}
+            )
+
+    def delete_chunks(self, index_name: str, ids: list[str]) -> list[dict[str, Any]]:
+        """Remove chunks by ID."""
+        if not ids:
+            return []
+        with self._lock:
+            return self._index(index_name).delete(ids)
+
+    def search(
+        self,
+        index_name: str,
+        query: str,
+        vector: Sequence[float] | NDArray[np.float32] | None = None,
+        top: int = 5,
+        filter: str | None = None,
+        select: Sequence[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Hybrid (BM25 + vector, RRF-fused), vector-only or keyword search.
+
+        Same arguments and result shape as ``SearchService.search``: a
+        *vector* with query text is hybrid, a vector with ``""``/``"*"`` is
+        vector-only, and no vector is keyword-only. ``filter`` supports
+        ``field op literal [and ...]`` comparisons.
+        """
+        predicate = parse_filter(filter) if filter else None
+        timings = QueryTimings()
+        start = time.perf_counter()
+        with self._lock:
+            index = self._index(index_name)
+            has_vector = vector is not None and len(vector) > 0
+            hybrid = has_vector and bool(tokenize(query))
+            candidates = max(top, _HYBRID_CANDIDATES) if hybrid else top
+            vector_hits = lexical_hits = None
+            if vector is not None and has_vector:
+                stage = time.perf_counter()
+                query_vector = self._np.asarray(vector, dtype=self._np.float32)
+                vector_hits = index.nearest(query_vector, candidates, predicate)
+                timings.vector_ms = (time.perf_counter() - stage) * 1000
+            if vector_hits is None or hybrid:
+                stage = time.perf_counter()
+                lexical_hits = index.keyword(query, candidates, predicate)
+                timings.lexical_ms = (time.perf_counter() - stage) * 1000
+            if vector_hits is not None and lexical_hits is not None:
+                stage = time.perf_counter()
+                ranked = reciprocal_rank_fusion(
+                    [[row for _, row in lexical_hits], [row for _, row in vector_hits]]
+                )[:top]
+                timings.fusion_ms = (time.perf_counter() - stage) * 1000
+            else:
+                ranked = vector_hits or lexical_hits or []
+            hits = []
+            for score, row in ranked:
+                document = index.documents[row]
+                assert document is not None  # ranked rows are live
+                if select is not None:
+                    document = {k: v for k, v in document.items() if k in select}
+                hits.append(search_hit(document, score))
+            timings.total_ms = (time.perf_counter() - start) * 1000
+            self.last_timings = timings
+        logger.debug(
+            "Local search %s: lexical %.2f ms, vector %.2f ms, fusion %.2f ms, "
+            "total %.2f ms",
+            index_name,
+            timings.lexical_ms,
+            timings.vector_ms,
+            timings.fusion_ms,
+            timings.total_ms,
+        )
+        return hits
+
+    def delete_index(self, index_name: str) -> None:
+        """Delete an index and its files."""
+        with self._lock:
+            index = self._indexes.pop(index_name, None)
+            if index is not None:
+                index.close()
+            shutil.rmtree(self.root / index_name, ignore_errors=True)
+
+    def list_indexes(self) -> list[str]:
+        """List all index names."""
+        return sorted(p.parent.name for p in self.root.glob(f"*/{_META}"))
+
+    def close(self) -> None:
+        """Flush and close every open index."""
+        with self._lock:
+            for index in self._indexes.values():
+                index.close()
+            self._indexes.clear()
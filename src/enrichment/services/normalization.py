@@ -0,0 +1,170 @@
+"""Boilerplate, running header/footer and page-number stripping for CU markdown."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from collections import Counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+# CU page furniture comments are always dropped; PageBreak markers are kept
+# because the markdown chunker counts pages with them.
+_PAGE_FURNITURE_RE = re.compile(
+    r"<!--\s*Page(Header|Footer|Number)\b.*-->", re.IGNORECASE
+)
+_PAGE_BREAK_RE = re.compile(r"<!--\s*PageBreak\s*-->", re.IGNORECASE)
+# "12", "Page 12", "Page 12 of 40", "12/40" and lowercase front-matter
+# numerals such as "iii"
+_PAGE_NUMBER_RE = re.compile(
+    r"(?i:page\s+)?(\d+|(?=[ivx])x{0,3}(ix|iv|v?i{0,3}))(?i:\s*(of|/)\s*\d+)?"
+)
+# Page references inside running headers and footers: "Page 3",
+# "3 of 40", "3/40", or a number set off at either end ("GAO-24-1 | 3")
+_PAGE_REFERENCE_RE = re.compile(
+    r"\bpage\s+\d+|\b\d+\s*(of|/)\s*\d+\b|^\d+\s+[|·•–—-]\s|\s[|·•–—-]\s+\d+$",
+    re.IGNORECASE,
+)
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _line_key(line: str) -> int:
+    """Hash of a line with case and spacing normalized away.
+
+    Numbers are masked too in lines that carry a page number, so
+    ``"Page 3 of 40"`` and ``"page 4 of 40"`` share a key and running
+    footers that only differ in page number are counted together. Body
+    lines keep their numbers: ``"Costs rose 5%"`` and ``"Costs rose 9%"``
+    are different lines.
+    """
+    normalized = " ".join(line.lower().split())
+    if _PAGE_NUMBER_RE.fullmatch(normalized) or _PAGE_REFERENCE_RE.search(normalized):
+        normalized = _DIGITS_RE.sub("#", normalized)
+    return int.from_bytes(
+        hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+    )
+
+
+def _is_structural(line: str) -> bool:
+    """Headings, table rows and markup that must never be stripped."""
+    return line.startswith(("#", "|", "<"))
+
+
+class BoilerplateIndex:
+    """Learns repeated lines across a corpus and strips them before chunking.
+
+    A line is removed when it is CU page furniture (``PageHeader``,
+    ``PageFooter`` and ``PageNumber`` comments), a bare page number, a short
+    line repeated on at least ``min_page_repeats`` pages of the same
+    document (running headers and footers), or a line found in at least
+    ``min_documents`` documents making up ``min_document_fraction`` of the
+    corpus seen so far (shared boilerplate such as contact pages).
+
+    Document frequencies are kept as stable hashes of normalized lines, so
+    the index stays small and can be shipped to worker processes. Build it
+    once per run, either up front with :meth:`fit` or incrementally with
+    :meth:`add_document` as documents arrive, and share it between
+    pipelines; a document ID is only counted once.
+    """
+
+    def __init__(
+        self,
+        min_documents: int = 3,
+        min_document_fraction: float = 0.5,
+        min_page_repeats: int = 3,
+        max_header_length: int = 200,
+    ) -> None:
+        self.min_documents = min_documents
+        self.min_document_fraction = min_document_fraction
+        self.min_page_repeats = min_page_repeats
+        self.max_header_length = max_header_length
+        self.documents = 0
+        self.lines_removed = 0
+        self.chars_removed = 0
+        self._document_frequency: Counter[int] = Counter()
+        self._document_ids: set[str] = set()
+
+    def add_document(self, text: str, document_id: str | None = None) -> None:
+        """Count each distinct line of *text* once towards its document frequency."""
+        if document_id is not None:
+            if document_id in self._document_ids:
+                return
+            self._document_ids.add(document_id)
+        keys = {
+            _line_key(stripped)
+            for line in text.splitlines()
+            if (stripped := line.strip()) and not _is_structural(stripped)
+        }
+        self._document_frequency.update(keys)
+        self.documents += 1
+
+    def fit(self, texts: Iterable[str]) -> BoilerplateIndex:
+        """Add every document in *texts* and return the index."""
+        for text in texts:
+            self.add_document(text)
+        return self
+
+    def _corpus_threshold(self) -> float:
+        return max(self.min_documents, self.min_document_fraction * self.documents)
+
+    def strip(self, text: str) -> str:
+        """Return *text* without page furniture and learned boilerplate lines."""
+        return "".join(text[start:end] for start, end in self.kept_spans(text))
+
+    def kept_spans(self, text: str) -> list[tuple[int, int]]:
+        """``(start, end)`` offsets of the runs of lines :meth:`strip` keeps.
+
+        Joining ``text[start:end]`` over the spans gives the stripped text;
+        the spans are a compact way to describe it to a process that
+        already has *text*.
+        """
+        lines = text.splitlines(keepends=True)
+        threshold = self._corpus_threshold()
+
+        # Count on how many pages each short line appears in this document
+        page = 0
+        pages_seen: dict[int, int] = {}
+        page_counts: Counter[int] = Counter()
+        keys: list[int | None] = []
+        for line in lines:
+            stripped = line.strip()
+            if not stripped or _is_structural(stripped):
+                if _PAGE_BREAK_RE.fullmatch(stripped):
+                    page += 1
+                keys.append(None)
+                continue
+            key = _line_key(stripped)
+            keys.append(key)
+            if len(stripped) <= self.max_header_length and pages_seen.get(key) != page:
+                pages_seen[key] = page
+                page_counts[key] += 1
+
+        spans: list[tuple[int, int]] = []
+        removed = 0
+        offset = 0
+        for line, key in zip(lines, keys, strict=True):
+            start, offset = offset, offset + len(line)
+            stripped = line.strip()
+            if key is None:
+                drop = bool(_PAGE_FURNITURE_RE.fullmatch(stripped))
+            else:
+                drop = (
+                    bool(_PAGE_NUMBER_RE.fullmatch(stripped))
+                    or page_counts[key] >= self.min_page_repeats
+                    or self._document_frequency[key] >= threshold
+                )
+            if drop:
+                removed += 1
+                self.chars_removed += len(line)
+            elif spans and spans[-1][1] == start:
+                spans[-1] = (spans[-1][0], offset)
+            else:
+                spans.append((start, offset))
+        self.lines_removed += removed
+        logger.debug("Stripped %d boilerplate lines", removed)
+        return spans
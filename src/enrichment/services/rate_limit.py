@@ -0,0 +1,172 @@
+"""Adaptive concurrency limiting for Azure OpenAI requests."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING
+
+import openai
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Backoff when a 429 carries no usable Retry-After header
+_BASE_BACKOFF = 1.0
+_MAX_BACKOFF = 60.0
+# Backoff for timeouts, connection errors and 5xx (as the SDK's own retries)
+_TRANSIENT_BACKOFF = 0.5
+_MAX_TRANSIENT_BACKOFF = 8.0
+_TRANSIENT_ERRORS = (openai.APIConnectionError, openai.InternalServerError)
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Seconds the service asked us to wait, from its rate-limit headers.
+
+    Azure OpenAI sends ``retry-after-ms`` and ``retry-after`` (seconds, or
+    an HTTP date per RFC 9110). Returns ``None`` when neither is usable.
+    """
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent requests, shared by every client of a quota.
+
+    Each success grows the limit by ``increase`` per full window of
+    requests; a 429 multiplies it by ``decrease`` (once per window, so a
+    burst of throttled in-flight requests counts as one signal) and holds
+    all new requests until the ``Retry-After`` delay has passed. The limit
+    stays between ``minimum`` and ``maximum``, so it settles just below
+    the deployment's rate limit without hand tuning. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        initial: float = 4,
+        minimum: float = 1,
+        maximum: float = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        max_retries: int = 6,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = min(max(initial, minimum), maximum)
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.throttled = 0
+        self.retried = 0
+        self._in_flight = 0
+        self._window = 0
+        self._resume_at = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        """Requests currently holding a slot."""
+        return self._in_flight
+
+    def acquire(self) -> int:
+        """Block until a slot is free; returns the window the slot belongs to."""
+        with self._cond:
+            while True:
+                wait = self._resume_at - time.monotonic()
+                if wait <= 0 and self._in_flight < int(self.limit):
+                    self._in_flight += 1
+                    return self._window
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self) -> None:
+        """Give back a slot taken by :meth:`acquire`."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        """Additive increase: one ``increase`` per window of successes."""
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self, window: int, delay: float) -> None:
+        """Multiplicative decrease, and pause new requests for *delay* seconds."""
+        with self._cond:
+            self.throttled += 1
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+            if window == self._window:
+                self._window += 1
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                logger.info(
+                    "Rate limited; concurrency limit now %.1f, waiting %.1fs",
+                    self.limit,
+                    delay,
+                )
+
+    def call[T](self, fn: Callable[..., T], *args: object, **kwargs: object) -> T:
+        """Run ``fn(*args, **kwargs)`` in a slot, retrying failed requests.
+
+        429s shrink the limit and pause every caller (see
+        :meth:`on_throttle`). Timeouts, connection errors and 5xx responses
+        are retried with exponential backoff (or their ``Retry-After``)
+        without touching the limit, like the SDK's own retries. Clients
+        using a limiter should be created with ``max_retries=0`` so both
+        kinds of failure reach it instead of the SDK's backoff.
+        """
+        attempt = 0
+        while True:
+            window = self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except openai.RateLimitError as exc:
+                delay = retry_after(exc.response)
+                if delay is None:
+                    delay = min(_MAX_BACKOFF, _BASE_BACKOFF * 2**attempt)
+                self.on_throttle(window, delay)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                continue
+            except _TRANSIENT_ERRORS as exc:
+                if attempt >= self.max_retries:
+                    raise
+                retry_in = (
+                    retry_after(exc.response)
+                    if isinstance(exc, openai.APIStatusError)
+                    else None
+                )
+                if retry_in is None:
+                    retry_in = min(
+                        _MAX_TRANSIENT_BACKOFF, _TRANSIENT_BACKOFF * 2**attempt
+                    )
+                self.retried += 1
+                logger.warning(
+                    "%s from Azure OpenAI; retrying in %.1fs",
+                    type(exc).__name__,
+                    retry_in,
+                )
+            else:
+                self.on_success()
+                return result
+            finally:
+                self.release()
+            attempt += 1
+            time.sleep(retry_in)  # outside the slot
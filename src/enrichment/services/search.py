@@ -2,13 +2,23 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal, Protocol
 
 from azure.core.credentials import AzureKeyCredential
+from azure.core.pipeline.transport import RequestsTransport
 from azure.search.documents import SearchClient
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import (
+    BinaryQuantizationCompression,
     HnswAlgorithmConfiguration,
+    RescoringOptions,
+    ScalarQuantizationCompression,
     SearchableField,
     SearchField,
     SearchFieldDataType,
@@ -20,23 +30,68 @@ from azure.search.documents.indexes.models import (
 from azure.search.documents.models import VectorizedQuery
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping, Sequence
+
+    import numpy as np  # type: ignore[import-not-found]  # optional dependency
     from azure.core.credentials import TokenCredential
+    from numpy.typing import NDArray  # type: ignore[import-not-found]
 
     from enrichment.services.chunking import Chunk
 
+    # One vector per chunk: lists of floats or a float32 matrix
+    # (``EmbeddingService.embed(..., as_array=True)``)
+    Embeddings = Sequence[Sequence[float]] | NDArray[np.float32]
+
+logger = logging.getLogger(__name__)
+
+# Azure AI Search accepts up to 1000 documents and 16 MB per indexing
+# request; the byte default leaves headroom for the JSON envelope.
+MAX_UPLOAD_DOCUMENTS = 1000
+MAX_UPLOAD_BYTES = 8 * 1024 * 1024
+# Per-document statuses worth retrying: version conflict, index not
+# ready, throttled
+_RETRYABLE_STATUS = frozenset({409, 422, 429, 503})
+_RETRY_DELAY = 0.5
+
+# Native size of text-embedding-3-small vectors
+DEFAULT_VECTOR_DIMENSIONS = 1536
+
+VectorCompression = Literal["scalar", "binary"]
+
+
+# Fields search() returns. Passed as ``select`` so the service skips the
+# vector and anything else the caller will not use.
+RESULT_FIELDS = ("id", "content", "document_id")
+METADATA_FIELDS = (
+    "report_title",
+    "report_number",
+    "topic_category",
+    "executive_summary",
+    "agencies",
+    "section_title",
+    "page_number",
+)
+BASELINE_SELECT = RESULT_FIELDS
+ENHANCED_SELECT = RESULT_FIELDS + METADATA_FIELDS
+
+
+def _vector_field(dimensions: int = DEFAULT_VECTOR_DIMENSIONS) -> SearchField:
+    return SearchField(
+        name="content_vector",
+        type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+        searchable=True,
+        vector_search_dimensions=dimensions,
+        vector_search_profile_name="default-profile",
+    )
+
+
 # Index schemas
 BASELINE_INDEX_FIELDS = [
     SimpleField(name="id", type=SearchFieldDataType.String, key=True),
     SearchableField(name="content", type=SearchFieldDataType.String),
     SimpleField(name="document_id", type=SearchFieldDataType.String, filterable=True),
     SimpleField(name="chunk_index", type=SearchFieldDataType.Int32, sortable=True),
-    SearchField(
-        name="content_vector",
-        type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-        searchable=True,
-        vector_search_dimensions=1536,
-        vector_search_profile_name="default-profile",
-    ),
+    _vector_field(),
 ]
 
 # Enhanced index adds CU-extracted metadata for richer retrieval
@@ -55,21 +110,149 @@ ENHANCED_INDEX_FIELDS = [
     ),
     SearchableField(name="executive_summary", type=SearchFieldDataType.String),
     SearchableField(name="section_title", type=SearchFieldDataType.String),
+    SimpleField(
+        name="page_number",
+        type=SearchFieldDataType.Int32,
+        filterable=True,
+        sortable=True,
+    ),
     SearchField(
         name="agencies",
         type=SearchFieldDataType.Collection(SearchFieldDataType.String),
         filterable=True,
     ),
-    SearchField(
-        name="content_vector",
-        type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-        searchable=True,
-        vector_search_dimensions=1536,
-        vector_search_profile_name="default-profile",
-    ),
+    _vector_field(),
 ]
 
 
+@dataclass
+class UploadStats:
+    """Running totals of :meth:`SearchService.upload_documents` requests."""
+
+    batches: int = 0
+    documents: int = 0
+    bytes: int = 0
+    seconds: float = 0.0  # summed over requests, including concurrent ones
+    retried: int = 0
+    failed: int = 0
+
+    @property
+    def documents_per_sec(self) -> float:
+        """Mean per-request throughput."""
+        return self.documents / self.seconds if self.seconds else 0.0
+
+
+def _json_size(document: dict[str, Any]) -> int:
+    return len(json.dumps(document, separators=(",", ":")))
+
+
+def _as_list(vector: Any) -> list[float]:
+    """JSON-serializable form of a vector, which may be a NumPy row."""
+    if isinstance(vector, list):
+        return vector
+    return vector.tolist() if hasattr(vector, "tolist") else list(vector)
+
+
+def chunk_documents(
+    chunks: list[Chunk], embeddings: Embeddings
+) -> list[dict[str, Any]]:
+    """Baseline index documents for *chunks* and their embeddings."""
+    return [
+        {
+            "id": chunk.id,
+            "content": chunk.content,
+            "document_id": chunk.document_id,
+            "chunk_index": chunk.chunk_index,
+            "content_vector": _as_list(embedding),
+        }
+        for chunk, embedding in zip(chunks, embeddings, strict=True)
+    ]
+
+
+def enhanced_chunk_documents(
+    chunks: list[Chunk], embeddings: Embeddings, document_metadata: dict[str, Any]
+) -> list[dict[str, Any]]:
+    """Enhanced index documents: chunk fields plus CU-extracted metadata."""
+    return [
+        document
+        | {
+            "report_title": document_metadata.get("reportTitle", ""),
+            "report_number": document_metadata.get("reportNumber", ""),
+            "topic_category": document_metadata.get("topicCategory", ""),
+            "executive_summary": document_metadata.get("executiveSummary", ""),
+            "section_title": chunk.section_title or "",
+            "page_number": chunk.page_number,
+            "agencies": document_metadata.get("agencies", []),
+        }
+        for chunk, document in zip(
+            chunks, chunk_documents(chunks, embeddings), strict=True
+        )
+    ]
+
+
+def search_hit(document: Mapping[str, Any], score: float) -> dict[str, Any]:
+    """The result dict ``search()`` returns for one matching document."""
+    hit: dict[str, Any] = {
+        "id": document["id"],
+        "content": document["content"],
+        "document_id": document["document_id"],
+        "score": score,
+    }
+    # Include metadata fields when present (enhanced index)
+    for field in METADATA_FIELDS:
+        if document.get(field):
+            hit[field] = document[field]
+    return hit
+
+
+class SearchBackend(Protocol):
+    """The index and query operations the pipelines and chat rely on.
+
+    Implemented by :class:`SearchService` (Azure AI Search) and
+    :class:`~enrichment.services.local_search.LocalSearchService`.
+    """
+
+    def create_baseline_index(self, index_name: str) -> object: ...
+
+    def create_enhanced_index(self, index_name: str) -> object: ...
+
+    def index_chunks(
+        self, index_name: str, chunks: list[Chunk], embeddings: Embeddings
+    ) -> list[dict[str, Any]]: ...
+
+    def index_enhanced_chunks(
+        self,
+        index_name: str,
+        chunks: list[Chunk],
+        embeddings: Embeddings,
+        document_metadata: dict[str, Any],
+    ) -> list[dict[str, Any]]: ...
+
+    def get_chunk_positions(
+        self, index_name: str, document_id: str
+    ) -> dict[str, int]: ...
+
+    def update_chunk_positions(
+        self, index_name: str, positions: dict[str, int]
+    ) -> list[dict[str, Any]]: ...
+
+    def delete_chunks(
+        self, index_name: str, ids: list[str]
+    ) -> list[dict[str, Any]]: ...
+
+    def search(
+        self,
+        index_name: str,
+        query: str,
+        vector: Sequence[float] | NDArray[np.float32] | None = None,
+        top: int = 5,
+        filter: str | None = None,
+        select: Sequence[str] | None = None,
+    ) -> list[dict[str, Any]]: ...
+
+    def close(self) -> None: ...
+
+
 class SearchService:
     """Manages Azure AI Search indexes and document operations."""
 
@@ -77,123 +260,275 @@ class SearchService:
         self,
         endpoint: str,
         credential: TokenCredential | str,
+        dimensions: int = DEFAULT_VECTOR_DIMENSIONS,
+        compression: VectorCompression | None = None,
+        upload_concurrency: int = 4,
+        upload_retries: int = 3,
     ) -> None:
         cred = (
             AzureKeyCredential(credential)
             if isinstance(credential, str)
             else credential
         )
-        self._index_client = SearchIndexClient(endpoint=endpoint, credential=cred)
+        # One HTTP transport (connection pool) for the index client and every
+        # per-index SearchClient, so searches reuse warm connections.
+        self._transport = RequestsTransport()
+        self._index_client = SearchIndexClient(
+            endpoint=endpoint, credential=cred, transport=self._transport
+        )
         self._endpoint = endpoint
         self._credential = cred
+        self._clients: dict[str, SearchClient] = {}
+        self._clients_lock = threading.Lock()
+        self._upload_concurrency = max(1, upload_concurrency)
+        self._upload_retries = upload_retries
+        self.upload_stats = UploadStats()
+        self._stats_lock = threading.Lock()
+        # Must match the embedding deployment's output (its ``dimensions``)
+        self._dimensions = dimensions
+        self._compression = compression
 
-    def create_baseline_index(self, index_name: str) -> SearchIndex:
-        """Create or update the baseline RAG index."""
-        vector_search = VectorSearch(
+    def _fields(self, fields: list[SearchField]) -> list[SearchField]:
+        """*fields* with the vector field sized to this service's dimensions."""
+        return [
+            _vector_field(self._dimensions) if f.name == "content_vector" else f
+            for f in fields
+        ]
+
+    def _vector_search(self) -> VectorSearch:
+        """HNSW vector search, with quantized vectors if compression is set.
+
+        Scalar quantization stores int8 components (about 4x smaller) and
+        binary quantization one bit per component (about 32x smaller); the
+        full-precision vectors are kept to rescore the top candidates.
+        """
+        compressions = []
+        compression_name = None
+        if self._compression is not None:
+            compression_name = f"{self._compression}-quantization"
+            compression_cls = (
+                ScalarQuantizationCompression
+                if self._compression == "scalar"
+                else BinaryQuantizationCompression
+            )
+            compressions.append(
+                compression_cls(
+                    compression_name=compression_name,
+                    rescoring_options=RescoringOptions(enable_rescoring=True),
+                )
+            )
+        return VectorSearch(
             algorithms=[HnswAlgorithmConfiguration(name="default-hnsw")],
             profiles=[
                 VectorSearchProfile(
                     name="default-profile",
                     algorithm_configuration_name="default-hnsw",
+                    compression_name=compression_name,
                 )
             ],
+            compressions=compressions,
         )
+
+    def create_baseline_index(self, index_name: str) -> SearchIndex:
+        """Create or update the baseline RAG index."""
         index = SearchIndex(
             name=index_name,
-            fields=BASELINE_INDEX_FIELDS,
-            vector_search=vector_search,
+            fields=self._fields(BASELINE_INDEX_FIELDS),
+            vector_search=self._vector_search(),
         )
         return self._index_client.create_or_update_index(index)
 
     def create_enhanced_index(self, index_name: str) -> SearchIndex:
         """Create or update the enhanced RAG index with CU metadata fields."""
-        vector_search = VectorSearch(
-            algorithms=[HnswAlgorithmConfiguration(name="default-hnsw")],
-            profiles=[
-                VectorSearchProfile(
-                    name="default-profile",
-                    algorithm_configuration_name="default-hnsw",
-                )
-            ],
-        )
         index = SearchIndex(
             name=index_name,
-            fields=ENHANCED_INDEX_FIELDS,
-            vector_search=vector_search,
+            fields=self._fields(ENHANCED_INDEX_FIELDS),
+            vector_search=self._vector_search(),
         )
         return self._index_client.create_or_update_index(index)
 
     def get_search_client(self, index_name: str) -> SearchClient:
-        """Get a SearchClient for a specific index."""
-        return SearchClient(
-            endpoint=self._endpoint,
-            index_name=index_name,
-            credential=self._credential,
-        )
+        """Get the SearchClient for a specific index, created on first use."""
+        with self._clients_lock:
+            client = self._clients.get(index_name)
+            if client is None:
+                client = SearchClient(
+                    endpoint=self._endpoint,
+                    index_name=index_name,
+                    credential=self._credential,
+                    transport=self._transport,
+                )
+                self._clients[index_name] = client
+            return client
+
+    def close(self) -> None:
+        """Close the cached clients and their shared connection pool."""
+        with self._clients_lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+        self._index_client.close()
+        self._transport.close()
 
     def index_chunks(
         self,
         index_name: str,
         chunks: list[Chunk],
-        embeddings: list[list[float]],
+        embeddings: Embeddings,
     ) -> list[dict[str, Any]]:
         """Upload chunks with their embeddings to the search index."""
-        client = self.get_search_client(index_name)
-        documents = [
-            {
-                "id": chunk.id,
-                "content": chunk.content,
-                "document_id": chunk.document_id,
-                "chunk_index": chunk.chunk_index,
-                "content_vector": embedding,
-            }
-            for chunk, embedding in zip(chunks, embeddings, strict=True)
-        ]
-        result = client.upload_documents(documents)
-        return [{"key": r.key, "succeeded": r.succeeded} for r in result]
+        return self.upload_documents(index_name, chunk_documents(chunks, embeddings))
 
     def index_enhanced_chunks(
         self,
         index_name: str,
         chunks: list[Chunk],
-        embeddings: list[list[float]],
+        embeddings: Embeddings,
         document_metadata: dict[str, Any],
     ) -> list[dict[str, Any]]:
         """Upload chunks with embeddings and CU-extracted metadata."""
+        return self.upload_documents(
+            index_name,
+            enhanced_chunk_documents(chunks, embeddings, document_metadata),
+        )
+
+    def _split(
+        self, documents: list[dict[str, Any]], sizes: list[int]
+    ) -> Iterator[tuple[list[dict[str, Any]], list[int]]]:
+        """Group consecutive documents into requests within the service limits."""
+        start = 0
+        total = 0
+        for i, size in enumerate(sizes):
+            if i > start and (
+                i - start >= MAX_UPLOAD_DOCUMENTS or total + size > MAX_UPLOAD_BYTES
+            ):
+                yield documents[start:i], sizes[start:i]
+                start, total = i, 0
+            total += size
+        if documents:
+            yield documents[start:], sizes[start:]
+
+    def _upload_batch(
+        self, client: SearchClient, batch: list[dict[str, Any]], sizes: list[int]
+    ) -> dict[str, dict[str, Any]]:
+        """Upload one request, retrying documents that failed transiently."""
+        results: dict[str, dict[str, Any]] = {}
+        size_of = {doc["id"]: size for doc, size in zip(batch, sizes, strict=True)}
+        pending = batch
+        for attempt in range(self._upload_retries + 1):
+            start = time.perf_counter()
+            response = client.upload_documents(pending)
+            elapsed = time.perf_counter() - start
+            nbytes = sum(size_of[doc["id"]] for doc in pending)
+            logger.debug(
+                "Uploaded %d documents (%.1f KB) in %.2fs: %.0f docs/s",
+                len(pending),
+                nbytes / 1024,
+                elapsed,
+                len(pending) / elapsed if elapsed else 0.0,
+            )
+            retry = []
+            for r in response:
+                key = r.key or ""
+                results[key] = {"key": key, "succeeded": r.succeeded}
+                if not r.succeeded and r.status_code in _RETRYABLE_STATUS:
+                    retry.append(key)
+            with self._stats_lock:
+                self.upload_stats.batches += 1
+                self.upload_stats.documents += len(pending)
+                self.upload_stats.bytes += nbytes
+                self.upload_stats.seconds += elapsed
+            if not retry or attempt == self._upload_retries:
+                break
+            with self._stats_lock:
+                self.upload_stats.retried += len(retry)
+            time.sleep(_RETRY_DELAY * 2**attempt)
+            keys = set(retry)
+            pending = [doc for doc in pending if doc["id"] in keys]
+        failed = sum(1 for r in results.values() if not r["succeeded"])
+        if failed:
+            with self._stats_lock:
+                self.upload_stats.failed += failed
+        return results
+
+    def upload_documents(
+        self, index_name: str, documents: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Bulk-upload *documents*, split to fit the service's request limits.
+
+        Requests hold at most ``MAX_UPLOAD_DOCUMENTS`` documents and
+        ``MAX_UPLOAD_BYTES`` of JSON; up to ``upload_concurrency`` of them
+        are sent at once. Documents rejected with a transient status (409,
+        422, 429, 503) are retried on their own with backoff. Returns one
+        ``{"key", "succeeded"}`` entry per document; totals accumulate in
+        :attr:`upload_stats`.
+        """
         client = self.get_search_client(index_name)
-        documents = [
-            {
-                "id": chunk.id,
-                "content": chunk.content,
-                "document_id": chunk.document_id,
-                "chunk_index": chunk.chunk_index,
-                "content_vector": embedding,
-                "report_title": document_metadata.get("reportTitle", ""),
-                "report_number": document_metadata.get("reportNumber", ""),
-                "topic_category": document_metadata.get("topicCategory", ""),
-                "executive_summary": document_metadata.get("executiveSummary", ""),
-                "section_title": chunk.section_title or "",
-                "agencies": document_metadata.get("agencies", []),
-            }
-            for chunk, embedding in zip(chunks, embeddings, strict=True)
-        ]
-        result = client.upload_documents(documents)
+        batches = list(self._split(documents, [_json_size(d) for d in documents]))
+        if len(batches) <= 1 or self._upload_concurrency <= 1:
+            parts = [self._upload_batch(client, *batch) for batch in batches]
+        else:
+            workers = min(self._upload_concurrency, len(batches))
+            with ThreadPoolExecutor(workers, thread_name_prefix="upload") as pool:
+                parts = list(
+                    pool.map(lambda batch: self._upload_batch(client, *batch), batches)
+                )
+        return [result for part in parts for result in part.values()]
+
+    def get_chunk_positions(self, index_name: str, document_id: str) -> dict[str, int]:
+        """Map the IDs of a document's indexed chunks to their ``chunk_index``."""
+        client = self.get_search_client(index_name)
+        escaped = document_id.replace("'", "''")
+        results = client.search(
+            search_text="*",
+            filter=f"document_id eq '{escaped}'",
+            select=["id", "chunk_index"],
+        )
+        return {r["id"]: r["chunk_index"] for r in results}
+
+    def update_chunk_positions(
+        self, index_name: str, positions: dict[str, int]
+    ) -> list[dict[str, Any]]:
+        """Set ``chunk_index`` on existing chunks without re-uploading them."""
+        if not positions:
+            return []
+        client = self.get_search_client(index_name)
+        result = client.merge_documents(
+            [{"id": key, "chunk_index": idx} for key, idx in positions.items()]
+        )
+        return [{"key": r.key, "succeeded": r.succeeded} for r in result]
+
+    def delete_chunks(self, index_name: str, ids: list[str]) -> list[dict[str, Any]]:
+        """Remove chunks from the index by ID."""
+        if not ids:
+            return []
+        client = self.get_search_client(index_name)
+        result = client.delete_documents([{"id": key} for key in ids])
         return [{"key": r.key, "succeeded": r.succeeded} for r in result]
 
     def search(
         self,
         index_name: str,
         query: str,
-        vector: list[float] | None = None,
+        vector: Sequence[float] | NDArray[np.float32] | None = None,
         top: int = 5,
+        filter: str | None = None,
+        select: Sequence[str] | None = None,
     ) -> list[dict[str, Any]]:
-        """Hybrid search: keyword + vector if vector provided."""
+        """Hybrid search: keyword + vector if vector provided.
+
+        ``filter`` is an OData expression, e.g. ``"page_number le 5"`` on
+        the enhanced index. ``select`` limits the fields the service
+        returns (``BASELINE_SELECT`` / ``ENHANCED_SELECT`` match the two
+        schemas); by default every retrievable field is sent back.
+        """
         client = self.get_search_client(index_name)
         vector_queries: list[VectorizedQuery] | None = None
-        if vector:
+        if vector is not None and len(vector):
             vector_queries = [
                 VectorizedQuery(
-                    vector=vector,
+                    vector=_as_list(vector),
                     k_nearest_neighbors=top,
                     fields="content_vector",
                 )
@@ -202,28 +537,10 @@ class SearchService:
             search_text=query,
             vector_queries=vector_queries,  # type: ignore[arg-type]  # VectorizedQuery is a VectorQuery subclass
             top=top,
+            filter=filter,
+            select=list(select) if select is not None else None,
         )
-        hits = []
-        for r in results:
-            hit: dict[str, Any] = {
-                "id": r["id"],
-                "content": r["content"],
-                "document_id": r["document_id"],
-                "score": r["@search.score"],
-            }
-            # Include metadata fields when present (enhanced index)
-            for field in (
-                "report_title",
-                "report_number",
-                "topic_category",
-                "executive_summary",
-                "agencies",
-                "section_title",
-            ):
-                if field in r and r[field]:
-                    hit[field] = r[field]
-            hits.append(hit)
-        return hits
+        return [search_hit(r, r["@search.score"]) for r in results]
 
     def delete_index(self, index_name: str) -> None:
         """Delete an index."""
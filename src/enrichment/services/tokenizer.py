@@ -0,0 +1,66 @@
+"""Token counting for chunk sizing and request budgeting."""
+
+from __future__ import annotations
+
+import logging
+import math
+from functools import lru_cache
+from typing import Protocol
+
+logger = logging.getLogger(__name__)
+
+# English prose averages roughly four characters per token for the
+# cl100k/o200k encodings used by text-embedding-3 and gpt-4o.
+CHARS_PER_TOKEN = 4.0
+
+DEFAULT_ENCODING = "cl100k_base"
+
+
+class Encoding(Protocol):
+    """The subset of ``tiktoken.Encoding`` used here."""
+
+    def encode_ordinary(self, text: str) -> list[int]: ...
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model: str = "text-embedding-3-small") -> Encoding | None:
+    """Return the process-wide tiktoken encoding for *model*.
+
+    tiktoken is the optional ``tokens`` extra (``uv sync --extra tokens``):
+    when it is not installed, or its BPE files cannot be loaded (e.g. no
+    network on first use), a warning is logged, ``None`` is returned and
+    callers fall back to :func:`estimate_tokens`. The result is cached per
+    model, so the encoding is loaded at most once per process.
+    """
+    try:
+        import tiktoken  # type: ignore[import-not-found]  # optional dependency
+    except ImportError:
+        logger.warning(
+            "tiktoken not installed (uv sync --extra tokens); "
+            "token counts for %s are estimates",
+            model,
+        )
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        logger.warning(
+            "Could not load tiktoken encoding for %s; using estimates", model
+        )
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of *text* in O(1)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_tokens(text: str, model: str = "text-embedding-3-small") -> int:
+    """Count tokens in *text*, exactly when tiktoken is available."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode_ordinary(text))
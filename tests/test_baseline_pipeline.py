@@ -95,3 +95,221 @@ def test_process_document_default_analyzer(pipeline):
 
     call_kwargs = pipeline.cu.analyze_document.call_args[1]
     assert call_kwargs["analyzer_id"] == "prebuilt-documentSearch"
+
+
+def test_process_document_streams_batches(pipeline, monkeypatch):
+    """Chunks are embedded and indexed in windows as they are produced."""
+    monkeypatch.setattr("enrichment.pipeline.indexing.STREAM_BATCH_SIZE", 2)
+    pipeline.cu.result_to_dict.return_value = {
+        "contents": [{"markdown": "\n\n".join(["Paragraph text."] * 5)}],
+    }
+    pipeline.embedding.embed.side_effect = lambda texts: [[0.1]] * len(texts)
+    pipeline.search.index_chunks.side_effect = lambda _idx, chunks, _emb: [
+        {"key": c.id, "succeeded": True} for c in chunks
+    ]
+
+    result = pipeline.process_document(
+        document_url="https://example.com/doc.pdf",
+        document_id="doc",
+        chunk_size=20,
+        chunk_overlap=0,
+    )
+
+    assert result["chunks"] == 5
+    assert result["indexed"] == 5
+    assert pipeline.embedding.embed.call_count == 3
+    assert pipeline.search.index_chunks.call_count == 3
+
+
+def test_process_document_token_budget(pipeline, monkeypatch):
+    """process_document forwards the size unit to the chunker."""
+    captured = {}
+
+    def fake_iter_chunks(**kwargs):
+        captured.update(kwargs)
+        return iter([])
+
+    monkeypatch.setattr("enrichment.pipeline.baseline.iter_chunks", fake_iter_chunks)
+    pipeline.cu.result_to_dict.return_value = {"contents": [{"markdown": "Text."}]}
+
+    result = pipeline.process_document(
+        document_url="https://example.com/doc.pdf",
+        document_id="doc",
+        chunk_size=256,
+        size_unit="tokens",
+    )
+
+    assert captured["size_unit"] == "tokens"
+    assert captured["chunk_size"] == 256
+    assert result["chunks"] == 0
+
+
+def test_process_document_incremental(pipeline):
+    """Incremental runs embed only new chunks and drop stale ones."""
+    text = "\n\n".join(f"Paragraph number {i}." for i in range(3))
+    pipeline.cu.result_to_dict.return_value = {"contents": [{"markdown": text}]}
+    pipeline.embedding.embed.side_effect = lambda texts: [[0.1]] * len(texts)
+    pipeline.search.index_chunks.side_effect = lambda _idx, chunks, _emb: [
+        {"key": c.id, "succeeded": True} for c in chunks
+    ]
+    pipeline.search.delete_chunks.side_effect = lambda _idx, ids: [
+        {"key": i, "succeeded": True} for i in ids
+    ]
+    first = pipeline.process_document(
+        document_url="https://example.com/doc.pdf",
+        document_id="doc",
+        chunk_size=25,
+        strategy="content_defined",
+    )
+    indexed = pipeline.search.index_chunks.call_args[0][1]
+    assert first["indexed"] == 3
+
+    # Previously indexed chunks are found again, shifted by one position
+    pipeline.search.get_chunk_positions.return_value = {
+        c.id: c.chunk_index + 1 for c in indexed[1:]
+    } | {"doc-stale": 7}
+    pipeline.embedding.embed.reset_mock()
+
+    result = pipeline.process_document(
+        document_url="https://example.com/doc.pdf",
+        document_id="doc",
+        chunk_size=25,
+        strategy="content_defined",
+        incremental=True,
+    )
+
+    assert result["chunks"] == 3
+    assert result["unchanged"] == 2
+    assert result["indexed"] == 1
+    assert result["deleted"] == 1
+    pipeline.embedding.embed.assert_called_once_with(["Paragraph number 0."])
+    pipeline.search.update_chunk_positions.assert_called_once_with(
+        "test-baseline", {c.id: c.chunk_index for c in indexed[1:]}
+    )
+    pipeline.search.delete_chunks.assert_called_once_with(
+        "test-baseline", ["doc-stale"]
+    )
+
+
+def test_process_document_dedup(pipeline):
+    """A deduplicator skips embedding and, optionally, indexing repeats."""
+    from enrichment.services.dedup import ChunkDeduplicator
+
+    pipeline.deduplicator = ChunkDeduplicator(drop_duplicates=True)
+    text = "\n\n".join(["Boilerplate contact page."] * 3 + ["Unique finding."])
+    pipeline.cu.result_to_dict.return_value = {"contents": [{"markdown": text}]}
+    pipeline.embedding.embed.side_effect = lambda texts: [[0.1]] * len(texts)
+    pipeline.search.index_chunks.side_effect = lambda _idx, chunks, _emb: [
+        {"key": c.id, "succeeded": True} for c in chunks
+    ]
+
+    result = pipeline.process_document(
+        document_url="https://example.com/doc.pdf",
+        document_id="doc",
+        chunk_size=30,
+        chunk_overlap=0,
+    )
+
+    assert result["chunks"] == 4
+    assert result["duplicates"] == 2
+    assert result["indexed"] == 2
+    pipeline.embedding.embed.assert_called_once_with(
+        ["Boilerplate contact page.", "Unique finding."]
+    )
+
+
+def test_process_document_strips_boilerplate(pipeline):
+    """A boilerplate index cleans extracted text before chunking."""
+    from enrichment.services.normalization import BoilerplateIndex
+
+    pipeline.boilerplate = BoilerplateIndex()
+    pipeline.cu.result_to_dict.return_value = {
+        "contents": [{"markdown": '<!-- PageNumber="1" -->\n\nReal content.\n\n7'}]
+    }
+    pipeline.embedding.embed.side_effect = lambda texts: [[0.1]] * len(texts)
+    pipeline.search.index_chunks.return_value = []
+
+    result = pipeline.process_document(
+        document_url="https://example.com/doc.pdf", document_id="doc"
+    )
+
+    assert result["chunks"] == 1
+    pipeline.embedding.embed.assert_called_once_with(["Real content."])
+    assert pipeline.boilerplate.documents == 1
+
+
+def test_incremental_requires_content_defined_chunks(pipeline):
+    """Positional chunk IDs can't tell an edited chunk from an unchanged one."""
+    with pytest.raises(ValueError, match="content_defined"):
+        pipeline.process_document(
+            document_url="https://example.com/doc.pdf",
+            document_id="doc",
+            incremental=True,
+        )
+    with pytest.raises(ValueError, match="content_defined"):
+        pipeline.process_corpus(
+            [("doc", "https://example.com/doc.pdf")], incremental=True
+        )
+    pipeline.cu.analyze_document.assert_not_called()
+
+
+def test_process_corpus(pipeline):
+    """process_corpus extracts, chunks and indexes each document in order."""
+    texts = {
+        "https://example.com/a.pdf": "Alpha text.",
+        "https://example.com/b.pdf": "",
+        "https://example.com/c.pdf": "Gamma text.\n\nMore gamma.",
+    }
+    pipeline.cu.analyze_document.side_effect = lambda document_url, **_: document_url
+    pipeline.cu.result_to_dict.side_effect = lambda url: {
+        "contents": [{"markdown": texts[url]}]
+    }
+    pipeline.embedding.embed.side_effect = lambda batch: [[0.1]] * len(batch)
+    pipeline.search.index_chunks.side_effect = lambda _index, chunks, _emb: [
+        {"key": c.id, "succeeded": True} for c in chunks
+    ]
+
+    results = pipeline.process_corpus(
+        [(doc_id, url) for doc_id, url in zip("abc", texts, strict=True)],
+        max_workers=1,
+    )
+
+    assert [r["document_id"] for r in results] == ["a", "b", "c"]
+    assert [r["chunks"] for r in results] == [1, 0, 1]
+    assert [r["indexed"] for r in results] == [1, 0, 1]
+    assert pipeline.cu.analyze_document.call_count == 3
+
+
+def test_process_corpus_isolates_failures(pipeline):
+    """A document that fails to extract or index doesn't stop the others."""
+
+    def analyze(document_url, **_):
+        if document_url.endswith("b.pdf"):
+            raise RuntimeError("CU analysis failed")
+        return document_url
+
+    def index(_index, chunks, _emb):
+        if chunks[0].document_id == "c":
+            raise RuntimeError("upload failed")
+        return [{"key": c.id, "succeeded": True} for c in chunks]
+
+    pipeline.cu.analyze_document.side_effect = analyze
+    pipeline.cu.result_to_dict.side_effect = lambda url: {
+        "contents": [{"markdown": f"Text of {url}."}]
+    }
+    pipeline.embedding.embed.side_effect = lambda batch: [[0.1]] * len(batch)
+    pipeline.search.index_chunks.side_effect = index
+
+    results = pipeline.process_corpus(
+        [(doc_id, f"https://example.com/{doc_id}.pdf") for doc_id in "abcd"],
+        max_workers=1,
+    )
+
+    assert [r["document_id"] for r in results] == ["a", "b", "c", "d"]
+    assert [r["indexed"] for r in results] == [1, 0, 0, 1]
+    assert [r.get("error") for r in results] == [
+        None,
+        "CU analysis failed",
+        "upload failed",
+        None,
+    ]
@@ -0,0 +1,60 @@
+"""Tests for coalescing concurrent query embeddings."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from enrichment.services.batching import EmbeddingBatcher
+
+
+def _embedding(side_effect=None):
+    embedding = MagicMock()
+    embedding.embed.side_effect = side_effect or (
+        lambda texts: [[float(len(t))] for t in texts]
+    )
+    return embedding
+
+
+def test_concurrent_queries_share_one_request():
+    """Queries arriving within the wait window are embedded together."""
+    embedding = _embedding()
+    batcher = EmbeddingBatcher(embedding, max_wait_ms=500, max_batch=4)
+    texts = ["a", "bb", "ccc", "bb"]
+    start = threading.Barrier(len(texts))
+
+    def query(text):
+        start.wait()
+        return batcher.embed_single(text)
+
+    with ThreadPoolExecutor(len(texts)) as pool:
+        results = list(pool.map(query, texts))
+    batcher.close()
+
+    assert results == [[1.0], [2.0], [3.0], [2.0]]
+    embedding.embed.assert_called_once()
+    assert sorted(embedding.embed.call_args[0][0]) == ["a", "bb", "ccc"]
+    assert batcher.batches == 1
+
+
+def test_lone_query_waits_at_most_the_window():
+    """A single query is sent once the wait window passes."""
+    embedding = _embedding()
+    batcher = EmbeddingBatcher(embedding, max_wait_ms=1)
+    assert batcher.embed_single("abcd") == [4.0]
+    assert batcher.embed_single("ab") == [2.0]
+    batcher.close()
+    assert embedding.embed.call_count == 2
+
+
+def test_errors_reach_every_caller():
+    """A failed request raises in each waiting caller; the batcher keeps going."""
+    embedding = _embedding(side_effect=[RuntimeError("boom"), [[1.0]]])
+    batcher = EmbeddingBatcher(embedding, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="boom"):
+        batcher.embed_single("x")
+    assert batcher.embed_single("y") == [1.0]
+    batcher.close()
@@ -10,7 +10,9 @@ from enrichment.services.chat import (
     SYSTEM_PROMPT_BASELINE,
     SYSTEM_PROMPT_ENHANCED,
     ChatService,
+    QueryEmbeddingCache,
 )
+from enrichment.services.search import BASELINE_SELECT, ENHANCED_SELECT
 
 
 @pytest.fixture
@@ -145,7 +147,14 @@ def test_chat_enhanced_includes_metadata_in_context(chat_service):
             "topic_category": "Cybersecurity",
             "agencies": ["DHS", "DOD"],
             "executive_summary": "A review of federal cyber posture.",
-        }
+        },
+        {
+            "id": "c2",
+            "content": "more on cyber threats",
+            "document_id": "d1",
+            "score": 0.9,
+            "executive_summary": "A review of federal cyber posture.",
+        },
     ]
     mock_choice = MagicMock()
     mock_choice.message.content = "Answer"
@@ -161,8 +170,75 @@ def test_chat_enhanced_includes_metadata_in_context(chat_service):
     assert "Federal Cybersecurity Report" in user_msg
     assert "GAO-24-106583" in user_msg
     assert "DHS" in user_msg
-    assert "A review of federal cyber posture" in user_msg
+    assert user_msg.count("A review of federal cyber posture") == 1
 
     # Verify citations include metadata
     assert result["citations"][0]["report_title"] == "Federal Cybersecurity Report"
     assert result["citations"][0]["report_number"] == "GAO-24-106583"
+    assert result["metadata"]["has_executive_summary"]
+
+
+def test_chat_reuses_cached_query_embedding(chat_service):
+    """A repeated question, modulo case and spacing, is embedded once."""
+    chat_service.embedding.embed_single.return_value = [0.1] * 1536
+    chat_service.search.search.return_value = []
+
+    chat_service.chat("What did GAO find?", "test-index")
+    chat_service.chat("  what did gao   FIND? ", "test-index")
+
+    chat_service.embedding.embed_single.assert_called_once_with("What did GAO find?")
+    assert chat_service.search.search.call_args[1]["vector"] == [0.1] * 1536
+    assert (chat_service.query_cache.hits, chat_service.query_cache.misses) == (1, 1)
+
+
+def test_query_cache_evicts_least_recently_used():
+    """Past max_entries the entry read or written longest ago is dropped."""
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+    assert len(cache) == 2
+
+
+def test_query_cache_expires_entries(monkeypatch):
+    """Entries older than ttl_seconds count as misses and are dropped."""
+    now = [100.0]
+    monkeypatch.setattr("enrichment.services.chat.time.monotonic", lambda: now[0])
+    cache = QueryEmbeddingCache(ttl_seconds=60)
+    cache.put("q", [1.0])
+
+    now[0] += 59
+    assert cache.get("q") == [1.0]
+    now[0] += 2
+    assert cache.get("q") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_chat_embeds_through_batcher(chat_service):
+    """With a batcher, query embeddings go through it instead of the service."""
+    chat_service.batcher = MagicMock()
+    chat_service.batcher.embed_single.return_value = [0.2] * 1536
+    chat_service.search.search.return_value = []
+
+    chat_service.chat("batched question", "test-index")
+
+    chat_service.batcher.embed_single.assert_called_once_with("batched question")
+    chat_service.embedding.embed_single.assert_not_called()
+
+
+def test_chat_selects_fields_per_index(chat_service):
+    """Baseline retrieves only core fields; enhanced adds the CU metadata."""
+    chat_service.embedding.embed_single.return_value = [0.1] * 1536
+    chat_service.search.search.return_value = []
+
+    chat_service.chat_baseline("question", "baseline-index")
+    assert chat_service.search.search.call_args[1]["select"] == BASELINE_SELECT
+
+    chat_service.chat_enhanced("question", "enhanced-index")
+    assert chat_service.search.search.call_args[1]["select"] == ENHANCED_SELECT
@@ -1,6 +1,12 @@
 """Tests for the chunking service."""
 
-from enrichment.services.chunking import Chunk, chunk_text
+from collections.abc import Iterator
+
+import pytest
+
+from enrichment.services import tokenizer
+from enrichment.services.chunking import Chunk, chunk_text, iter_chunks
+from enrichment.services.tokenizer import estimate_tokens
 
 
 def test_chunk_text_basic():
@@ -53,6 +59,33 @@ def test_oversized_paragraph():
         assert len(chunk.content) <= 100
 
 
+def test_oversized_paragraph_splits_at_sentences():
+    """Long paragraphs are cut at sentence ends, not mid-word."""
+    sentence = "The U.S. agency agreed with Pub. L. No. 113-283 findings."
+    text = " ".join([sentence] * 10)
+    chunks = chunk_text(text, document_id="doc", chunk_size=130, chunk_overlap=0)
+    assert [c.content for c in chunks] == [f"{sentence} {sentence}"] * 5
+
+
+def test_long_sentence_splits_at_clauses():
+    """A sentence with no sentence break falls back to clause ends."""
+    text = "; ".join(["alpha beta gamma delta"] * 12) + "."
+    chunks = chunk_text(text, document_id="doc", chunk_size=100, chunk_overlap=0)
+    assert len(chunks) == 3
+    for chunk in chunks:
+        assert len(chunk.content) <= 100
+        assert chunk.content.startswith("alpha")
+        assert chunk.content.endswith((";", "."))
+
+
+def test_sentences_fill_pending_chunk():
+    """Sentences of a long paragraph join the chunk before it."""
+    text = "Short intro.\n\n" + " ".join(["Sentence number one here."] * 8)
+    chunks = chunk_text(text, document_id="doc", chunk_size=100, chunk_overlap=0)
+    assert chunks[0].content.startswith("Short intro.\n\nSentence number one here.")
+    assert all(len(c.content) <= 100 for c in chunks)
+
+
 def test_chunk_content_preserved():
     """All content should be represented across chunks."""
     text = "Hello world.\n\nThis is a test.\n\nFinal paragraph."
@@ -70,3 +103,222 @@ def test_chunk_metadata_defaults():
     assert chunks[0].page_number is None
     assert chunks[0].section_title is None
     assert chunks[0].metadata is None
+
+
+def test_iter_chunks_is_lazy():
+    """iter_chunks yields chunks before the whole text is processed."""
+    text = "\n\n".join(f"Paragraph {i} " + "x" * 40 for i in range(1000))
+    gen = iter_chunks(text, document_id="doc", chunk_size=100, chunk_overlap=0)
+    assert isinstance(gen, Iterator)
+    first = next(gen)
+    assert first.id == "doc-0000"
+    assert first.content.startswith("Paragraph 0")
+
+
+def test_chunk_text_matches_iter_chunks():
+    """chunk_text is a thin wrapper over iter_chunks."""
+    text = "Alpha beta.\n\n" * 30 + "Y" * 450 + "\n\nTail paragraph."
+    expected = list(iter_chunks(text, "doc", chunk_size=120, chunk_overlap=30))
+    assert chunk_text(text, "doc", chunk_size=120, chunk_overlap=30) == expected
+
+
+def test_chunk_content_is_stripped_slice_of_text():
+    """Every chunk is a contiguous, stripped slice of the source text."""
+    text = "  First para.  \n\n\n\nSecond para.\n\n   Third para.   "
+    chunks = chunk_text(text, document_id="doc", chunk_size=30, chunk_overlap=5)
+    for chunk in chunks:
+        assert chunk.content == chunk.content.strip()
+        assert chunk.content in text
+
+
+def test_no_overlap_only_chunk_before_oversized_paragraph():
+    """The overlap tail is not re-emitted as its own chunk."""
+    text = "A" * 60 + "\n\n" + "B" * 300
+    chunks = chunk_text(text, document_id="doc", chunk_size=100, chunk_overlap=20)
+    assert chunks[0].content == "A" * 60
+    assert all("A" not in c.content for c in chunks[1:])
+
+
+def test_chunks_reference_shared_source():
+    """Chunks store offsets into the source text instead of copies."""
+    text = "First paragraph.\n\nSecond paragraph.\n\nThird paragraph."
+    chunks = chunk_text(text, document_id="doc", chunk_size=20, chunk_overlap=0)
+    assert len(chunks) == 3
+    for chunk in chunks:
+        start, end = chunk.span
+        assert chunk.content == text[start:end]
+        assert len(chunk) == end - start
+        assert not hasattr(chunk, "__dict__")
+
+
+def test_chunk_from_content():
+    """A chunk built from content spans the whole string."""
+    chunk = Chunk(id="c", content="hello", document_id="d", chunk_index=0)
+    assert chunk.span == (0, 5)
+    assert chunk.content == "hello"
+    chunk.content = "bye"
+    assert chunk.span == (0, 3)
+    assert chunk == Chunk(id="c", content="bye", document_id="d", chunk_index=0)
+
+
+def test_chunk_requires_content_or_source():
+    """A chunk without text is rejected."""
+    with pytest.raises(ValueError, match="content or a source"):
+        Chunk(id="c", document_id="d", chunk_index=0)
+
+
+def test_token_budget_chunking(monkeypatch):
+    """Token mode sizes chunks by token count rather than characters."""
+    monkeypatch.setattr(tokenizer, "get_encoding", lambda _model: None)
+    text = "\n\n".join("word " * 20 for _ in range(20))  # ~25 tokens each
+    chunks = chunk_text(
+        text, document_id="doc", chunk_size=60, chunk_overlap=0, size_unit="tokens"
+    )
+    assert len(chunks) == 10
+    for chunk in chunks:
+        assert estimate_tokens(chunk.content) <= 60
+
+
+def test_token_budget_splits_oversized_paragraph(monkeypatch):
+    """Oversized paragraphs are windowed to the token budget."""
+    monkeypatch.setattr(tokenizer, "get_encoding", lambda _model: None)
+    text = "abcd" * 500  # 500 estimated tokens
+    chunks = chunk_text(
+        text, document_id="doc", chunk_size=100, chunk_overlap=10, size_unit="tokens"
+    )
+    assert len(chunks) >= 5
+    assert all(estimate_tokens(c.content) <= 100 for c in chunks)
+
+
+MARKDOWN_DOC = """# Report Title
+
+Intro paragraph about the report.
+
+## What GAO Found
+
+Finding one is described here.
+
+Finding two is described here.
+
+<!-- PageBreak -->
+
+<!-- PageHeader="GAO-24-999" -->
+
+## Recommendations
+
+<table>
+<tr><td>Agency</td><td>Recommendation</td></tr>
+
+<tr><td>DHS</td><td>Improve monitoring</td></tr>
+</table>
+
+| Agency | Status |
+| --- | --- |
+| DOD | Open |
+"""
+
+
+def test_markdown_chunks_follow_sections():
+    """Markdown chunks never span sections and carry section titles."""
+    chunks = chunk_text(
+        MARKDOWN_DOC, document_id="doc", chunk_size=200, strategy="markdown"
+    )
+    titles = [c.section_title for c in chunks]
+    assert titles == ["Report Title", "What GAO Found", "Recommendations"]
+    assert chunks[1].content.startswith("## What GAO Found")
+    assert "Finding two" in chunks[1].content
+    assert "Recommendations" not in chunks[1].content
+
+
+def test_markdown_chunks_track_pages():
+    """Page-break markers advance the page number."""
+    chunks = chunk_text(
+        MARKDOWN_DOC, document_id="doc", chunk_size=200, strategy="markdown"
+    )
+    assert [c.page_number for c in chunks] == [1, 1, 2]
+
+
+def test_markdown_keeps_tables_intact():
+    """Tables are never split, even when larger than chunk_size."""
+    chunks = chunk_text(
+        MARKDOWN_DOC,
+        document_id="doc",
+        chunk_size=60,
+        chunk_overlap=10,
+        strategy="markdown",
+    )
+    html = [c for c in chunks if "<table>" in c.content]
+    assert len(html) == 1
+    assert html[0].content.startswith("<table>")
+    assert html[0].content.endswith("</table>")
+    pipe = [c for c in chunks if "| Agency |" in c.content]
+    assert len(pipe) == 1
+    assert pipe[0].content.endswith("| DOD | Open |")
+    assert all(c.section_title == "Recommendations" for c in html + pipe)
+
+
+def test_markdown_skips_standalone_comments():
+    """Page header comments do not start chunks of their own."""
+    chunks = chunk_text(
+        MARKDOWN_DOC, document_id="doc", chunk_size=1000, strategy="markdown"
+    )
+    assert not any(c.content.startswith("<!--") for c in chunks)
+
+
+def test_markdown_chunks_exclude_page_comments():
+    """Comments between two paragraphs end up in neither chunk."""
+    text = (
+        'Para one.\n\n<!-- PageFooter="GAO-24-999" -->\n\n'
+        '<!-- PageNumber="3" -->\n\n<!-- PageBreak -->\n\n'
+        '<!-- PageHeader="GAO-24-999" -->\n\nPara two.'
+    )
+    for source in (text, MARKDOWN_DOC):
+        chunks = chunk_text(
+            source, "doc", chunk_size=1000, chunk_overlap=200, strategy="markdown"
+        )
+        assert not any("<!--" in c.content for c in chunks)
+    chunks = chunk_text(text, "doc", chunk_size=1000, strategy="markdown")
+    assert [(c.content, c.page_number) for c in chunks] == [
+        ("Para one.", 1),
+        ("Para two.", 2),
+    ]
+
+
+def test_markdown_unclosed_table():
+    """An unterminated table runs to the end of the text."""
+    text = "Intro.\n\n<table>\n<tr><td>x</td></tr>"
+    chunks = chunk_text(text, document_id="doc", chunk_size=10, strategy="markdown")
+    assert chunks[-1].content == "<table>\n<tr><td>x</td></tr>"
+
+
+def _paragraphs(count: int) -> list[str]:
+    return [
+        f"Paragraph {i}: " + "lorem ipsum dolor " * (i % 7 + 1) for i in range(count)
+    ]
+
+
+def test_content_defined_ids_survive_insertion():
+    """Inserting a paragraph only changes the IDs of nearby chunks."""
+    paras = _paragraphs(200)
+    before = chunk_text(
+        "\n\n".join(paras), "doc", chunk_size=400, strategy="content_defined"
+    )
+    paras.insert(5, "A brand new paragraph inserted near the top.")
+    after = chunk_text(
+        "\n\n".join(paras), "doc", chunk_size=400, strategy="content_defined"
+    )
+    changed = {c.id for c in after} - {c.id for c in before}
+    assert len(before) > 20
+    assert 1 <= len(changed) <= 3
+    assert all(len(c.content) <= 400 for c in after)
+
+
+def test_content_defined_ids_are_content_hashes():
+    """Identical chunk text gets distinct, deterministic IDs."""
+    text = "Same text.\n\nSame text."
+    chunks = chunk_text(text, "doc", chunk_size=12, strategy="content_defined")
+    assert len(chunks) == 2
+    assert chunks[1].id == f"{chunks[0].id}-1"
+    again = chunk_text(text, "doc", chunk_size=12, strategy="content_defined")
+    assert [c.id for c in again] == [c.id for c in chunks]
+    assert [c.chunk_index for c in chunks] == [0, 1]
@@ -15,6 +15,19 @@ def test_settings_defaults():
     assert settings.storage_container_corpus == "corpus"
     assert settings.storage_container_results == "cu-results"
     assert settings.foundry_model_deployment_name == "gpt-4o"
+    assert settings.embedding_max_batch_tokens == 250_000
+    assert settings.embedding_max_batch_items == 2048
+    assert settings.embedding_max_concurrency == 4
+    assert settings.embedding_cache_path == ""
+    assert settings.embedding_dimensions is None
+    assert settings.embedding_backend == "azure"
+    assert settings.search_vector_compression == ""
+    assert settings.search_upload_concurrency == 4
+    assert settings.search_backend == "azure"
+    assert settings.local_search_algorithm == "hnsw"
+    assert settings.openai_adaptive_concurrency is True
+    assert settings.query_cache_size == 256
+    assert settings.query_batch_wait_ms == 5.0
 
 
 def test_settings_from_env(monkeypatch):
@@ -0,0 +1,147 @@
+"""Tests for parallel corpus chunking."""
+
+from __future__ import annotations
+
+import pickle
+
+from enrichment.pipeline import corpus as corpus_module
+from enrichment.pipeline.corpus import chunk_corpus
+from enrichment.services.chunking import chunk_text
+from enrichment.services.normalization import BoilerplateIndex
+
+FOOTER = "For more information, contact GAO's Office of Public Affairs."
+AGENCIES = ["DHS", "DOD", "OMB", "CISA"]
+TOPICS = ["patching", "logging", "training", "encryption", "audits", "access"]
+
+
+def _corpus() -> list[tuple[str, str]]:
+    return [
+        (
+            f"doc{i}",
+            f"# {agency} Report\n\n"
+            + "\n\n".join(f"{agency} lags on {topic}. " * 5 for topic in TOPICS)
+            + f"\n\n<!-- PageBreak -->\n\n## Appendix\n\n{FOOTER}",
+        )
+        for i, agency in enumerate(AGENCIES)
+    ]
+
+
+def test_chunk_corpus_matches_chunk_text():
+    """Worker processes return the same chunks as chunking in-process."""
+    corpus = _corpus()
+    docs = list(
+        chunk_corpus(corpus, chunk_size=200, chunk_overlap=40, strategy="markdown")
+    )
+
+    assert [d.document_id for d in docs] == [doc_id for doc_id, _ in corpus]
+    for doc, (doc_id, text) in zip(docs, corpus, strict=True):
+        expected = chunk_text(
+            text, doc_id, chunk_size=200, chunk_overlap=40, strategy="markdown"
+        )
+        assert doc.chunks == expected
+        assert doc.chunks[-1].page_number == 2
+        assert doc.chunks[-1].section_title == "Appendix"
+        assert all(c.content for c in doc.chunks)
+
+
+def test_chunk_corpus_inline_matches_pool():
+    """max_workers=1 runs in-process with identical output."""
+    corpus = _corpus()
+    inline = list(chunk_corpus(corpus, chunk_size=200, max_workers=1))
+    pooled = list(chunk_corpus(corpus, chunk_size=200, max_workers=2))
+    assert [d.chunks for d in inline] == [d.chunks for d in pooled]
+
+
+def test_chunk_corpus_spawns_workers(monkeypatch):
+    """Workers never fork the (possibly multithreaded) calling process."""
+    contexts = []
+    real_pool = corpus_module.ProcessPoolExecutor
+
+    def pool(*args, **kwargs):
+        contexts.append(kwargs["mp_context"].get_start_method())
+        return real_pool(*args, **kwargs)
+
+    monkeypatch.setattr(corpus_module, "ProcessPoolExecutor", pool)
+    list(chunk_corpus(_corpus(), chunk_size=200, max_workers=2))
+    assert contexts == ["spawn"]
+
+
+def test_chunk_corpus_strips_boilerplate():
+    """The whole corpus is learned before workers strip it."""
+    boilerplate = BoilerplateIndex()
+    docs = list(chunk_corpus(_corpus(), chunk_size=200, boilerplate=boilerplate))
+
+    assert boilerplate.documents == 4
+    assert boilerplate.lines_removed == 4
+    assert boilerplate.chars_removed == 4 * len(FOOTER)
+    for doc in docs:
+        assert FOOTER not in doc.text
+        assert all(FOOTER not in c.content for c in doc.chunks)
+
+
+def test_chunk_corpus_stripping_ignores_document_order():
+    """A document's chunks don't depend on where it falls in the corpus."""
+    corpus = _corpus()
+    forward = list(
+        chunk_corpus(
+            corpus,
+            chunk_size=200,
+            strategy="content_defined",
+            boilerplate=BoilerplateIndex(),
+        )
+    )
+    backward = list(
+        chunk_corpus(
+            corpus[::-1],
+            chunk_size=200,
+            strategy="content_defined",
+            boilerplate=BoilerplateIndex(),
+            max_workers=1,
+        )
+    )
+    assert [d.chunks for d in forward] == [d.chunks for d in backward[::-1]]
+
+
+def test_worker_sends_back_offsets_only():
+    """No document text travels back from a worker; chunks rebuild exactly."""
+    boilerplate = BoilerplateIndex().fit(text for _, text in _corpus())
+    options = corpus_module._ChunkOptions(200, 0, "chars", "markdown")
+    corpus_module._init_worker(options, boilerplate)
+    document_id, text = _corpus()[0]
+
+    packed = corpus_module._chunk_packed((document_id, text))
+
+    assert b"lags on patching" not in pickle.dumps(packed)
+    doc = corpus_module._unpack(packed, text)
+    assert FOOTER not in doc.text
+    assert doc.chunks == chunk_text(
+        BoilerplateIndex().fit(t for _, t in _corpus()).strip(text),
+        document_id,
+        chunk_size=200,
+        chunk_overlap=0,
+        strategy="markdown",
+    )
+
+
+def test_chunk_corpus_reads_documents_lazily():
+    """Only a bounded window of documents is read ahead of the consumer."""
+    read = []
+
+    def documents():
+        for doc_id, text in _corpus() * 3:
+            read.append(doc_id)
+            yield doc_id, text
+
+    docs = chunk_corpus(documents(), chunk_size=200, max_workers=2)
+    first = next(docs)
+    assert first.document_id == "doc0"
+    assert len(read) == 5  # two in flight per worker, plus the one yielded
+    assert len(list(docs)) == 11
+    assert len(read) == 12
+
+
+def test_chunk_corpus_empty_document():
+    """Documents without text come back with no chunks."""
+    docs = list(chunk_corpus([("empty", "  \n\n ")], max_workers=1))
+    assert len(docs) == 1
+    assert docs[0].chunks == []
@@ -0,0 +1,84 @@
+"""Tests for chunk deduplication."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from enrichment.services.dedup import ChunkDeduplicator, simhash
+
+BOILERPLATE = (
+    "GAO's mission is to provide Congress with timely information that is "
+    "objective, fact-based, nonpartisan, nonideological, fair, and balanced. "
+    "Obtaining copies of GAO reports and testimony is free of charge. "
+    "The fastest way to obtain copies of GAO documents at no cost is through "
+    "our website. Each weekday afternoon, GAO posts on its website newly "
+    "released reports, testimony, and correspondence. You can also subscribe "
+    "to GAO email updates listing newly posted products."
+)
+
+
+def _fake_embed():
+    return MagicMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+
+
+def test_simhash_near_texts_are_close():
+    """Small edits move the fingerprint by only a few bits."""
+    edited = BOILERPLATE.replace("timely", "timely, accurate")
+    unrelated = "Agencies reported 30,000 cyber incidents in fiscal year 2023."
+    assert (simhash(BOILERPLATE) ^ simhash(BOILERPLATE)).bit_count() == 0
+    near = (simhash(BOILERPLATE) ^ simhash(edited)).bit_count()
+    far = (simhash(BOILERPLATE) ^ simhash(unrelated)).bit_count()
+    assert near < far
+
+
+def test_exact_duplicates_embedded_once():
+    """Repeated texts, even across calls, reuse the first embedding."""
+    dedup = ChunkDeduplicator()
+    embed = _fake_embed()
+
+    vectors, duplicate = dedup.embed(["alpha", "beta", "Alpha "], embed)
+    assert duplicate == [False, False, True]
+    assert vectors[2] == vectors[0]
+    embed.assert_called_once_with(["alpha", "beta"])
+
+    vectors, duplicate = dedup.embed(["beta", "gamma"], embed)
+    assert duplicate == [True, False]
+    assert vectors[0] == [4.0]
+    assert embed.call_args[0][0] == ["gamma"]
+    assert dedup.stats.unique == 3
+    assert dedup.stats.exact == 2
+    assert len(dedup) == 3
+
+
+def test_near_duplicates_reuse_embedding():
+    """A near-identical chunk reuses the embedding of the original."""
+    dedup = ChunkDeduplicator(max_distance=3)
+    embed = _fake_embed()
+    dedup.embed([BOILERPLATE], embed)
+
+    variant = BOILERPLATE + " Page 12"
+    distance = (simhash(BOILERPLATE) ^ simhash(variant)).bit_count()
+    vectors, duplicate = dedup.embed([variant], embed)
+
+    assert distance <= 3
+    assert duplicate == [True]
+    assert vectors == [[float(len(BOILERPLATE))]]
+    assert dedup.stats.near == 1
+    assert embed.call_count == 1
+
+
+def test_no_api_call_when_all_duplicates():
+    """embed is not called when every text is already known."""
+    dedup = ChunkDeduplicator()
+    embed = _fake_embed()
+    dedup.embed(["alpha"], embed)
+    dedup.embed(["alpha"], embed)
+    assert embed.call_count == 1
+
+
+def test_invalid_max_distance():
+    """max_distance must leave at least one exact band for lookups."""
+    with pytest.raises(ValueError, match="max_distance"):
+        ChunkDeduplicator(max_distance=4)
@@ -0,0 +1,79 @@
+"""Tests for the persistent embedding cache."""
+
+from __future__ import annotations
+
+import struct
+
+import pytest
+
+from enrichment.services.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = EmbeddingCache(tmp_path / "cache" / "embeddings.sqlite")
+    yield c
+    c.close()
+
+
+def test_round_trip(cache):
+    """Stored vectors come back as float32 values, misses as None."""
+    cache.put_many(["a", "b"], [[0.5, 1.0], [0.25, -2.0]], "small")
+    assert cache.get_many(["b", "x", "a"], "small") == [[0.25, -2.0], None, [0.5, 1.0]]
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert len(cache) == 2
+    assert cache.size_bytes == 16
+    # Little-endian float32 on any host, as decoded by EmbeddingService
+    assert cache.get_blobs(["a"], "small") == [struct.pack("<2f", 0.5, 1.0)]
+
+
+def test_key_includes_deployment_and_dimensions(cache):
+    """The same text under another deployment or dimension count misses."""
+    cache.put_many(["a"], [[1.0]], "small", dimensions=256)
+    assert cache.get_many(["a"], "small", dimensions=256) == [[1.0]]
+    assert cache.get_many(["a"], "large", dimensions=256) == [None]
+    assert cache.get_many(["a"], "small") == [None]
+
+
+def test_persists_across_instances(tmp_path):
+    """A later run reopens the file with its contents and size."""
+    path = tmp_path / "embeddings.sqlite"
+    first = EmbeddingCache(path)
+    first.put_many(["a", "a"], [[1.0, 2.0], [1.0, 2.0]], "small")
+    first.put_many(["a"], [[1.0, 2.0]], "small")
+    first.close()
+
+    second = EmbeddingCache(path)
+    assert second.get_many(["a"], "small") == [[1.0, 2.0]]
+    assert second.size_bytes == 8
+    second.close()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    """Going over max_bytes drops the entries read or written longest ago."""
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_bytes=40)
+    vector = [0.0] * 4  # 16 bytes
+    cache.put_many(["old"], [vector], "small")
+    cache.put_many(["used"], [vector], "small")
+    cache.get_many(["used"], "small")
+    cache.put_many(["new"], [vector], "small")
+
+    assert cache.get_many(["old", "used", "new"], "small") == [None, vector, vector]
+    assert cache.size_bytes == 32
+    cache.close()
+
+
+def test_eviction_counts_other_writers(tmp_path):
+    """The size limit covers vectors stored by another open cache on the file."""
+    path = tmp_path / "embeddings.sqlite"
+    first = EmbeddingCache(path, max_bytes=40)
+    second = EmbeddingCache(path, max_bytes=40)
+    vector = [0.0] * 4  # 16 bytes
+    first.put_many(["a"], [vector], "small")
+    second.put_many(["b", "a"], [vector, vector], "small")
+    first.put_many(["c"], [vector], "small")
+
+    assert first.get_many(["a", "b", "c"], "small") == [None, vector, vector]
+    assert second.size_bytes == 32
+    first.close()
+    second.close()
@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
+import httpx
+import openai
 import pytest
 
+from enrichment.services import tokenizer
 from enrichment.services.embedding import EmbeddingService
+from enrichment.services.rate_limit import AdaptiveLimiter
 
 
 @pytest.fixture
@@ -56,22 +62,46 @@ def test_embed_batch(embedding_service):
     assert result[0] == [0.0]
 
 
+def _echo_response(input, model):
+    """Fake embeddings.create response with one vector per input."""
+    return MagicMock(data=[MagicMock(embedding=[float(len(t))]) for t in input])
+
+
 def test_embed_batching(embedding_service):
-    """embed splits large lists into batches of 16."""
+    """embed splits inputs at the per-request item limit."""
+    embedding_service._max_batch_items = 16
     texts = [f"text {i}" for i in range(20)]
-
-    mock_items_16 = [MagicMock(embedding=[float(i)]) for i in range(16)]
-    mock_items_4 = [MagicMock(embedding=[float(i)]) for i in range(4)]
-    mock_resp_16 = MagicMock(data=mock_items_16)
-    mock_resp_4 = MagicMock(data=mock_items_4)
-    embedding_service._mock_client.embeddings.create.side_effect = [
-        mock_resp_16,
-        mock_resp_4,
-    ]
+    create = embedding_service._mock_client.embeddings.create
+    create.side_effect = _echo_response
 
     result = embedding_service.embed(texts)
     assert len(result) == 20
-    assert embedding_service._mock_client.embeddings.create.call_count == 2
+    assert [len(c.kwargs["input"]) for c in create.call_args_list] == [16, 4]
+
+
+def test_embed_token_budget(embedding_service, monkeypatch):
+    """embed packs inputs up to the per-request token budget, in order."""
+    monkeypatch.setattr(tokenizer, "get_encoding", lambda _model: None)
+    embedding_service._max_batch_tokens = 100
+    texts = ["x" * 200, "y" * 200, "z" * 600, "w" * 40]  # 50, 50, 150, 10 tokens
+    create = embedding_service._mock_client.embeddings.create
+    create.side_effect = _echo_response
+
+    result = embedding_service.embed(texts)
+    assert result == [[200.0], [200.0], [600.0], [40.0]]
+    assert [c.kwargs["input"] for c in create.call_args_list] == [
+        texts[:2],
+        texts[2:3],
+        texts[3:],
+    ]
+
+
+def test_embed_defaults_to_large_batches(embedding_service):
+    """Hundreds of small chunks fit in a single request by default."""
+    create = embedding_service._mock_client.embeddings.create
+    create.side_effect = _echo_response
+    embedding_service.embed(["chunk text " * 50] * 600)
+    assert create.call_count == 1
 
 
 def test_init_with_api_key():
@@ -85,3 +115,193 @@ def test_init_with_api_key():
         call_kwargs = mock_cls.call_args[1]
         assert call_kwargs["api_key"] == "test-key"
         assert "azure_endpoint" in call_kwargs
+
+
+def test_embed_concurrent_preserves_order(embedding_service):
+    """Concurrent batches are returned in input order, N at a time."""
+    embedding_service._max_concurrency = 3
+    embedding_service._max_batch_items = 2
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def create(input, model):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        # Later batches finish first
+        time.sleep(0.02 / len(input[0]))
+        with lock:
+            in_flight -= 1
+        return _echo_response(input, model)
+
+    embedding_service._mock_client.embeddings.create.side_effect = create
+    texts = ["x" * i for i in range(1, 13)]
+
+    result = embedding_service.embed(texts)
+    embedding_service.close()
+
+    assert result == [[float(i)] for i in range(1, 13)]
+    assert embedding_service._mock_client.embeddings.create.call_count == 6
+    assert 1 < peak <= 3
+
+
+def test_embed_concurrent_splits_single_budget(embedding_service):
+    """With concurrency, one large call is spread across the workers."""
+    embedding_service._max_concurrency = 4
+    create = embedding_service._mock_client.embeddings.create
+    create.side_effect = _echo_response
+
+    result = embedding_service.embed(["chunk text " * 50] * 100)
+    embedding_service.close()
+
+    assert len(result) == 100
+    assert create.call_count == 4
+
+
+def test_embed_uses_cache(embedding_service, tmp_path):
+    """Cached texts are not sent again; repeated new texts are sent once."""
+    from enrichment.services.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite")
+    embedding_service._cache = cache
+    create = embedding_service._mock_client.embeddings.create
+    create.side_effect = _echo_response
+
+    assert embedding_service.embed(["aa", "b", "aa"]) == [[2.0], [1.0], [2.0]]
+    assert create.call_args.kwargs["input"] == ["aa", "b"]
+
+    assert embedding_service.embed(["b", "cccc"]) == [[1.0], [4.0]]
+    assert create.call_args.kwargs["input"] == ["cccc"]
+    assert create.call_count == 2
+    cache.close()
+
+
+def _base64_response(input, model, encoding_format=None):
+    """Fake base64 response: each vector is [len(text), 0.5] as float32."""
+    import base64
+    from array import array
+
+    return MagicMock(
+        data=[
+            MagicMock(embedding=base64.b64encode(array("f", [len(t), 0.5]).tobytes()))
+            for t in input
+        ]
+    )
+
+
+def test_embed_as_array(embedding_service):
+    """as_array returns a contiguous float32 matrix decoded from base64."""
+    np = pytest.importorskip("numpy")
+    create = embedding_service._mock_client.embeddings.create
+    create.side_effect = _base64_response
+
+    matrix = embedding_service.embed(["a", "bbb"], as_array=True)
+
+    assert matrix.dtype == np.float32
+    assert matrix.flags["C_CONTIGUOUS"]
+    assert matrix.tolist() == [[1.0, 0.5], [3.0, 0.5]]
+    assert create.call_args.kwargs["encoding_format"] == "base64"
+
+    vector = embedding_service.embed_single("cc", as_array=True)
+    assert vector.shape == (2,)
+    assert embedding_service.embed([], as_array=True).shape == (0, 0)
+
+
+def test_embed_as_array_uses_cache(embedding_service, tmp_path):
+    """Array results share the cache with list results."""
+    pytest.importorskip("numpy")
+    from enrichment.services.embedding_cache import EmbeddingCache
+
+    embedding_service._cache = EmbeddingCache(tmp_path / "embeddings.sqlite")
+    create = embedding_service._mock_client.embeddings.create
+    create.side_effect = _base64_response
+
+    first = embedding_service.embed(["a", "bb", "a"], as_array=True)
+    assert first.tolist() == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    assert create.call_args.kwargs["input"] == ["a", "bb"]
+
+    assert embedding_service.embed(["bb"]) == [[2.0, 0.5]]
+    assert create.call_count == 1
+    embedding_service._cache.close()
+
+
+def test_embed_with_limiter_retries_throttling():
+    """With a limiter, SDK retries are off and 429s are retried by the limiter."""
+    throttled = openai.RateLimitError(
+        "Too Many Requests",
+        response=httpx.Response(
+            429,
+            headers={"retry-after-ms": "1"},
+            request=httpx.Request("POST", "https://test.openai.azure.com"),
+        ),
+        body=None,
+    )
+    limiter = AdaptiveLimiter(initial=2)
+    with patch("enrichment.services.embedding.AzureOpenAI") as mock_cls:
+        svc = EmbeddingService(
+            endpoint="https://test.openai.azure.com",
+            credential="test-key",
+            limiter=limiter,
+        )
+    assert mock_cls.call_args[1]["max_retries"] == 0
+    create = mock_cls.return_value.embeddings.create
+    create.side_effect = [throttled, _echo_response(["ab"], "m")]
+
+    assert svc.embed(["ab"]) == [[2.0]]
+    assert create.call_count == 2
+    assert limiter.throttled == 1
+
+
+def test_embed_concurrency_follows_limiter():
+    """Calls are split by the limiter's limit, so in-flight requests can grow."""
+    limiter = AdaptiveLimiter(initial=4, maximum=16)
+    with patch("enrichment.services.embedding.AzureOpenAI") as mock_cls:
+        svc = EmbeddingService(
+            endpoint="https://test.openai.azure.com",
+            credential="test-key",
+            max_concurrency=4,
+            limiter=limiter,
+        )
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def create(input, model):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.005)
+        with lock:
+            in_flight -= 1
+        return _echo_response(input, model)
+
+    create_mock = mock_cls.return_value.embeddings.create
+    create_mock.side_effect = create
+    for _ in range(20):
+        create_mock.reset_mock()
+        svc.embed([f"chunk {i} text" for i in range(256)])
+    svc.close()
+
+    assert limiter.limit > 8
+    assert create_mock.call_count > 8
+    assert peak > 4
+
+
+def test_embed_requests_dimensions(embedding_service, tmp_path):
+    """Shortened vectors are requested and cached apart from native-size ones."""
+    from enrichment.services.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite")
+    cache.put_many(["a"], [[9.0]], "text-embedding-3-small")
+    embedding_service._cache = cache
+    embedding_service.dimensions = 256
+    create = embedding_service._mock_client.embeddings.create
+    create.side_effect = lambda input, model, dimensions: _echo_response(input, model)
+
+    assert embedding_service.embed(["a"]) == [[1.0]]
+    assert create.call_args.kwargs["dimensions"] == 256
+    assert cache.get_many(["a"], "text-embedding-3-small", dimensions=256) == [[1.0]]
+    cache.close()
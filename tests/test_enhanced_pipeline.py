@@ -62,9 +62,9 @@ def test_process_document(pipeline):
         ]
     }
 
-    pipeline.embedding.embed.return_value = [[0.1] * 1536]
-    pipeline.search.index_enhanced_chunks.return_value = [
-        {"key": "doc-0000", "succeeded": True}
+    pipeline.embedding.embed.side_effect = lambda texts: [[0.1] * 1536] * len(texts)
+    pipeline.search.index_enhanced_chunks.side_effect = lambda _idx, chunks, *_: [
+        {"key": c.id, "succeeded": True} for c in chunks
     ]
 
     result = pipeline.process_document(
@@ -75,11 +75,46 @@ def test_process_document(pipeline):
 
     assert result["document_id"] == "doc1"
     assert result["chunks"] >= 1
-    assert result["indexed"] == 1
+    assert result["indexed"] == result["chunks"]
     assert result["metadata"]["reportTitle"] == "Test Report"
     assert result["metadata"]["topicCategory"] == "Cybersecurity"
     pipeline.cu.analyze_document.assert_called_once()
+    # One embed and one upload per streamed window; this document fits in one
+    pipeline.embedding.embed.assert_called_once()
     pipeline.search.index_enhanced_chunks.assert_called_once()
+    _, chunks, embeddings, metadata = pipeline.search.index_enhanced_chunks.call_args[0]
+    assert len(chunks) == len(embeddings) == result["chunks"]
+    assert metadata["reportNumber"] == "GAO-24-999999"
+
+
+def test_process_document_streams_windows(pipeline, monkeypatch):
+    """Chunks are embedded and indexed one window at a time, with metadata."""
+    monkeypatch.setattr("enrichment.pipeline.indexing.STREAM_BATCH_SIZE", 10)
+    pipeline.cu.result_to_dict.return_value = {
+        "contents": [
+            {
+                "markdown": "\n\n".join(f"Paragraph {i} text." for i in range(25)),
+                "fields": {"reportTitle": {"value": "Test Report"}},
+            }
+        ]
+    }
+    pipeline.embedding.embed.side_effect = lambda texts: [[0.1]] * len(texts)
+    pipeline.search.index_enhanced_chunks.side_effect = lambda _idx, chunks, *_: [
+        {"key": c.id, "succeeded": True} for c in chunks
+    ]
+
+    result = pipeline.process_document(
+        document_url="https://example.com/doc.pdf",
+        document_id="doc1",
+        chunk_size=20,
+        chunk_overlap=0,
+    )
+
+    calls = pipeline.search.index_enhanced_chunks.call_args_list
+    assert [len(call[0][1]) for call in calls] == [10, 10, 5]
+    assert all(call[0][3] == {"reportTitle": "Test Report"} for call in calls)
+    assert [c[0][1][0].chunk_index for c in calls] == [0, 10, 20]
+    assert result["chunks"] == result["indexed"] == 25
 
 
 def test_process_document_empty_text(pipeline):
@@ -137,3 +172,50 @@ def test_process_document_uses_custom_analyzer(pipeline):
 
     call_kwargs = pipeline.cu.analyze_document.call_args[1]
     assert call_kwargs["analyzer_id"] == "test-analyzer"
+
+
+def test_process_document_populates_sections(pipeline):
+    """Enhanced chunks carry section titles and page numbers from CU markdown."""
+    pipeline.cu.result_to_dict.return_value = {
+        "contents": [
+            {
+                "markdown": "# Overview\n\nIntro text.\n\n<!-- PageBreak -->\n\n"
+                "## Findings\n\nFinding text.",
+                "fields": {},
+            }
+        ]
+    }
+    pipeline.embedding.embed.side_effect = lambda texts: [[0.1]] * len(texts)
+    pipeline.search.index_enhanced_chunks.return_value = []
+
+    pipeline.process_document(
+        document_url="https://example.com/doc.pdf", document_id="doc"
+    )
+
+    chunks = pipeline.search.index_enhanced_chunks.call_args[0][1]
+    assert [c.section_title for c in chunks] == ["Overview", "Findings"]
+    assert [c.page_number for c in chunks] == [1, 2]
+
+
+def test_process_corpus_keeps_metadata_per_document(pipeline):
+    """Each document is indexed with its own CU metadata."""
+    pipeline.cu.analyze_document.side_effect = lambda document_url, **_: document_url
+    pipeline.cu.result_to_dict.side_effect = lambda url: {
+        "contents": [
+            {
+                "markdown": f"# Report\n\nText of {url}." if "a" in url else "",
+                "fields": {"reportTitle": {"value": url}},
+            }
+        ]
+    }
+    pipeline.embedding.embed.side_effect = lambda texts: [[0.1]] * len(texts)
+    pipeline.search.index_enhanced_chunks.return_value = []
+
+    results = pipeline.process_corpus(
+        [("a", "https://a"), ("b", "https://b")], max_workers=1
+    )
+
+    assert [r["metadata"]["reportTitle"] for r in results] == ["https://a", "https://b"]
+    assert [r["chunks"] for r in results] == [1, 0]
+    metadata = pipeline.search.index_enhanced_chunks.call_args[0][3]
+    assert metadata == {"reportTitle": "https://a"}
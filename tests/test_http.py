@@ -0,0 +1,62 @@
+"""Tests for the shared Azure OpenAI HTTP client."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from enrichment.services import http
+from enrichment.services.chat import ChatService
+from enrichment.services.embedding import EmbeddingService
+from enrichment.services.http import get_http_client
+
+
+@pytest.fixture(autouse=True)
+def _fresh_clients():
+    get_http_client.cache_clear()
+    yield
+    get_http_client.cache_clear()
+
+
+def test_client_is_shared_per_pool_settings():
+    """The same pool settings return the same client; others get their own."""
+    client = get_http_client(max_connections=10, http2=False)
+    assert isinstance(client, httpx.Client)
+    assert get_http_client(max_connections=10, http2=False) is client
+    assert get_http_client(max_connections=20, http2=False) is not client
+
+
+def test_http2_falls_back_without_h2(monkeypatch, caplog):
+    """Without h2, HTTP/2 is not requested and a warning says why."""
+    monkeypatch.setattr(http.importlib.util, "find_spec", lambda _name: None)
+    with patch.object(http, "DefaultHttpxClient") as mock_client_cls:
+        get_http_client()
+    assert mock_client_cls.call_args.kwargs["http2"] is False
+    assert "h2 is not installed" in caplog.text
+
+
+def test_http2_with_h2():
+    """With the ``http2`` extra, the pool negotiates HTTP/2."""
+    pytest.importorskip("h2")
+    client = get_http_client()
+    assert client._transport._pool._http2 is True  # type: ignore[attr-defined]  # httpx internals
+
+
+def test_services_share_the_default_client():
+    """Embedding and chat clients are built on one connection pool."""
+    with (
+        patch("enrichment.services.embedding.AzureOpenAI") as embed_openai,
+        patch("enrichment.services.chat.AzureOpenAI") as chat_openai,
+    ):
+        embedding = EmbeddingService(endpoint="https://x", credential="key")
+        ChatService(
+            search=None,  # type: ignore[arg-type]  # not used here
+            embedding=embedding,
+            endpoint="https://x",
+            credential="key",
+        )
+    shared = embed_openai.call_args.kwargs["http_client"]
+    assert chat_openai.call_args.kwargs["http_client"] is shared
+    assert shared is get_http_client()
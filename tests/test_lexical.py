@@ -0,0 +1,71 @@
+"""Tests for the BM25 index and reciprocal-rank fusion."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from enrichment.services.lexical import (  # noqa: E402
+    BM25Index,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+TEXTS = [
+    "cybersecurity risk at federal agencies",
+    "budget risk risk risk",
+    "wildlife habitat restoration",
+    "federal budget outlook and budget risk",
+]
+
+
+def _index() -> BM25Index:
+    index = BM25Index()
+    for row, text in enumerate(TEXTS):
+        index.add(row, text)
+    return index
+
+
+def test_tokenize():
+    """Tokens are lower-cased words."""
+    assert tokenize("Federal Risk, 2024!") == ["federal", "risk", "2024"]
+
+
+def test_rare_terms_and_repetition_rank_higher():
+    """IDF favours rare terms; term frequency raises a row's score."""
+    index = _index()
+    assert [row for _, row in index.search("wildlife", 5)] == [2]
+    ranked = [row for _, row in index.search("risk", 5)]
+    assert ranked[0] == 1
+    assert set(ranked) == {0, 1, 3}
+    assert index.search("federal budget", 1)[0][1] == 3
+    assert index.search("unknown", 5) == []
+
+
+def test_rows_restricts_candidates():
+    """Only the given rows are eligible."""
+    np = pytest.importorskip("numpy")
+    hits = _index().search("risk", 5, rows=np.array([0, 3]))
+    assert {row for _, row in hits} == {0, 3}
+
+
+def test_remove_and_compact():
+    """Removed rows stop matching, before and after postings are compacted."""
+    index = _index()
+    index.remove(1, TEXTS[1])
+    assert {row for _, row in index.search("risk", 5)} == {0, 3}
+    assert index.documents == 3
+    for row in (0, 3):
+        index.remove(row, TEXTS[row])
+    assert index.search("risk", 5) == []
+    index.add(4, "risk again")
+    assert [row for _, row in index.search("risk", 5)] == [4]
+
+
+def test_reciprocal_rank_fusion():
+    """Items ranked well in several lists come first."""
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60)
+    assert [item for _, item in fused] == [1, 3, 2]
+    assert fused[0][0] == pytest.approx(1 / 61 + 1 / 62)
+    assert reciprocal_rank_fusion([]) == []
@@ -0,0 +1,81 @@
+"""Tests for the offline hashing embedding backend."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from enrichment.pipeline.baseline import BaselinePipeline  # noqa: E402
+from enrichment.services.embedding import EmbeddingService  # noqa: E402
+from enrichment.services.local_embedding import HashingEmbeddingBackend  # noqa: E402
+
+
+def test_vectors_are_deterministic_and_normalized():
+    """Equal texts (modulo case and spacing) map to the same unit vector."""
+    backend = HashingEmbeddingBackend(dimensions=64)
+    a, b, empty = backend.embed_batch(["Federal risk", "federal   RISK", ""])
+    assert a == b
+    assert len(a) == 64
+    assert np.linalg.norm(a) == pytest.approx(1.0, rel=1e-5)
+    assert not any(empty)
+    assert HashingEmbeddingBackend(dimensions=64).embed_batch(["Federal risk"]) == [a]
+
+
+def test_similar_texts_score_higher():
+    """Shared wording gives a higher cosine similarity than unrelated text."""
+    backend = HashingEmbeddingBackend()
+    query, near, far = np.array(
+        backend.embed_batch(
+            [
+                "agency cybersecurity risk management",
+                "cybersecurity risk management at the agency",
+                "wildlife habitat restoration funding",
+            ]
+        )
+    )
+    assert query @ near > 0.5 > query @ far
+
+
+def test_embedding_service_uses_backend():
+    """EmbeddingService sends no requests and keys caches by the backend name."""
+    backend = HashingEmbeddingBackend(dimensions=32)
+    svc = EmbeddingService(endpoint="", credential="", backend=backend)
+    svc._client = MagicMock()
+
+    vectors = svc.embed(["one", "two"])
+    matrix = svc.embed(["one", "two"], as_array=True)
+
+    assert matrix.shape == (2, 32)
+    np.testing.assert_allclose(matrix, vectors, rtol=1e-6)
+    svc._client.embeddings.create.assert_not_called()
+    assert svc._deployment == backend.name
+
+
+def test_baseline_pipeline_runs_offline():
+    """A full baseline run embeds chunks locally with the hashing backend."""
+    cu = MagicMock()
+    cu.result_to_dict.return_value = {
+        "contents": [{"markdown": "Agency findings.\n\nRecommendations follow."}]
+    }
+    search = MagicMock()
+    search.index_chunks.side_effect = lambda _index, chunks, _emb: [
+        {"key": c.id, "succeeded": True} for c in chunks
+    ]
+    pipeline = BaselinePipeline(
+        storage=MagicMock(),
+        cu=cu,
+        embedding=EmbeddingService(
+            endpoint="", credential="", backend=HashingEmbeddingBackend(dimensions=16)
+        ),
+        search=search,
+        index_name="test-baseline",
+    )
+
+    (result,) = pipeline.process_corpus([("doc", "https://example.com/doc.pdf")])
+
+    assert result["indexed"] == result["chunks"] > 0
+    embeddings = search.index_chunks.call_args[0][2]
+    assert all(len(vector) == 16 for vector in embeddings)
@@ -0,0 +1,178 @@
+"""Tests for the in-process local search backend."""
+
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from enrichment.services.chunking import Chunk  # noqa: E402
+from enrichment.services.local_search import (  # noqa: E402
+    LocalSearchService,
+    parse_filter,
+)
+from enrichment.services.search import BASELINE_SELECT  # noqa: E402
+
+DIMS = 16
+
+
+def _chunks(n: int, document_id: str = "doc") -> list[Chunk]:
+    return [
+        Chunk(
+            id=f"{document_id}-{i}",
+            content=f"chunk {i} about {'risk' if i % 2 else 'budget'}",
+            document_id=document_id,
+            chunk_index=i,
+        )
+        for i in range(n)
+    ]
+
+
+def _vectors(n: int, seed: int = 0) -> list[list[float]]:
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(n, DIMS)).astype(np.float32).tolist()
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = LocalSearchService(tmp_path, dimensions=DIMS, m=4, ef_construction=32)
+    yield svc
+    svc.close()
+
+
+def test_index_and_vector_search(service):
+    """The stored chunk nearest the query vector ranks first."""
+    vectors = _vectors(20)
+    service.create_baseline_index("idx")
+    results = service.index_chunks("idx", _chunks(20), vectors)
+    assert all(r["succeeded"] for r in results)
+
+    hits = service.search("idx", "", vector=vectors[7], top=3)
+    assert len(hits) == 3
+    assert hits[0]["id"] == "doc-7"
+    assert hits[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert set(hits[0]) == {"id", "content", "document_id", "score"}
+    assert service.list_indexes() == ["idx"]
+
+
+def test_enhanced_metadata_and_select(service):
+    """Enhanced metadata is returned unless ``select`` leaves it out."""
+    service.create_enhanced_index("idx")
+    service.index_enhanced_chunks(
+        "idx", _chunks(3), _vectors(3), {"reportTitle": "Risk Report"}
+    )
+    vector = _vectors(3)[0]
+    assert service.search("idx", "q", vector=vector)[0]["report_title"] == (
+        "Risk Report"
+    )
+    hit = service.search("idx", "q", vector=vector, select=BASELINE_SELECT)[0]
+    assert "report_title" not in hit
+
+
+def test_persists_across_instances(tmp_path):
+    """Documents, vectors and the graph are reloaded from disk."""
+    vectors = _vectors(50)
+    first = LocalSearchService(tmp_path, dimensions=DIMS)
+    first.create_baseline_index("idx")
+    first.index_chunks("idx", _chunks(50), vectors)
+    first.close()
+
+    second = LocalSearchService(tmp_path, dimensions=DIMS)
+    assert second.search("idx", "q", vector=vectors[30], top=1)[0]["id"] == "doc-30"
+    assert len(second.get_chunk_positions("idx", "doc")) == 50
+    second.close()
+
+    with pytest.raises(ValueError, match="16-dimension"):
+        LocalSearchService(tmp_path, dimensions=8).create_baseline_index("idx")
+
+
+def test_hnsw_recall_matches_brute_force(tmp_path):
+    """The graph finds nearly all of the exact top 10 — past capacity growth."""
+    vectors = _vectors(1200)
+    hnsw = LocalSearchService(tmp_path, dimensions=DIMS)
+    hnsw.create_baseline_index("idx")
+    hnsw.index_chunks("idx", _chunks(1200), vectors)
+    hnsw.close()
+    flat = LocalSearchService(tmp_path, dimensions=DIMS, algorithm="flat")
+    hnsw = LocalSearchService(tmp_path, dimensions=DIMS)
+
+    found = 0
+    for query in _vectors(20, seed=1):
+        exact = {h["id"] for h in flat.search("idx", "", vector=query, top=10)}
+        approx = {h["id"] for h in hnsw.search("idx", "", vector=query, top=10)}
+        found += len(exact & approx)
+    assert found / 200 >= 0.9
+    flat.close()
+    hnsw.close()
+
+
+def test_replace_update_and_delete(service):
+    """Re-indexing replaces by ID; merges and deletes apply to later queries."""
+    vectors = _vectors(4)
+    service.create_baseline_index("idx")
+    service.index_chunks("idx", _chunks(4), vectors)
+    service.index_chunks("idx", _chunks(1), [vectors[3]])
+
+    hits = service.search("idx", "q", vector=vectors[3], top=4)
+    assert {h["id"] for h in hits[:2]} == {"doc-0", "doc-3"}
+    assert len(hits) == 4
+
+    service.update_chunk_positions("idx", {"doc-1": 9})
+    assert service.get_chunk_positions("idx", "doc")["doc-1"] == 9
+    result = service.delete_chunks("idx", ["doc-0", "missing"])
+    assert [r["succeeded"] for r in result] == [True, False]
+    ids = [h["id"] for h in service.search("idx", "q", vector=vectors[3], top=4)]
+    assert sorted(ids) == ["doc-1", "doc-2", "doc-3"]
+
+
+def test_filter_and_keyword_search(service):
+    """Filters restrict results; without a vector, BM25 ranks them."""
+    service.create_baseline_index("idx")
+    service.index_chunks("idx", _chunks(6), _vectors(6))
+    service.index_chunks("idx", _chunks(2, "other"), _vectors(2, seed=2))
+
+    hits = service.search(
+        "idx", "q", vector=_vectors(1)[0], top=10, filter="document_id eq 'other'"
+    )
+    assert {h["document_id"] for h in hits} == {"other"}
+    keyword = service.search("idx", "risk", top=10, filter="chunk_index lt 4")
+    assert {h["id"] for h in keyword} == {"doc-1", "doc-3", "other-1"}
+
+
+def test_hybrid_search_fuses_keyword_and_vector_hits(service):
+    """Text plus a vector returns RRF-fused hits and records stage timings."""
+    vectors = _vectors(10)
+    service.create_baseline_index("idx")
+    service.index_chunks("idx", _chunks(10), vectors)
+
+    hits = service.search("idx", "chunk 4 budget", vector=vectors[4], top=3)
+    # First in both rankings: 2 / (60 + 1)
+    assert hits[0]["id"] == "doc-4"
+    assert hits[0]["score"] == pytest.approx(2 / 61)
+    timings = service.last_timings
+    assert timings.lexical_ms > 0
+    assert timings.vector_ms > 0
+    assert timings.total_ms >= timings.lexical_ms + timings.vector_ms
+
+    service.search("idx", "budget", top=3)
+    assert service.last_timings.vector_ms == 0
+    assert service.last_timings.fusion_ms == 0
+
+
+def test_parse_filter():
+    """The OData subset the app uses compiles to a predicate."""
+    predicate = parse_filter("topic_category eq 'Defense' and page_number ge 2")
+    assert predicate({"topic_category": "Defense", "page_number": 3})
+    assert not predicate({"topic_category": "Defense", "page_number": None})
+    assert parse_filter("title eq 'O''Brien'")({"title": "O'Brien"})
+    with pytest.raises(ValueError, match="Unsupported filter"):
+        parse_filter("search.ismatch('x')")
+
+
+def test_delete_index(service):
+    """Deleting an index removes its files."""
+    service.create_baseline_index("idx")
+    service.delete_index("idx")
+    assert service.list_indexes() == []
+    with pytest.raises(KeyError):
+        service.search("idx", "q")
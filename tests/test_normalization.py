@@ -0,0 +1,87 @@
+"""Tests for boilerplate stripping."""
+
+from __future__ import annotations
+
+from enrichment.services.normalization import BoilerplateIndex
+
+CONTACT = "For more information, contact GAO's Office of Public Affairs."
+
+
+PAGE_BODIES = ["Agencies lag.", "Risks grow.", "DHS agreed.", "Costs rose."]
+
+
+def _report(bodies: list[str]) -> str:
+    pages = len(bodies)
+    page_texts = [
+        f'<!-- PageHeader="GAO-24-1234" -->\n\nGAO-24-1234 Cybersecurity\n\n'
+        f"{body}\n\nPage {i} of {pages}"
+        for i, body in enumerate(bodies, start=1)
+    ]
+    return "\n\n<!-- PageBreak -->\n\n".join(page_texts)
+
+
+def test_strips_running_headers_and_page_numbers():
+    """Lines repeated on every page and page numbers are removed."""
+    index = BoilerplateIndex()
+    text = _report(PAGE_BODIES)
+    stripped = index.strip(text)
+
+    assert "GAO-24-1234 Cybersecurity" not in stripped
+    assert "Page 2 of 4" not in stripped
+    assert "PageHeader" not in stripped
+    assert "<!-- PageBreak -->" in stripped
+    for body in PAGE_BODIES:
+        assert body in stripped
+    assert index.lines_removed == 12
+
+
+def test_keeps_structural_lines():
+    """Headings and tables are never stripped, even when repeated."""
+    index = BoilerplateIndex(min_page_repeats=2)
+    text = "# What GAO Found\n\n| a | b |\n\n<!-- PageBreak -->\n\n# What GAO Found\n\n| a | b |"
+    assert index.strip(text) == text
+
+
+def test_learns_corpus_boilerplate():
+    """Lines shared by most documents are stripped once enough are seen."""
+    index = BoilerplateIndex(min_documents=3, min_document_fraction=0.5)
+    docs = [f"Report {name} discusses risks.\n\n{CONTACT}" for name in "ABCD"]
+
+    index.add_document(docs[0], "A")
+    assert CONTACT in index.strip(docs[0])
+
+    index.fit(docs[1:3])
+    stripped = index.strip(docs[3])
+    assert CONTACT not in stripped
+    assert "Report D discusses risks." in stripped
+
+
+def test_add_document_counts_each_id_once():
+    """The same document added by both pipelines counts once."""
+    index = BoilerplateIndex()
+    index.add_document(CONTACT, "doc")
+    index.add_document(CONTACT, "doc")
+    assert index.documents == 1
+
+
+def test_page_number_pattern():
+    """Bare page numbers, including roman numerals, are stripped."""
+    index = BoilerplateIndex()
+    text = "iii\n\nIntro text.\n\n12\n\nCivic duty."
+    assert index.strip(text) == "\nIntro text.\n\n\nCivic duty."
+
+
+def test_keeps_numeric_body_lines():
+    """Lines differing only in their figures are content, not footers."""
+    index = BoilerplateIndex()
+    bodies = [
+        f"Obligations totaled ${n} million in fiscal year 202{n}." for n in range(4)
+    ]
+    text = "\n\n<!-- PageBreak -->\n\n".join(
+        f"{body}\n\nGAO-24-1234 | {page}" for page, body in enumerate(bodies, start=1)
+    )
+    stripped = index.strip(text)
+
+    for body in bodies:
+        assert body in stripped
+    assert "GAO-24-1234 |" not in stripped
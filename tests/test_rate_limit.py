@@ -0,0 +1,131 @@
+"""Tests for adaptive rate limiting of Azure OpenAI requests."""
+
+from __future__ import annotations
+
+import httpx
+import openai
+import pytest
+
+from enrichment.services.rate_limit import AdaptiveLimiter, retry_after
+
+_REQUEST = httpx.Request("POST", "https://test.openai.azure.com")
+
+
+def _throttled(headers: dict[str, str] | None = None) -> openai.RateLimitError:
+    response = httpx.Response(
+        429,
+        headers=headers or {},
+        request=_REQUEST,
+    )
+    return openai.RateLimitError("Too Many Requests", response=response, body=None)
+
+
+def test_retry_after_headers():
+    """retry-after-ms wins over retry-after; junk values are ignored."""
+    assert retry_after(_throttled({"retry-after-ms": "250"}).response) == 0.25
+    assert retry_after(_throttled({"retry-after": "3"}).response) == 3.0
+    assert (
+        retry_after(_throttled({"retry-after": "3", "retry-after-ms": "10"}).response)
+        == 0.01
+    )
+    assert retry_after(_throttled({"retry-after": "soon"}).response) is None
+    assert retry_after(_throttled().response) is None
+
+
+def test_aimd_limit():
+    """Successes add one slot per window; a throttle halves the limit once."""
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=6)
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+
+    window = limiter.acquire()
+    limiter.release()
+    limiter.on_throttle(window, 0)
+    limiter.on_throttle(window, 0)  # same window: one congestion signal
+    assert limiter.limit == pytest.approx(2.5, abs=0.1)
+    assert limiter.throttled == 2
+
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 6
+
+
+def test_call_retries_throttled_requests(monkeypatch):
+    """call() waits out Retry-After, retries, then shrinks the limit."""
+    limiter = AdaptiveLimiter(initial=4)
+    attempts = []
+
+    def flaky(value):
+        attempts.append(value)
+        if len(attempts) < 3:
+            raise _throttled({"retry-after-ms": "1"})
+        return value * 2
+
+    assert limiter.call(flaky, 21) == 42
+    assert attempts == [21, 21, 21]
+    assert limiter.throttled == 2
+    assert limiter.limit < 4
+    assert limiter.in_flight == 0
+
+
+def test_call_gives_up_after_max_retries():
+    """The last 429 is raised once max_retries is exhausted."""
+    limiter = AdaptiveLimiter(max_retries=1)
+
+    def always_throttled():
+        raise _throttled({"retry-after-ms": "0"})
+
+    with pytest.raises(openai.RateLimitError):
+        limiter.call(always_throttled)
+    assert limiter.throttled == 2
+    assert limiter.in_flight == 0
+
+
+def test_call_retries_transient_errors(monkeypatch):
+    """5xx and connection errors are retried without shrinking the limit."""
+    sleeps = []
+    monkeypatch.setattr("enrichment.services.rate_limit.time.sleep", sleeps.append)
+    limiter = AdaptiveLimiter(initial=4)
+    failures = [
+        openai.InternalServerError(
+            "Internal Server Error",
+            response=httpx.Response(500, request=_REQUEST),
+            body=None,
+        ),
+        openai.APITimeoutError(request=_REQUEST),
+    ]
+
+    def flaky():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    assert sleeps == [0.5, 1.0]
+    assert limiter.retried == 2
+    assert limiter.throttled == 0
+    assert limiter.limit > 4
+    assert limiter.in_flight == 0
+
+
+def test_call_raises_persistent_server_errors(monkeypatch):
+    """A 5xx's Retry-After is honoured; one still failing is raised."""
+    sleeps = []
+    monkeypatch.setattr("enrichment.services.rate_limit.time.sleep", sleeps.append)
+    limiter = AdaptiveLimiter(max_retries=2)
+
+    def broken():
+        raise openai.InternalServerError(
+            "Service Unavailable",
+            response=httpx.Response(
+                503, headers={"retry-after": "2"}, request=_REQUEST
+            ),
+            body=None,
+        )
+
+    with pytest.raises(openai.InternalServerError):
+        limiter.call(broken)
+    assert sleeps == [2.0, 2.0]
+    assert limiter.retried == 2
+    assert limiter.in_flight == 0
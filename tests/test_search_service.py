@@ -10,6 +10,7 @@ from enrichment.services.chunking import Chunk
 from enrichment.services.search import (
     BASELINE_INDEX_FIELDS,
     ENHANCED_INDEX_FIELDS,
+    ENHANCED_SELECT,
     SearchService,
 )
 
@@ -78,6 +79,22 @@ def test_index_chunks(search_service):
         assert results[0]["succeeded"] is True
 
 
+def test_index_chunks_accepts_float32_matrix(search_service):
+    """A NumPy embedding matrix is uploaded as plain lists."""
+    np = pytest.importorskip("numpy")
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        mock_client = mock_search_cls.return_value
+        mock_client.upload_documents.return_value = []
+        chunks = [Chunk(id=f"doc-000{i}", content="text") for i in range(2)]
+        embeddings = np.array([[0.5, 1.0], [0.25, 2.0]], dtype=np.float32)
+
+        search_service.index_chunks("test-index", chunks, embeddings)
+
+        documents = mock_client.upload_documents.call_args[0][0]
+        assert [d["content_vector"] for d in documents] == [[0.5, 1.0], [0.25, 2.0]]
+        assert type(documents[0]["content_vector"][0]) is float
+
+
 def test_search_keyword_only(search_service):
     """search works with keyword-only query."""
     with patch("enrichment.services.search.SearchClient") as mock_search_cls:
@@ -168,7 +185,14 @@ def test_index_enhanced_chunks(search_service):
         mock_search_cls.return_value = mock_client
 
         chunks = [
-            Chunk(id="doc-0000", content="test", document_id="doc", chunk_index=0)
+            Chunk(
+                id="doc-0000",
+                content="test",
+                document_id="doc",
+                chunk_index=0,
+                page_number=3,
+                section_title="What GAO Found",
+            )
         ]
         embeddings = [[0.1, 0.2]]
         metadata = {
@@ -187,3 +211,195 @@ def test_index_enhanced_chunks(search_service):
         assert uploaded[0]["report_title"] == "Test Report"
         assert uploaded[0]["report_number"] == "GAO-24-999"
         assert uploaded[0]["agencies"] == ["DOD"]
+        assert uploaded[0]["section_title"] == "What GAO Found"
+        assert uploaded[0]["page_number"] == 3
+
+
+def test_search_with_filter(search_service):
+    """search forwards an OData filter to the service."""
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        mock_client = MagicMock()
+        mock_client.search.return_value = []
+        mock_search_cls.return_value = mock_client
+
+        search_service.search("test-index", query="test", filter="page_number le 5")
+
+        assert mock_client.search.call_args[1]["filter"] == "page_number le 5"
+
+
+def test_get_chunk_positions(search_service):
+    """get_chunk_positions lists a document's chunk IDs and positions."""
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        mock_client = MagicMock()
+        mock_client.search.return_value = [
+            {"id": "o-a", "chunk_index": 0},
+            {"id": "o-b", "chunk_index": 1},
+        ]
+        mock_search_cls.return_value = mock_client
+
+        positions = search_service.get_chunk_positions("idx", "O'Brien")
+
+        assert positions == {"o-a": 0, "o-b": 1}
+        kwargs = mock_client.search.call_args[1]
+        assert kwargs["filter"] == "document_id eq 'O''Brien'"
+        assert kwargs["select"] == ["id", "chunk_index"]
+
+
+def test_update_chunk_positions(search_service):
+    """update_chunk_positions merges new chunk_index values."""
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        mock_client = MagicMock()
+        mock_client.merge_documents.return_value = [MagicMock(key="a", succeeded=True)]
+        mock_search_cls.return_value = mock_client
+
+        assert search_service.update_chunk_positions("idx", {}) == []
+        results = search_service.update_chunk_positions("idx", {"a": 3})
+
+        assert results == [{"key": "a", "succeeded": True}]
+        mock_client.merge_documents.assert_called_once_with(
+            [{"id": "a", "chunk_index": 3}]
+        )
+
+
+def test_delete_chunks(search_service):
+    """delete_chunks removes documents by key."""
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        mock_client = MagicMock()
+        mock_client.delete_documents.return_value = [MagicMock(key="a", succeeded=True)]
+        mock_search_cls.return_value = mock_client
+
+        assert search_service.delete_chunks("idx", []) == []
+        results = search_service.delete_chunks("idx", ["a"])
+
+        assert results == [{"key": "a", "succeeded": True}]
+        mock_client.delete_documents.assert_called_once_with([{"id": "a"}])
+
+
+def test_create_index_with_dimensions_and_compression():
+    """The vector field and profile follow the configured size and quantization."""
+    with patch("enrichment.services.search.SearchIndexClient") as mock_cls:
+        svc = SearchService(
+            endpoint="https://test.search.windows.net",
+            credential="test-api-key",
+            dimensions=256,
+            compression="binary",
+        )
+        svc.create_enhanced_index("enhanced-test")
+    index = mock_cls.return_value.create_or_update_index.call_args[0][0]
+
+    vector_field = next(f for f in index.fields if f.name == "content_vector")
+    assert vector_field.vector_search_dimensions == 256
+    assert [f.name for f in index.fields] == [f.name for f in ENHANCED_INDEX_FIELDS]
+    (compression,) = index.vector_search.compressions
+    assert compression.kind == "binaryQuantization"
+    profile = index.vector_search.profiles[0]
+    assert profile.compression_name == compression.compression_name
+
+
+def test_create_index_defaults_to_full_vectors(search_service):
+    """Without compression the index stores full-size float32 vectors."""
+    search_service.create_baseline_index("test-index")
+    index = search_service._mock_index_client.create_or_update_index.call_args[0][0]
+    vector_field = next(f for f in index.fields if f.name == "content_vector")
+    assert vector_field.vector_search_dimensions == 1536
+    assert index.vector_search.compressions == []
+
+
+def test_search_clients_are_cached_per_index(search_service):
+    """Each index gets one SearchClient on the shared transport until close()."""
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        mock_search_cls.side_effect = lambda **_: MagicMock()
+        first = search_service.get_search_client("a")
+        assert search_service.get_search_client("a") is first
+        other = search_service.get_search_client("b")
+        assert other is not first
+        assert mock_search_cls.call_count == 2
+        transports = {c.kwargs["transport"] for c in mock_search_cls.call_args_list}
+        assert transports == {search_service._transport}
+
+        search_service.close()
+        first.close.assert_called_once()
+        other.close.assert_called_once()
+        search_service._mock_index_client.close.assert_called_once()
+        assert search_service.get_search_client("a") is not first
+
+
+def _indexing_results(documents, failed=(), status_code=503):
+    return [
+        MagicMock(
+            key=d["id"],
+            succeeded=d["id"] not in failed,
+            status_code=status_code if d["id"] in failed else 201,
+        )
+        for d in documents
+    ]
+
+
+def test_upload_documents_splits_by_count_and_bytes(search_service, monkeypatch):
+    """Requests stay within the document and byte limits, in input order."""
+    monkeypatch.setattr("enrichment.services.search.MAX_UPLOAD_DOCUMENTS", 3)
+    monkeypatch.setattr("enrichment.services.search.MAX_UPLOAD_BYTES", 100)
+    documents = [{"id": f"d{i}", "content": "x"} for i in range(7)]
+    documents[5]["content"] = "y" * 200  # over the byte budget on its own
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        client = mock_search_cls.return_value
+        client.upload_documents.side_effect = _indexing_results
+        results = search_service.upload_documents("idx", documents)
+
+    sent = sorted(
+        [d["id"] for d in c.args[0]] for c in client.upload_documents.call_args_list
+    )
+    assert sent == [["d0", "d1", "d2"], ["d3", "d4"], ["d5"], ["d6"]]
+    assert [r["key"] for r in results] == [d["id"] for d in documents]
+    assert all(r["succeeded"] for r in results)
+    stats = search_service.upload_stats
+    assert (stats.batches, stats.documents, stats.failed) == (4, 7, 0)
+    assert stats.bytes > 200
+
+
+def test_upload_documents_retries_only_failed_keys(search_service, monkeypatch):
+    """Transient per-document failures are resent alone; others are reported."""
+    monkeypatch.setattr("enrichment.services.search._RETRY_DELAY", 0)
+    documents = [{"id": key} for key in ("a", "b", "c")]
+    responses = [
+        _indexing_results(documents, failed={"b"})
+        + [MagicMock(key="x", succeeded=False, status_code=400)],
+        _indexing_results([{"id": "b"}]),
+    ]
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        client = mock_search_cls.return_value
+        client.upload_documents.side_effect = responses
+        results = search_service.upload_documents("idx", documents)
+
+    assert client.upload_documents.call_args_list[1].args[0] == [{"id": "b"}]
+    assert results == [
+        {"key": "a", "succeeded": True},
+        {"key": "b", "succeeded": True},
+        {"key": "c", "succeeded": True},
+        {"key": "x", "succeeded": False},
+    ]
+    assert search_service.upload_stats.retried == 1
+    assert search_service.upload_stats.failed == 1
+
+
+def test_upload_documents_empty(search_service):
+    """No documents means no request."""
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        assert search_service.upload_documents("idx", []) == []
+    mock_search_cls.return_value.upload_documents.assert_not_called()
+
+
+def test_search_projects_selected_fields(search_service):
+    """select is forwarded so the service returns no vector or unused fields."""
+    with patch("enrichment.services.search.SearchClient") as mock_search_cls:
+        mock_client = mock_search_cls.return_value
+        mock_client.search.return_value = []
+
+        search_service.search("test-index", query="test", select=ENHANCED_SELECT)
+        select = mock_client.search.call_args[1]["select"]
+        assert "content_vector" not in select
+        assert "executive_summary" in select
+        assert "section_title" in select
+
+        search_service.search("test-index", query="test")
+        assert mock_client.search.call_args[1]["select"] is None
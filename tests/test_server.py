@@ -23,6 +23,14 @@ def client():
         settings.contentunderstanding_endpoint = ""
         settings.contentunderstanding_key = ""
         settings.embedding_deployment = "text-embedding-3-small"
+        settings.embedding_cache_path = ""
+        settings.embedding_backend = "azure"
+        settings.search_backend = "azure"
+        settings.openai_http_max_connections = 100
+        settings.openai_http_max_keepalive = 20
+        settings.openai_http2 = False
+        settings.openai_adaptive_concurrency = False
+        settings.query_batch_wait_ms = 0
         settings.chat_deployment = "gpt-4o"
         settings.search_index_baseline = "baseline-index"
         settings.search_index_enhanced = "enhanced-index"
@@ -161,6 +169,14 @@ def test_chat_baseline_with_service():
         settings.search_endpoint = "https://test.search.windows.net"
         settings.search_api_key = "test-key"
         settings.embedding_deployment = "text-embedding-3-small"
+        settings.embedding_cache_path = ""
+        settings.embedding_backend = "azure"
+        settings.search_backend = "azure"
+        settings.openai_http_max_connections = 100
+        settings.openai_http_max_keepalive = 20
+        settings.openai_http2 = False
+        settings.openai_adaptive_concurrency = False
+        settings.query_batch_wait_ms = 0
         settings.chat_deployment = "gpt-4o"
         settings.search_index_baseline = "baseline-index"
         settings.search_index_enhanced = "enhanced-index"
@@ -206,6 +222,14 @@ def test_chat_baseline_error_handling():
         settings.search_endpoint = "https://test.search.windows.net"
         settings.search_api_key = "test-key"
         settings.embedding_deployment = "text-embedding-3-small"
+        settings.embedding_cache_path = ""
+        settings.embedding_backend = "azure"
+        settings.search_backend = "azure"
+        settings.openai_http_max_connections = 100
+        settings.openai_http_max_keepalive = 20
+        settings.openai_http2 = False
+        settings.openai_adaptive_concurrency = False
+        settings.query_batch_wait_ms = 0
         settings.chat_deployment = "gpt-4o"
         settings.search_index_baseline = "baseline-index"
         settings.search_index_enhanced = "enhanced-index"
@@ -258,6 +282,18 @@ def _make_configured_settings():
     settings.storage_container_results = "cu-results"
     settings.environment = "test"
     settings.log_level = "INFO"
+    settings.chunk_workers = None
+    settings.dedup_drop_duplicates = False
+    settings.embedding_cache_path = ""
+    settings.embedding_backend = "azure"
+    settings.search_backend = "azure"
+    settings.openai_http_max_connections = 100
+    settings.openai_http_max_keepalive = 20
+    settings.openai_http2 = False
+    settings.openai_adaptive_concurrency = False
+    settings.query_batch_wait_ms = 0
+    settings.query_cache_size = 256
+    settings.query_cache_ttl_seconds = 3600.0
     return settings
 
 
@@ -293,6 +329,33 @@ def test_chat_enhanced_with_service():
         assert len(data["citations"]) == 1
 
 
+def test_shutdown_closes_services():
+    """Leaving the app's lifespan closes the lazily created services."""
+    with (
+        patch("enrichment.server.StorageService"),
+        patch("enrichment.server.SearchService") as mock_search_cls,
+        patch("enrichment.server.EmbeddingService") as mock_embedding_cls,
+        patch("enrichment.server.EmbeddingCache") as mock_cache_cls,
+        patch("enrichment.server.ChatService") as mock_chat_cls,
+        patch("enrichment.server.get_settings") as mock_settings,
+    ):
+        settings = _make_configured_settings()
+        settings.embedding_cache_path = "cache.sqlite"
+        settings.embedding_cache_max_mb = 64
+        mock_settings.return_value = settings
+        mock_chat = mock_chat_cls.return_value
+        mock_chat.chat_baseline.return_value = {"message": "ok", "citations": []}
+
+        with TestClient(create_app()) as test_client:
+            test_client.post("/api/chat/baseline", json={"message": "q"})
+            mock_embedding_cls.return_value.close.assert_not_called()
+
+        mock_chat.batcher.close.assert_called_once()
+        mock_embedding_cls.return_value.close.assert_called_once()
+        mock_cache_cls.return_value.close.assert_called_once()
+        mock_search_cls.return_value.close.assert_called_once()
+
+
 def test_chat_enhanced_error_handling():
     """POST /api/chat/enhanced returns error message when service throws."""
     with (
@@ -372,12 +435,17 @@ def test_pipeline_run_baseline_success():
         patch("enrichment.server.get_settings") as mock_settings,
         patch("enrichment.pipeline.baseline.BaselinePipeline") as mock_pipeline_cls,
     ):
-        mock_settings.return_value = _make_configured_settings()
+        settings = _make_configured_settings()
+        settings.dedup_drop_duplicates = True
+        mock_settings.return_value = settings
         mock_storage = mock_storage_cls.return_value
         mock_storage.list_documents.return_value = ["report1.pdf", "report2.pdf"]
         mock_storage.get_document_sas_url.side_effect = lambda f: f"https://sas/{f}"
 
         mock_pipeline = mock_pipeline_cls.return_value
+        mock_pipeline.process_corpus.side_effect = lambda docs, **_: [
+            {"document_id": doc_id} for doc_id, _ in docs
+        ]
 
         app = create_app()
         test_client = TestClient(app)
@@ -390,8 +458,16 @@ def test_pipeline_run_baseline_success():
         assert data["status"] == "complete"
         assert data["documents_processed"] == 2
         assert data["documents_total"] == 2
+        deduplicator = mock_pipeline_cls.call_args[1]["deduplicator"]
+        assert deduplicator.drop_duplicates
         mock_pipeline.ensure_index.assert_called_once()
-        assert mock_pipeline.process_document.call_count == 2
+        mock_pipeline.process_corpus.assert_called_once_with(
+            [
+                ("report1", "https://sas/report1.pdf"),
+                ("report2", "https://sas/report2.pdf"),
+            ],
+            max_workers=None,
+        )
 
 
 def test_pipeline_run_enhanced_success():
@@ -410,6 +486,7 @@ def test_pipeline_run_enhanced_success():
         mock_storage.get_document_sas_url.return_value = "https://sas/report1.pdf"
 
         mock_pipeline = mock_pipeline_cls.return_value
+        mock_pipeline.process_corpus.return_value = [{"document_id": "report1"}]
 
         app = create_app()
         test_client = TestClient(app)
@@ -423,7 +500,7 @@ def test_pipeline_run_enhanced_success():
         assert data["documents_processed"] == 1
         mock_pipeline.ensure_index.assert_called_once()
         mock_pipeline.ensure_analyzer.assert_called_once()
-        mock_pipeline.process_document.assert_called_once()
+        mock_pipeline.process_corpus.assert_called_once()
 
 
 def test_pipeline_run_error_handling():
@@ -0,0 +1,88 @@
+"""Tests for token counting helpers."""
+
+from __future__ import annotations
+
+import sys
+
+import pytest
+
+from enrichment.services import tokenizer
+from enrichment.services.tokenizer import count_tokens, estimate_tokens, get_encoding
+
+
+@pytest.fixture(autouse=True)
+def _clear_encoding_cache():
+    get_encoding.cache_clear()
+    yield
+    get_encoding.cache_clear()
+
+
+class _FakeEncoding:
+    def encode_ordinary(self, text: str) -> list[int]:
+        return list(range(len(text.split())))
+
+
+def test_estimate_tokens():
+    """Estimates round up at roughly four characters per token."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_get_encoding_without_tiktoken(monkeypatch, caplog):
+    """get_encoding warns and returns None when tiktoken is not installed."""
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    assert get_encoding("text-embedding-3-small") is None
+    assert "tiktoken not installed" in caplog.text
+    assert count_tokens("a" * 40) == estimate_tokens("a" * 40) == 10
+
+
+def test_count_tokens_with_tiktoken():
+    """With the ``tokens`` extra, counts come from the real BPE encoding."""
+    pytest.importorskip("tiktoken")
+    if get_encoding("text-embedding-3-small") is None:
+        pytest.skip("tiktoken BPE files unavailable (no network)")
+    # BPE merges long runs of one character into a few tokens
+    assert count_tokens("hello world") == 2
+    assert count_tokens("a" * 40) < estimate_tokens("a" * 40)
+
+
+def test_get_encoding_load_failure(monkeypatch, caplog):
+    """An encoding that cannot be loaded falls back to estimates."""
+
+    class _OfflineTiktoken:
+        @staticmethod
+        def encoding_for_model(model):
+            raise ConnectionError("no network")
+
+    monkeypatch.setitem(sys.modules, "tiktoken", _OfflineTiktoken)
+    assert get_encoding("gpt-4o") is None
+    assert "Could not load tiktoken encoding" in caplog.text
+
+
+def test_count_tokens_falls_back_to_estimate(monkeypatch):
+    """count_tokens estimates when no encoding is available."""
+    monkeypatch.setattr(tokenizer, "get_encoding", lambda _model: None)
+    assert count_tokens("a" * 40) == 10
+
+
+def test_count_tokens_uses_encoding(monkeypatch):
+    """count_tokens uses the cached encoding when available."""
+    monkeypatch.setattr(tokenizer, "get_encoding", lambda _model: _FakeEncoding())
+    assert count_tokens("one two three") == 3
+
+
+def test_get_encoding_is_cached(monkeypatch):
+    """The encoding is loaded once per model."""
+    calls = []
+
+    class _FakeTiktoken:
+        @staticmethod
+        def encoding_for_model(model):
+            calls.append(model)
+            return _FakeEncoding()
+
+    monkeypatch.setitem(sys.modules, "tiktoken", _FakeTiktoken)
+    first = get_encoding("gpt-4o")
+    assert get_encoding("gpt-4o") is first
+    assert calls == ["gpt-4o"]